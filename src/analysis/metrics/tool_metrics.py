@@ -6,10 +6,9 @@ tool success rates, and tool usage patterns.
 """
 from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime
-import json
 
 from sqlalchemy import func, and_, or_, desc, text, case
-from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm import Session, aliased, undefer_group
 
 from src.models.event import Event
 from src.models.tool_interaction import ToolInteraction
@@ -598,6 +597,9 @@ class ToolMetrics(AnalysisInterface):
             Event.agent_id
         ).join(
             Event, ToolInteraction.event_id == Event.id
+        ).options(
+            # Every row is rendered with its parameters, result and attributes
+            undefer_group("payload")
         )
         
         # Apply time range filters
@@ -661,16 +663,9 @@ class ToolMetrics(AnalysisInterface):
         # Format the results
         interactions = []
         for tool_interaction, span_id, trace_id, agent_id in results:
-            # Parse JSON fields
-            try:
-                parameters = json.loads(tool_interaction.parameters) if tool_interaction.parameters else None
-            except (json.JSONDecodeError, TypeError):
-                parameters = tool_interaction.parameters
-                
-            try:
-                result = json.loads(tool_interaction.result) if tool_interaction.result else None
-            except (json.JSONDecodeError, TypeError):
-                result = tool_interaction.result
+            # JSON fields are already parsed by the column type
+            parameters = tool_interaction.parameters
+            result = tool_interaction.result
             
             # Find all associated event IDs that share the same span_id
             associated_event_ids = []
@@ -11,6 +11,7 @@ import json
 
 # Import the pricing service
 from src.services.pricing_service import pricing_service
+from src.utils.timestamps import parse_iso_timestamp
 
 
 def parse_time_range(
@@ -160,7 +161,7 @@ def _fill_missing_time_points(
             # Convert ISO string to datetime if needed
             timestamp = point[timestamp_field]
             if isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                timestamp = parse_iso_timestamp(timestamp)
             
             # Format timestamp consistently based on resolution
             if resolution.value == 'minute':
@@ -44,14 +44,8 @@ def process_event(event_data: Dict[str, Any], db: Session) -> Event:
         event, security_alert = process_security_event(db, event_data)
         return event
     
-    # For non-security events, use SimpleProcessor
-    # Create a processor - session factory that returns a list containing the session
-    # We create it as a function that returns an iterator to match SimpleProcessor's expectations
-    def session_factory():
-        yield db
-    
-    # Create a processor
-    processor = SimpleProcessor(session_factory)
+    # For non-security events, use SimpleProcessor on the request's session
+    processor = SimpleProcessor(lambda: db)
     
     # Process the event
     result = processor.process_event(event_data)
@@ -162,27 +156,56 @@ async def create_telemetry_events_batch(
     details = []
     processed_ids = []
     
+    # Consecutive non-security events are handed to SimpleProcessor.process_batch
+    # together, so their agents, traces, spans and sessions are created with one
+    # set-based insert per table and committed once instead of per event
+    processor = SimpleProcessor(lambda: db)
+    pending = []
+    
+    def flush_pending():
+        nonlocal processed, failed
+        if not pending:
+            return
+        
+        batch_result = processor.process_batch([event_dict for _, _, event_dict in pending])
+        for (idx, event, _), result in zip(pending, batch_result["results"]):
+            if result["success"]:
+                processed += 1
+                processed_ids.append(str(result["event_id"]))
+                logger.debug(f"Successfully processed event {idx}: {event.name}")
+            else:
+                failed += 1
+                details.append({
+                    "index": idx,
+                    "error": result.get("error", "Unknown error"),
+                    "event_name": event.name
+                })
+        pending.clear()
+    
     for idx, event in enumerate(batch.events):
-        # Create a new transaction for each event
+        # Create a new transaction for each security event
         try:
             # Convert Pydantic model to dict for processing
             event_dict = event.dict()
             
+            # Check if this is a security event
+            event_name = event_dict.get("name", "")
+            if not event_name.startswith("security.content"):
+                pending.append((idx, event, event_dict))
+                continue
+            
+            # Keep ordering: earlier events may be the triggers of this alert
+            flush_pending()
+            
             # Process the event with error handling
             try:
-                # Check if this is a security event
-                event_name = event_dict.get("name", "")
-                if event_name.startswith("security.content"):
-                    # Verify this is a valid security event
-                    is_valid, error_message = verify_security_event(event_dict)
-                    if not is_valid:
-                        raise ValueError(f"Invalid security event: {error_message}")
-                    
-                    # Process as security event
-                    processed_event, security_alert = process_security_event(db, event_dict)
-                else:
-                    # Process using SimpleProcessor
-                    processed_event = process_event(event_dict, db)
+                # Verify this is a valid security event
+                is_valid, error_message = verify_security_event(event_dict)
+                if not is_valid:
+                    raise ValueError(f"Invalid security event: {error_message}")
+                
+                # Process as security event
+                processed_event, security_alert = process_security_event(db, event_dict)
                 
                 # Commit this event's transaction
                 db.commit()
@@ -210,6 +233,8 @@ async def create_telemetry_events_batch(
                 "event_name": event.name if hasattr(event, 'name') else "unknown"
             })
     
+    flush_pending()
+    
     # Return batch processing results
     return TelemetryEventBatchResponse(
         success=failed == 0,
@@ -1,7 +1,7 @@
 from typing import Dict, List, Optional, Any, Union
 from pydantic import BaseModel, Field, validator
-from datetime import datetime
 import json
+from src.utils.timestamps import parse_iso_timestamp
 
 class TelemetryEventBase(BaseModel):
     """Base model for telemetry events"""
@@ -20,7 +20,7 @@ class TelemetryEventBase(BaseModel):
         """Ensure timestamp is in ISO format"""
         try:
             # Validate timestamp format by parsing and then returning the original string
-            datetime.fromisoformat(v.replace('Z', '+00:00'))
+            parse_iso_timestamp(v)
             return v
         except (ValueError, TypeError):
             raise ValueError("Invalid timestamp format. Must be ISO format (YYYY-MM-DDTHH:MM:SS.mmmmmm)")
@@ -14,6 +14,10 @@ class Settings(BaseSettings):
     
     # Database settings
     DATABASE_URL: str = Field("sqlite:///cylestio.db", env="DATABASE_URL")
+    DB_POOL_SIZE: int = Field(20, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(40, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: int = Field(10, env="DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE: int = Field(3600, env="DB_POOL_RECYCLE")
     
     # API settings
     API_PREFIX: str = Field("/api", env="API_PREFIX")
@@ -13,6 +13,7 @@ import os
 from datetime import datetime
 
 from src.models.base import Base, engine, drop_all, create_all
+from src.models.security_alert import AlertSeverity, AlertStatus, normalize_severity, normalize_status
 from src.utils.logging import get_logger
 
 # Set up logger
@@ -39,13 +40,15 @@ class AttributeMigration:
         self.conn = sqlite3.connect(self.db_path)
         # Enable foreign keys
         self.conn.execute("PRAGMA foreign_keys = ON")
-        # Enable JSON functions
-        self.conn.enable_load_extension(True)
-        try:
-            self.conn.load_extension("json1")
-        except sqlite3.OperationalError:
-            logger.warning("Could not load JSON1 extension - JSON functions may not be available")
-        self.conn.enable_load_extension(False)
+        # Enable JSON functions; Python builds without extension loading
+        # rely on the JSON functions built into SQLite
+        if hasattr(self.conn, "enable_load_extension"):
+            self.conn.enable_load_extension(True)
+            try:
+                self.conn.load_extension("json1")
+            except sqlite3.OperationalError:
+                logger.warning("Could not load JSON1 extension - JSON functions may not be available")
+            self.conn.enable_load_extension(False)
         self.cursor = self.conn.cursor()
         return self
         
@@ -373,6 +376,38 @@ class AttributeMigration:
         self.conn.commit()
         logger.info(f"Linked {len(pairs)} LLM interaction pairs")
     
+    def normalize_security_alert_enums(self) -> int:
+        """
+        Rewrite security alert severities and statuses to their enum values.
+        
+        The model reads both columns as enums, so a stored value outside them
+        makes every query that loads the alert fail. Values are mapped with
+        the same rules applied to incoming alerts.
+        
+        Returns:
+            int: Number of alerts updated
+        """
+        logger.info("Normalizing security alert severities and statuses...")
+        
+        updated = 0
+        for column, enum_cls, normalize in (
+            ("severity", AlertSeverity, normalize_severity),
+            ("status", AlertStatus, normalize_status),
+        ):
+            valid = {member.value for member in enum_cls}
+            self.cursor.execute(f"SELECT DISTINCT {column} FROM security_alerts WHERE {column} IS NOT NULL")
+            for (value,) in self.cursor.fetchall():
+                if value not in valid:
+                    self.cursor.execute(
+                        f"UPDATE security_alerts SET {column} = ? WHERE {column} = ?",
+                        (normalize(value).value, value)
+                    )
+                    updated += self.cursor.rowcount
+        
+        self.conn.commit()
+        logger.info(f"Normalized severity or status of {updated} security alerts")
+        return updated
+    
     def populate_empty_tables(self):
         """Populate empty tables with data derived from existing records."""
         self.populate_sessions()
@@ -717,6 +752,9 @@ def main(db_path: str):
         # Migrate attributes to JSON format
         migration.migrate_attributes()
         
+        # Bring severities and statuses within the model's enums
+        migration.normalize_security_alert_enums()
+        
         # Fix NULL timestamps
         migration.update_timestamps()
         
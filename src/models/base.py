@@ -5,14 +5,17 @@ This module provides the Base model class and database connection utilities
 for SQLAlchemy ORM models.
 """
 import os
+import sys
 import logging
-from typing import Iterator, Optional, List, Set
+from typing import Iterator, Optional, List, Set, Dict, Any, Tuple, Type
 from contextlib import contextmanager
 import importlib
 
-from sqlalchemy import create_engine, event, inspect
+from sqlalchemy import create_engine, event, inspect, insert, select
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.sql import Executable
 from sqlalchemy.ext.declarative import DeclarativeMeta
 
 # Import our custom JSON encoder
@@ -24,24 +27,53 @@ logger = logging.getLogger(__name__)
 # Create the SQLAlchemy Base class
 Base = declarative_base()
 
+# Annotation for mapped model classes; declarative_base() returns an untyped
+# class, so Type[Base] is not a valid type
+ModelClass = Type[Any]
+
 # Get settings for database URL
 try:
     from src.config.settings import get_settings
     settings = get_settings()
     DATABASE_URL = settings.DATABASE_URL
+    POOL_OPTIONS = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
 except ImportError:
     # Fallback if settings module is not available
     DEFAULT_DB_PATH = os.path.join(os.getcwd(), "cylestio.db")
     DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{DEFAULT_DB_PATH}")
+    POOL_OPTIONS = {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 20)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 40)),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 3600)),
+    }
     logger.warning(f"Using fallback database URL: {DATABASE_URL}")
 
+# SQLite serializes writers on the file lock, so a large pool only helps
+# server databases; there it also guards against stale connections.
+engine_options: Dict[str, Any]
+if DATABASE_URL.startswith("sqlite"):
+    engine_options = {"connect_args": {"check_same_thread": False}}
+else:
+    engine_options = dict(POOL_OPTIONS, pool_pre_ping=True)
+    # psycopg2 sends the ORM's multi-row INSERTs as VALUES lists already;
+    # "values_plus_batch" also pages other executemany statements, such as
+    # the flush's bulk UPDATEs, through execute_batch
+    if make_url(DATABASE_URL).get_driver_name() == "psycopg2":
+        engine_options["executemany_mode"] = "values_plus_batch"
+
 # Create the SQLAlchemy engine with custom JSON serializer
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
     echo=os.environ.get("SQL_ECHO", "false").lower() == "true",
     json_serializer=dumps,
-    json_deserializer=loads
+    json_deserializer=loads,
+    **engine_options
 )
 
 # Log database information
@@ -57,6 +89,9 @@ if DATABASE_URL.startswith("sqlite"):
         cursor = dbapi_connection.cursor()
         cursor.execute("PRAGMA journal_mode=WAL")
         cursor.execute("PRAGMA synchronous=NORMAL")
+        # Keep sort/temp B-trees off disk and give each connection a 64 MiB page cache
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-65536")
         cursor.execute("PRAGMA foreign_keys=ON")
         cursor.close()
 
@@ -75,6 +110,73 @@ def get_db() -> Iterator[Session]:
         if db is not None:
             db.close()
 
+def insert_or_ignore(db_session: Session, model: ModelClass, rows: List[Dict[str, Any]], key: str) -> None:
+    """
+    Insert rows for a model, skipping any whose unique key already exists.
+    
+    SQLite and PostgreSQL use the native ON CONFLICT DO NOTHING clause so the
+    whole batch costs a single round trip. Other dialects fall back to one
+    SELECT for the existing keys followed by a plain INSERT of the rest.
+    
+    Args:
+        db_session: Database session
+        model: Mapped model class to insert into
+        rows: Column dictionaries, all with the same keys
+        key: Name of the unique column used to detect existing rows
+    """
+    if not rows:
+        return
+    
+    dialect = db_session.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt: Executable = sqlite_insert(model.__table__).on_conflict_do_nothing(index_elements=[key])
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+        stmt = postgresql_insert(model.__table__).on_conflict_do_nothing(index_elements=[key])
+    else:
+        column = model.__table__.c[key]
+        existing = set(db_session.execute(
+            select(column).where(column.in_([row[key] for row in rows]))
+        ).scalars())
+        rows = [row for row in rows if row[key] not in existing]
+        if rows:
+            db_session.execute(insert(model.__table__), rows)
+        return
+    
+    db_session.execute(stmt, rows)
+
+def intern_identifiers(model: ModelClass, *keys: str) -> None:
+    """
+    Intern string identifier columns of a model as instances are built or loaded.
+    
+    Trace, span and session IDs repeat across many rows, so sharing one string
+    object per distinct ID keeps large batches and trace trees smaller in
+    memory. Loaded values are written straight to the instance dict so the
+    objects are not marked as modified.
+    
+    Args:
+        model: Mapped model class
+        keys: Names of the string columns to intern
+    """
+    def intern_kwargs(target: Any, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> None:
+        for key in keys:
+            value = kwargs.get(key)
+            if type(value) is str:
+                kwargs[key] = sys.intern(value)
+    
+    def intern_loaded(target: Any, *args: Any) -> None:
+        state_dict = target.__dict__
+        for key in keys:
+            value = state_dict.get(key)
+            if type(value) is str:
+                state_dict[key] = sys.intern(value)
+    
+    event.listen(model, "init", intern_kwargs)
+    event.listen(model, "load", intern_loaded)
+    event.listen(model, "refresh", intern_loaded)
+
+
 def init_db() -> None:
     """
     Initialize the database and verify all required tables exist.
@@ -84,6 +186,7 @@ def init_db() -> None:
     2. The database exists
     3. All required tables exist
     4. Creates any missing tables
+    5. Creates any missing indexes on existing tables
 
     Raises:
         Exception: If database validation fails and cannot be corrected
@@ -123,6 +226,12 @@ def init_db() -> None:
     else:
         logger.info("All required tables exist in the database")
     
+    # Tables that already existed don't get indexes added to their models since;
+    # create any that are missing
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
     # Verify tables were created successfully
     after_tables = set(inspect(engine).get_table_names())
     still_missing = model_tables - after_tables
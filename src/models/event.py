@@ -4,17 +4,43 @@ Event model for telemetry events.
 This module defines the Event model for storing telemetry events received
 from agents.
 """
-from datetime import datetime
 from typing import Dict, Any, List, Optional, Type, Union
 
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 
-from src.models.base import Base
+from src.models.base import Base, intern_identifiers
+from src.utils.timestamps import parse_iso_timestamp
 
 # Type aliases
 EventDict = Dict[str, Any]
 
+# Event name prefix (the part before the first ".") -> event_type
+EVENT_TYPE_BY_PREFIX = {
+    "llm": "llm",
+    "security": "security",
+    "framework": "framework",
+    "tool": "tool",
+}
+
+
+def event_type_for_name(event_name: str) -> str:
+    """
+    Classify an event by the prefix of its name.
+    
+    Only the first dot-separated segment is looked up, so classification
+    costs one split and one dict probe however many prefixes are registered.
+    
+    Args:
+        event_name: Event name such as ``llm.call.start``
+        
+    Returns:
+        str: The event type, or "generic" for names without a known prefix
+    """
+    prefix, separator, _ = event_name.partition(".")
+    return EVENT_TYPE_BY_PREFIX.get(prefix, "generic") if separator else "generic"
+
+
 class Event(Base):
     """
     Event model for telemetry events.
@@ -72,6 +98,13 @@ class Event(Base):
         Index("ix_events_span_timestamp", span_id, timestamp.desc()),
         Index("ix_events_session_timestamp", session_id, timestamp.desc()),
         Index("ix_events_type_timestamp", event_type, timestamp.desc()),
+        # Covers Session.get_statistics (per-type and distinct-trace counts) so it
+        # can be answered from the index alone; events without a session are left out
+        Index(
+            "ix_events_session_type_trace", session_id, event_type, trace_id,
+            sqlite_where=session_id.isnot(None),
+            postgresql_where=session_id.isnot(None)
+        ),
         {"extend_existing": True}
     )
     
@@ -111,20 +144,10 @@ class Event(Base):
         # Parse timestamp if it's a string
         timestamp = event_data.get("timestamp")
         if isinstance(timestamp, str):
-            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+            timestamp = parse_iso_timestamp(timestamp)
         
         # Determine event type
-        event_name = event_data.get("name", "")
-        if event_name.startswith("llm."):
-            event_type = "llm"
-        elif event_name.startswith("security."):
-            event_type = "security"
-        elif event_name.startswith("framework."):
-            event_type = "framework"
-        elif event_name.startswith("tool."):
-            event_type = "tool"
-        else:
-            event_type = "generic"
+        event_type = event_type_for_name(event_data.get("name", ""))
         
         # Create the base event
         event = cls(
@@ -208,4 +231,8 @@ class Event(Base):
             from src.models.framework_event import FrameworkEvent
             specialized = FrameworkEvent.from_event(db_session, event, event_data)
             if specialized:
-                event.framework_event = specialized 
\ No newline at end of file
+                event.framework_event = specialized
+
+
+# Names and levels come from a small vocabulary, so intern them with the IDs
+intern_identifiers(Event, "name", "level", "agent_id", "trace_id", "span_id", "session_id")
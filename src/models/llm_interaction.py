@@ -5,13 +5,13 @@ This module defines the LLMInteraction model for storing LLM interactions
 from telemetry events.
 """
 import json
-from datetime import datetime
 from typing import Dict, Any, List, Optional, Union, Tuple
 
 from sqlalchemy import Column, Integer, String, Float, Boolean, Text, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 
 from src.models.base import Base
+from src.utils.timestamps import parse_iso_timestamp
 
 
 class LLMInteraction(Base):
@@ -94,29 +94,31 @@ class LLMInteraction(Base):
         # Debug logs for troubleshooting
         import logging
         logger = logging.getLogger(__name__)
-        logger.debug(f"Creating LLM interaction for event ID: {event.id}, name: {event.name}")
-        
-        # Log the structure of telemetry_data
-        if telemetry_data:
-            logger.debug(f"Telemetry data type: {type(telemetry_data)}")
-            logger.debug(f"Telemetry data keys: {list(telemetry_data.keys())}")
-            
-            # Check for attributes key
-            if 'attributes' in telemetry_data:
-                logger.debug(f"Attributes found in telemetry_data")
-                logger.debug(f"Attribute keys: {list(telemetry_data['attributes'].keys())}")
-                logger.debug(f"LLM-related keys: {[k for k in telemetry_data['attributes'].keys() if k.startswith('llm.')]}")
+        logger.debug("Creating LLM interaction for event ID: %s, name: %s", event.id, event.name)
+        
+        # Log the structure of telemetry_data; building the key lists costs
+        # something on every LLM event, so only do it when debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            if telemetry_data:
+                logger.debug("Telemetry data type: %s", type(telemetry_data))
+                logger.debug("Telemetry data keys: %s", list(telemetry_data.keys()))
                 
-                # Check for specific important keys
-                for key in ['llm.vendor', 'llm.model', 'llm.request.timestamp']:
-                    logger.debug(f"{key} present: {key in telemetry_data['attributes']}")
-                    if key in telemetry_data['attributes']:
-                        logger.debug(f"{key} value: {telemetry_data['attributes'][key]}")
-        else:
-            logger.debug("No telemetry_data provided")
-            logger.debug(f"Event data attribute: {hasattr(event, 'data')}")
-            if hasattr(event, 'data'):
-                logger.debug(f"Event data value: {event.data}")
+                # Check for attributes key
+                if 'attributes' in telemetry_data:
+                    logger.debug("Attributes found in telemetry_data")
+                    logger.debug("Attribute keys: %s", list(telemetry_data['attributes'].keys()))
+                    logger.debug("LLM-related keys: %s", [k for k in telemetry_data['attributes'].keys() if k.startswith('llm.')])
+                    
+                    # Check for specific important keys
+                    for key in ['llm.vendor', 'llm.model', 'llm.request.timestamp']:
+                        logger.debug("%s present: %s", key, key in telemetry_data['attributes'])
+                        if key in telemetry_data['attributes']:
+                            logger.debug("%s value: %s", key, telemetry_data['attributes'][key])
+            else:
+                logger.debug("No telemetry_data provided")
+                logger.debug("Event data attribute: %s", hasattr(event, 'data'))
+                if hasattr(event, 'data'):
+                    logger.debug("Event data value: %s", event.data)
             
         # If telemetry_data is provided, use the method with telemetry support
         if telemetry_data:
@@ -133,15 +135,15 @@ class LLMInteraction(Base):
             raise ValueError("Event data is required to create an LLM interaction")
             
         try:
-            logger.debug(f"Attempting to parse event.data: {event.data}")
+            logger.debug("Attempting to parse event.data: %s", event.data)
             event_data = json.loads(event.data)
-            logger.debug(f"Parsed event_data keys: {list(event_data.keys())}")
+            logger.debug("Parsed event_data keys: %s", list(event_data.keys()))
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse event.data as JSON: {str(e)}")
             raise ValueError("Event data must be valid JSON")
             
         payload = event_data.get("payload", {})
-        logger.debug(f"Payload keys: {list(payload.keys())}")
+        logger.debug("Payload keys: %s", list(payload.keys()))
         
         # Determine interaction type from event name
         interaction_type = 'start' if event.name == 'llm.call.start' else 'finish'
@@ -186,7 +188,7 @@ class LLMInteraction(Base):
         )
         
         db_session.add(llm_interaction)
-        logger.debug(f"Created LLM interaction in db_session, type: {interaction_type}")
+        logger.debug("Created LLM interaction in db_session, type: %s", interaction_type)
         
         # Look for related interaction to link
         if interaction_type == 'start':
@@ -213,35 +215,34 @@ class LLMInteraction(Base):
         logger = logging.getLogger(__name__)
         
         attributes = telemetry_data.get('attributes', {})
+        get = attributes.get
         
         # Determine interaction type from event name
         interaction_type = 'start' if event.name == 'llm.call.start' else 'finish'
         
         # Extract vendor for vendor-specific parameter handling
-        vendor = attributes.get('llm.vendor', '')
+        vendor = get('llm.vendor', '')
         
         # Get request timestamp
         request_timestamp = None
-        if attributes.get('llm.request.timestamp'):
+        raw_request_timestamp = get('llm.request.timestamp')
+        if raw_request_timestamp:
             try:
-                request_timestamp = datetime.fromisoformat(
-                    attributes.get('llm.request.timestamp').replace('Z', '+00:00')
-                )
+                request_timestamp = parse_iso_timestamp(raw_request_timestamp)
             except (ValueError, TypeError) as e:
-                logger.warning(f"Invalid request timestamp: {attributes.get('llm.request.timestamp')}, error: {str(e)}")
+                logger.warning(f"Invalid request timestamp: {raw_request_timestamp}, error: {str(e)}")
         
         # Get response timestamp
         response_timestamp = None
-        if attributes.get('llm.response.timestamp'):
+        raw_response_timestamp = get('llm.response.timestamp')
+        if raw_response_timestamp:
             try:
-                response_timestamp = datetime.fromisoformat(
-                    attributes.get('llm.response.timestamp').replace('Z', '+00:00')
-                )
+                response_timestamp = parse_iso_timestamp(raw_response_timestamp)
             except (ValueError, TypeError) as e:
-                logger.warning(f"Invalid response timestamp: {attributes.get('llm.response.timestamp')}, error: {str(e)}")
+                logger.warning(f"Invalid response timestamp: {raw_response_timestamp}, error: {str(e)}")
         
         # Extract request data to look for configuration parameters
-        request_data = attributes.get('llm.request.data', {})
+        request_data = get('llm.request.data', {})
         
         # First try standard attribute extraction
         config_params = cls._extract_config_parameters(attributes, vendor)
@@ -255,51 +256,47 @@ class LLMInteraction(Base):
                     config_params[param] = value
         
         # Parse response content if available
-        response_content = None
-        if attributes.get('llm.response.content'):
+        response_content = get('llm.response.content') or None
+        if isinstance(response_content, str):
             try:
-                if isinstance(attributes.get('llm.response.content'), str):
-                    response_content = json.loads(attributes.get('llm.response.content'))
-                else:
-                    response_content = attributes.get('llm.response.content')
+                response_content = json.loads(response_content)
             except json.JSONDecodeError:
-                logger.warning(f"Failed to parse response content as JSON: {attributes.get('llm.response.content')}")
-                response_content = attributes.get('llm.response.content')
+                logger.warning(f"Failed to parse response content as JSON: {response_content}")
         
         # Extract additional metadata fields
-        session_id = attributes.get('session.id')
-        user_id = attributes.get('user.id') or attributes.get('llm.user.id')
-        prompt_template_id = attributes.get('prompt.template_id') or attributes.get('llm.prompt.template_id')
+        session_id = get('session.id')
+        user_id = get('user.id') or get('llm.user.id')
+        prompt_template_id = get('prompt.template_id') or get('llm.prompt.template_id')
         
         # Extract stream flag
-        stream = attributes.get('stream') or attributes.get('llm.stream')
+        stream = get('stream') or get('llm.stream')
         if stream is not None:
             stream = bool(stream)
         
         # Extract cached_response flag
-        cached_response = attributes.get('cached_response') or attributes.get('llm.cached_response') or attributes.get('llm.response.cached')
+        cached_response = get('cached_response') or get('llm.cached_response') or get('llm.response.cached')
         if cached_response is not None:
             cached_response = bool(cached_response)
         
         # Extract model_version
-        model_version = attributes.get('model_version') or attributes.get('llm.model_version') or attributes.get('llm.model.version')
+        model_version = get('model_version') or get('llm.model_version') or get('llm.model.version')
         
         # Create LLM interaction
         llm_interaction = cls(
             event_id=event.id,
             interaction_type=interaction_type,
             vendor=vendor,
-            model=attributes.get('llm.model', ''),
+            model=get('llm.model', ''),
             request_timestamp=request_timestamp,
             response_timestamp=response_timestamp,
-            duration_ms=attributes.get('llm.response.duration_ms'),
-            input_tokens=attributes.get('llm.usage.input_tokens'),
-            output_tokens=attributes.get('llm.usage.output_tokens'),
-            total_tokens=attributes.get('llm.usage.total_tokens'),
+            duration_ms=get('llm.response.duration_ms'),
+            input_tokens=get('llm.usage.input_tokens'),
+            output_tokens=get('llm.usage.output_tokens'),
+            total_tokens=get('llm.usage.total_tokens'),
             request_data=request_data,
             response_content=response_content,
-            response_id=attributes.get('llm.response.id'),
-            stop_reason=attributes.get('llm.response.stop_reason'),
+            response_id=get('llm.response.id'),
+            stop_reason=get('llm.response.stop_reason'),
             raw_attributes=attributes,  # Store raw attributes
             
             # Configuration parameters
@@ -351,7 +348,7 @@ class LLMInteraction(Base):
         ).first()
         
         if finish_interaction:
-            logger.debug(f"Linking start interaction {start_interaction.id} with finish interaction {finish_interaction.id}")
+            logger.debug("Linking start interaction %s with finish interaction %s", start_interaction.id, finish_interaction.id)
             start_interaction.related_interaction_id = finish_interaction.id
             finish_interaction.related_interaction_id = start_interaction.id
             db_session.add(finish_interaction)
@@ -379,7 +376,7 @@ class LLMInteraction(Base):
         ).first()
         
         if start_interaction:
-            logger.debug(f"Linking finish interaction {finish_interaction.id} with start interaction {start_interaction.id}")
+            logger.debug("Linking finish interaction %s with start interaction %s", finish_interaction.id, start_interaction.id)
             finish_interaction.related_interaction_id = start_interaction.id
             start_interaction.related_interaction_id = finish_interaction.id
             db_session.add(start_interaction)
@@ -503,7 +500,7 @@ class LLMInteraction(Base):
         logger = logging.getLogger(__name__)
         
         # Debug parameter extraction
-        logger.debug(f"Extracting config parameters for vendor: {vendor}")
+        logger.debug("Extracting config parameters for vendor: %s", vendor)
         
         # First try standard parameter formats (direct attributes)
         params = {
@@ -517,9 +514,9 @@ class LLMInteraction(Base):
         }
         
         # Debug extracted parameters
-        logger.debug(f"Standard parameter extraction results:")
-        logger.debug(f"  temperature: {params['temperature']}")
-        logger.debug(f"  max_tokens: {params['max_tokens']}")
+        logger.debug("Standard parameter extraction results:")
+        logger.debug("  temperature: %s", params['temperature'])
+        logger.debug("  max_tokens: %s", params['max_tokens'])
         
         # If vendor-specific extraction is needed and standard extraction failed
         if not params['temperature'] or not params['max_tokens']:
@@ -540,7 +537,7 @@ class LLMInteraction(Base):
             for param, value in vendor_params.items():
                 if not params.get(param) and value is not None:
                     params[param] = value
-                    logger.debug(f"Updated {param} to {value} from vendor-specific extraction")
+                    logger.debug("Updated %s to %s from vendor-specific extraction", param, value)
         
         # One last attempt: check if the parameters are in the request_data
         if (not params['temperature'] or not params['max_tokens']) and 'llm.request.data' in attributes:
@@ -553,23 +550,23 @@ class LLMInteraction(Base):
                 # Extract parameters directly from request_data
                 if not params['temperature'] and 'temperature' in request_data:
                     params['temperature'] = request_data['temperature']
-                    logger.debug(f"Extracted temperature {params['temperature']} from request_data")
+                    logger.debug("Extracted temperature %s from request_data", params['temperature'])
                 
                 if not params['max_tokens'] and 'max_tokens' in request_data:
                     params['max_tokens'] = request_data['max_tokens']
-                    logger.debug(f"Extracted max_tokens {params['max_tokens']} from request_data")
+                    logger.debug("Extracted max_tokens %s from request_data", params['max_tokens'])
                 
                 # Check for vendor-specific parameter names in request_data
                 if vendor.lower() == 'anthropic' and not params['max_tokens'] and 'max_tokens_to_sample' in request_data:
                     params['max_tokens'] = request_data['max_tokens_to_sample']
-                    logger.debug(f"Extracted max_tokens {params['max_tokens']} from request_data.max_tokens_to_sample")
+                    logger.debug("Extracted max_tokens %s from request_data.max_tokens_to_sample", params['max_tokens'])
             except Exception as e:
                 logger.error(f"Error extracting parameters from request_data: {str(e)}")
         
         # Debug final extracted values
-        logger.debug(f"Final extracted parameters:")
-        logger.debug(f"  temperature: {params['temperature']}")
-        logger.debug(f"  max_tokens: {params['max_tokens']}")
+        logger.debug("Final extracted parameters:")
+        logger.debug("  temperature: %s", params['temperature'])
+        logger.debug("  max_tokens: %s", params['max_tokens'])
         
         return params
     
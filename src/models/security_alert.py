@@ -4,14 +4,144 @@ Security Alert model and related functionality.
 This module defines the SecurityAlert model for storing security-related events
 in the OpenTelemetry-compliant format with additional security metrics.
 """
+import enum
 import json
+import logging
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Set, Union, Tuple
+from typing import Callable, Dict, Any, List, Optional, Set, Union, Tuple, Type
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Text, DateTime, Table, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Text, DateTime, Table, JSON, insert
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.engine import Dialect
+from sqlalchemy.types import TypeDecorator
 
 from src.models.base import Base
+from src.utils.timestamps import parse_iso_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+class AlertSeverity(str, enum.Enum):
+    """Severity levels a security alert can be reported with."""
+    LOW = "low"
+    MEDIUM = "medium"
+    HIGH = "high"
+    CRITICAL = "critical"
+    
+    def __str__(self) -> str:
+        return self.value
+
+
+class AlertStatus(str, enum.Enum):
+    """Lifecycle states of a security alert."""
+    OPEN = "OPEN"
+    INVESTIGATING = "INVESTIGATING"
+    RESOLVED = "RESOLVED"
+    FALSE_POSITIVE = "FALSE_POSITIVE"
+    
+    def __str__(self) -> str:
+        return self.value
+
+
+def _enum_values(enum_cls: Type[enum.Enum]) -> List[str]:
+    """Persist enum members by value so stored strings stay unchanged."""
+    return [member.value for member in enum_cls]
+
+
+# Severity names reporters use that are not AlertSeverity values
+SEVERITY_ALIASES = {
+    "info": AlertSeverity.LOW,
+    "informational": AlertSeverity.LOW,
+    "warn": AlertSeverity.MEDIUM,
+    "warning": AlertSeverity.MEDIUM,
+    "moderate": AlertSeverity.MEDIUM,
+    "error": AlertSeverity.HIGH,
+    "severe": AlertSeverity.HIGH,
+    "fatal": AlertSeverity.CRITICAL,
+}
+
+# Severity given to alerts whose reported severity is not recognized; high,
+# so an unfamiliar value is surfaced for review rather than buried as low
+UNRECOGNIZED_SEVERITY = AlertSeverity.HIGH
+
+
+def normalize_severity(value: Any) -> AlertSeverity:
+    """
+    Map a reported severity onto AlertSeverity.
+    
+    Values are matched case-insensitively, then through SEVERITY_ALIASES.
+    Anything else is logged and stored as UNRECOGNIZED_SEVERITY; the
+    original value is still available in raw_attributes.
+    
+    Args:
+        value: Severity as reported
+        
+    Returns:
+        AlertSeverity: The severity to store
+    """
+    name = str(value).lower()
+    try:
+        return AlertSeverity(name)
+    except ValueError:
+        pass
+    severity = SEVERITY_ALIASES.get(name)
+    if severity is None:
+        logger.warning("Unrecognized security alert severity %r stored as %s", value, UNRECOGNIZED_SEVERITY)
+        severity = UNRECOGNIZED_SEVERITY
+    return severity
+
+
+def normalize_status(value: Any) -> AlertStatus:
+    """
+    Map a stored alert status onto AlertStatus.
+    
+    Values are matched case-insensitively. Anything else is logged and
+    treated as OPEN, so the alert is reviewed again.
+    
+    Args:
+        value: Status as stored
+        
+    Returns:
+        AlertStatus: The status to store
+    """
+    try:
+        return AlertStatus(str(value).upper())
+    except ValueError:
+        logger.warning("Unrecognized security alert status %r stored as %s", value, AlertStatus.OPEN)
+        return AlertStatus.OPEN
+
+
+class AlertEnum(TypeDecorator[enum.Enum]):
+    """
+    Alert enum stored as its string value.
+    
+    Members are written by value and read back as members. Rows written
+    before severity and status became enums may hold other strings, such as
+    'moderate' or 'MEDIUM'; those are passed through ``normalize`` on read
+    rather than failing the load. The schema migration rewrites them in place.
+    """
+    impl = String
+    cache_ok = True
+    
+    def __init__(self, enum_class: Type[enum.Enum], normalize: Callable[[Any], enum.Enum]):
+        self.enums = _enum_values(enum_class)
+        super().__init__(length=max(len(value) for value in self.enums))
+        self.enum_class = enum_class
+        self.normalize = normalize
+        self._members = {member.value: member for member in enum_class}
+    
+    def process_bind_param(self, value: Any, dialect: Dialect) -> Optional[str]:
+        if isinstance(value, self.enum_class):
+            return str(value.value)
+        return None if value is None else str(value)
+    
+    def process_result_value(self, value: Optional[str], dialect: Dialect) -> Optional[enum.Enum]:
+        if value is None:
+            return None
+        member = self._members.get(value)
+        if member is None:
+            member = self.normalize(value)
+        return member
 
 
 class SecurityAlert(Base):
@@ -39,7 +169,7 @@ class SecurityAlert(Base):
     # Security-specific attributes
     alert_level = Column(String, nullable=False, index=True)  # none, suspicious, dangerous, critical
     category = Column(String, nullable=False, index=True)     # sensitive_data, prompt_injection, etc.
-    severity = Column(String, nullable=False, index=True)     # low, medium, high, critical
+    severity: "Column[enum.Enum]" = Column(AlertEnum(AlertSeverity, normalize_severity), nullable=False, index=True)
     description = Column(Text, nullable=False)
     
     # Additional security context
@@ -49,12 +179,13 @@ class SecurityAlert(Base):
     keywords = Column(JSON)                  # List of detected patterns with masked values
     
     # Status tracking fields (kept from original model)
-    status = Column(String, index=True, default="OPEN")  # 'OPEN', 'INVESTIGATING', 'RESOLVED', 'FALSE_POSITIVE'
+    status: "Column[enum.Enum]" = Column(AlertEnum(AlertStatus, normalize_status), index=True, default=AlertStatus.OPEN)
     resolved_at = Column(DateTime)
-    resolution_notes = Column(Text)
+    resolution_notes = deferred(Column(Text), group="body")
     
     # Complete data storage
-    raw_attributes = Column(JSON)  # Store full attributes for future analysis
+    # Deferred: list views never render it; load with undefer_group("body")
+    raw_attributes = deferred(Column(JSON), group="body")  # Store full attributes for future analysis
     
     # Relationships
     event = relationship("Event", back_populates="security_alert")
@@ -92,11 +223,11 @@ class SecurityAlert(Base):
         if attributes.get("security.detection_time"):
             detection_time = attributes.get("security.detection_time")
             if isinstance(detection_time, str):
-                detection_time = datetime.fromisoformat(detection_time.replace('Z', '+00:00'))
+                detection_time = parse_iso_timestamp(detection_time)
         
         event_timestamp = telemetry_data.get('timestamp') or event.timestamp or datetime.utcnow()
         if isinstance(event_timestamp, str):
-            event_timestamp = datetime.fromisoformat(event_timestamp.replace('Z', '+00:00'))
+            event_timestamp = parse_iso_timestamp(event_timestamp)
         
         # Map OpenTelemetry fields to model fields
         security_alert = cls(
@@ -114,7 +245,7 @@ class SecurityAlert(Base):
             # Security-specific attributes
             alert_level=attributes.get('security.alert_level', 'none'),
             category=attributes.get('security.category', 'unknown'),
-            severity=attributes.get('security.severity', 'low'),
+            severity=normalize_severity(attributes.get('security.severity', 'low')),
             description=attributes.get('security.description', 'No description provided'),
             
             # Additional security context
@@ -124,7 +255,7 @@ class SecurityAlert(Base):
             keywords=attributes.get('security.keywords'),
             
             # Status tracking (defaults)
-            status="OPEN",
+            status=AlertStatus.OPEN,
             
             # Complete data storage
             raw_attributes=attributes
@@ -159,7 +290,7 @@ class SecurityAlert(Base):
         timestamp = None
         if timestamp_str:
             try:
-                timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+                timestamp = parse_iso_timestamp(timestamp_str)
             except (ValueError, TypeError):
                 timestamp = datetime.utcnow()
         else:
@@ -170,7 +301,7 @@ class SecurityAlert(Base):
         
         alert_level = attributes.get("security.alert_level", "none")
         category = attributes.get("security.category", "unknown")
-        severity = attributes.get("security.severity", "low")
+        severity = normalize_severity(attributes.get("security.severity", "low"))
         description = attributes.get("security.description", "No description provided")
         llm_vendor = attributes.get("llm.vendor")
         content_sample = attributes.get("security.content_sample")
@@ -181,7 +312,7 @@ class SecurityAlert(Base):
         detection_time = None
         if detection_time_str:
             try:
-                detection_time = datetime.fromisoformat(detection_time_str.replace('Z', '+00:00'))
+                detection_time = parse_iso_timestamp(detection_time_str)
             except (ValueError, TypeError):
                 detection_time = timestamp
         
@@ -219,7 +350,7 @@ class SecurityAlert(Base):
             resolution_notes: Notes about the resolution
             resolved_at: When the alert was resolved (default: current time)
         """
-        self.status = "RESOLVED"
+        self.status = AlertStatus.RESOLVED
         self.resolved_at = resolved_at or datetime.utcnow()
         self.resolution_notes = resolution_notes
     
@@ -231,7 +362,7 @@ class SecurityAlert(Base):
             notes: Notes about why this is a false positive
             resolved_at: When the alert was resolved (default: current time)
         """
-        self.status = "FALSE_POSITIVE"
+        self.status = AlertStatus.FALSE_POSITIVE
         self.resolved_at = resolved_at or datetime.utcnow()
         self.resolution_notes = notes
     
@@ -300,7 +431,7 @@ class SecurityAlert(Base):
         
         return db_session.query(cls).join(Event).filter(
             Event.agent_id == agent_id,
-            cls.status == "OPEN"
+            cls.status == AlertStatus.OPEN
         ).order_by(cls.timestamp.desc()).all()
     
     @classmethod
@@ -408,6 +539,22 @@ class SecurityAlertTrigger(Base):
         
         db_session.add(trigger)
         return trigger
+    
+    @staticmethod
+    def bulk_create(db_session, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert trigger relationships in a single executemany round trip.
+        
+        This bypasses ORM object construction and the unit of work, which makes
+        it the preferred path for creating triggers during ingestion.
+        
+        Args:
+            db_session: Database session
+            rows: Dictionaries with ``alert_id`` and ``triggering_event_id`` keys
+        """
+        if not rows:
+            return
+        db_session.execute(_TRIGGER_INSERT, rows)
         
     @staticmethod
     def find_matching_events(db_session, alert: "SecurityAlert") -> List["Event"]:
@@ -433,4 +580,8 @@ class SecurityAlertTrigger(Base):
             # All events before the alert
             query = query.filter(Event.timestamp <= alert.event.timestamp)
             
-        return query.all() 
\ No newline at end of file
+        return query.all() 
+
+
+# Compiled once at import time and reused by SecurityAlertTrigger.bulk_create
+_TRIGGER_INSERT = insert(SecurityAlertTrigger.__table__)
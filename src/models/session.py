@@ -4,14 +4,44 @@ Session model and related functionality.
 This module defines the Session model for representing user interaction sessions
 with agents, including session start/end and related telemetry.
 """
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Optional, Tuple
+import threading
+import time
 import uuid
+import weakref
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Select, func, select, distinct
+from sqlalchemy.orm import relationship, Session as DBSession
 
-from src.models.base import Base
+from src.models.base import Base, insert_or_ignore, intern_identifiers
+
+if TYPE_CHECKING:
+    from src.models.event import Event
+    from src.models.trace import Trace
+
+# Cache of Session.get_statistics counts per engine, each mapping
+# (session_id, end_timestamp) -> (expires_at, counts), least recently used
+# first. Keying by the engine object rather than its id() means a disposed
+# engine's entries go with it and are never served to a new engine that
+# happens to reuse the address.
+# Dashboards poll the same sessions repeatedly; any new event that moves
+# end_timestamp changes the key, and the TTL bounds staleness for late,
+# out-of-order events.
+_STATS_CACHE: "weakref.WeakKeyDictionary[Any, OrderedDict[Tuple[Any, ...], Tuple[float, Dict[str, Any]]]]" = (
+    weakref.WeakKeyDictionary()
+)
+_STATS_CACHE_LOCK = threading.Lock()
+_STATS_CACHE_SIZE = 4096
+_STATS_TTL_ACTIVE_SECONDS = 5
+_STATS_TTL_CLOSED_SECONDS = 300
+
+
+def clear_statistics_cache() -> None:
+    """Drop all cached session statistics."""
+    with _STATS_CACHE_LOCK:
+        _STATS_CACHE.clear()
 
 
 class Session(Base):
@@ -56,7 +86,8 @@ class Session(Base):
             self.end_timestamp = latest_timestamp
     
     @classmethod
-    def get_or_create(cls, db_session, session_id: str, agent_id: str, initialize_end_timestamp: bool = False) -> "Session":
+    def get_or_create(cls, db_session: DBSession, session_id: str, agent_id: str, initialize_end_timestamp: bool = False,
+                      now: Optional[datetime] = None) -> "Session":
         """
         Get an existing session or create a new one if it doesn't exist.
         
@@ -65,6 +96,7 @@ class Session(Base):
             session_id: Unique identifier for the session
             agent_id: ID of the parent agent
             initialize_end_timestamp: Whether to initialize end_timestamp to the same value as start_timestamp
+            now: Creation time to use for a new session (optional, lets a batch share one clock read)
             
         Returns:
             Session: The retrieved or created session
@@ -75,7 +107,7 @@ class Session(Base):
             return session
         
         # Create a new session if it doesn't exist
-        current_time = datetime.utcnow()
+        current_time = now or datetime.utcnow()
         
         # Create the session with or without initializing end_timestamp
         if initialize_end_timestamp:
@@ -96,6 +128,47 @@ class Session(Base):
         db_session.add(session)
         return session
     
+    @classmethod
+    def bulk_get_or_create(cls, db_session: DBSession, rows: List[Dict[str, Any]],
+                           now: Optional[datetime] = None) -> Dict[str, "Session"]:
+        """
+        Get or create many sessions with two queries.
+        
+        Missing sessions are inserted with a single INSERT ... ON CONFLICT DO
+        NOTHING, then all requested sessions are loaded with one SELECT. When a
+        session_id appears more than once the first row wins, matching
+        sequential get_or_create calls.
+        
+        Args:
+            db_session: Database session
+            rows: Dictionaries with ``session_id`` and ``agent_id`` keys and
+                optional ``start_timestamp`` and ``end_timestamp`` keys
+            now: Default start_timestamp for new sessions (optional)
+            
+        Returns:
+            Dict[str, Session]: Sessions keyed by session_id
+        """
+        current_time = now or datetime.utcnow()
+        unique_rows = {}
+        for row in rows:
+            if row["session_id"] not in unique_rows:
+                unique_rows[row["session_id"]] = {
+                    "session_id": row["session_id"],
+                    "agent_id": row["agent_id"],
+                    "start_timestamp": row.get("start_timestamp") or current_time,
+                    "end_timestamp": row.get("end_timestamp")
+                }
+        if not unique_rows:
+            return {}
+        
+        insert_or_ignore(db_session, cls, list(unique_rows.values()), "session_id")
+        
+        sessions: Dict[Any, "Session"] = {
+            session.session_id: session
+            for session in db_session.query(cls).filter(cls.session_id.in_(unique_rows))
+        }
+        return sessions
+    
     @classmethod
     def generate_session_id(cls) -> str:
         """
@@ -106,7 +179,7 @@ class Session(Base):
         """
         return str(uuid.uuid4())
     
-    def end_session(self, db_session, end_timestamp: Optional[datetime] = None) -> None:
+    def end_session(self, db_session: DBSession, end_timestamp: Optional[datetime] = None) -> None:
         """
         End the session.
         
@@ -117,6 +190,7 @@ class Session(Base):
         if self.end_timestamp is None:
             self.end_timestamp = end_timestamp or datetime.utcnow() + timedelta(hours=2)
             db_session.add(self)
+            self._invalidate_statistics()
     
     @property
     def duration_seconds(self) -> Optional[float]:
@@ -135,7 +209,7 @@ class Session(Base):
             
         return (self.end_timestamp - self.start_timestamp).total_seconds()
     
-    def update_end_timestamp(self, db_session, timestamp: datetime) -> None:
+    def update_end_timestamp(self, db_session: DBSession, timestamp: datetime) -> None:
         """
         Update the session's end timestamp if the provided timestamp is more recent.
         
@@ -158,7 +232,7 @@ class Session(Base):
             self.end_timestamp = timestamp
             db_session.add(self)
     
-    def get_event_count(self, db_session) -> int:
+    def get_event_count(self, db_session: DBSession) -> int:
         """
         Get the total number of events in the session.
         
@@ -171,13 +245,16 @@ class Session(Base):
         from src.models.event import Event
         
         return db_session.query(func.count(Event.id)).filter(
-            Event.session_id == self.id
+            Event.session_id == self.session_id
         ).scalar() or 0
     
-    def get_events_by_type(self, db_session, event_type: str) -> List["Event"]:
+    def get_events_by_type(self, db_session: DBSession, event_type: str) -> List["Event"]:
         """
         Get events in the session of a specific type.
         
+        Kept for existing callers; prefer get_events_by_type_iter when the
+        events only need to be iterated, since this loads them all at once.
+        
         Args:
             db_session: Database session
             event_type: The type of events to retrieve
@@ -185,14 +262,36 @@ class Session(Base):
         Returns:
             List[Event]: Events of the specified type
         """
+        return list(self.get_events_by_type_iter(db_session, event_type))
+    
+    def get_events_by_type_iter(self, db_session: DBSession, event_type: str,
+                                chunk: int = 1000) -> Iterator["Event"]:
+        """
+        Iterate over events in the session of a specific type.
+        
+        Rows are streamed from the cursor and converted to objects in chunks,
+        so memory use stays bounded for long-running sessions.
+        
+        Args:
+            db_session: Database session
+            event_type: The type of events to retrieve
+            chunk: Number of rows fetched per round trip
+            
+        Yields:
+            Event: Events of the specified type, ordered by timestamp
+        """
         from src.models.event import Event
         
-        return db_session.query(Event).filter(
-            Event.session_id == self.id,
+        stmt = select(Event).where(
+            Event.session_id == self.session_id,
             Event.event_type == event_type
-        ).order_by(Event.timestamp).all()
+        ).order_by(Event.timestamp).execution_options(
+            stream_results=True, yield_per=chunk
+        )
+        
+        yield from db_session.scalars(stmt)
     
-    def get_traces(self, db_session) -> List["Trace"]:
+    def get_traces(self, db_session: DBSession) -> List["Trace"]:
         """
         Get all traces that contain events from this session.
         
@@ -205,58 +304,100 @@ class Session(Base):
         from src.models.trace import Trace
         from src.models.event import Event
         
-        # Get unique trace_ids for this session
-        trace_ids_query = db_session.query(Event.trace_id).filter(
-            Event.session_id == self.id,
+        # Resolve the session's trace_ids in a subquery so this is one round trip
+        trace_ids: Select[Any] = select(Event.trace_id).where(
+            Event.session_id == self.session_id,
             Event.trace_id.isnot(None)
-        ).distinct()
+        )
         
-        trace_ids = [result[0] for result in trace_ids_query.all()]
-        
-        if not trace_ids:
-            return []
-            
-        # Get all traces with those trace_ids
         return db_session.query(Trace).filter(
             Trace.trace_id.in_(trace_ids)
         ).all()
     
-    def get_statistics(self, db_session) -> Dict[str, Any]:
+    def get_statistics(self, db_session: DBSession) -> Dict[str, Any]:
         """
         Get statistics about the session.
         
+        Event counts are cached briefly per (session_id, end_timestamp), with a
+        longer TTL once the session is closed.
+        
         Args:
             db_session: Database session
             
         Returns:
             Dict: Statistics about the session
         """
-        from src.models.event import Event
+        bind = db_session.get_bind()
+        cache_key = (self.session_id, self.end_timestamp)
+        now = time.monotonic()
+        counts: Optional[Dict[str, Any]] = None
+        with _STATS_CACHE_LOCK:
+            engine_cache = _STATS_CACHE.get(bind)
+            if engine_cache is not None:
+                cached = engine_cache.get(cache_key)
+                if cached and cached[0] > now:
+                    engine_cache.move_to_end(cache_key)
+                    counts = cached[1]
+        
+        if counts is None:
+            counts = self._compute_event_counts(db_session)
+            ttl = _STATS_TTL_CLOSED_SECONDS if self.get_status() == "closed" else _STATS_TTL_ACTIVE_SECONDS
+            with _STATS_CACHE_LOCK:
+                engine_cache = _STATS_CACHE.setdefault(bind, OrderedDict())
+                engine_cache[cache_key] = (now + ttl, counts)
+                engine_cache.move_to_end(cache_key)
+                while len(engine_cache) > _STATS_CACHE_SIZE:
+                    engine_cache.popitem(last=False)
         
-        event_count = self.get_event_count(db_session)
+        return {
+            "event_count": counts["event_count"],
+            "event_types": dict(counts["event_types"]),
+            "trace_count": counts["trace_count"],
+            "start_timestamp": self.start_timestamp,
+            "end_timestamp": self.end_timestamp,
+            "duration_seconds": self.duration_seconds
+        }
+    
+    def _compute_event_counts(self, db_session: DBSession) -> Dict[str, Any]:
+        """
+        Count the session's events, per event type and distinct traces.
         
-        # Get event counts by type
-        event_types_query = db_session.query(
-            Event.event_type, func.count(Event.id)
-        ).filter(
-            Event.session_id == self.id
-        ).group_by(Event.event_type)
+        Args:
+            db_session: Database session
+            
+        Returns:
+            Dict: event_count, event_types and trace_count
+        """
+        from src.models.event import Event
         
-        event_types = {event_type: count for event_type, count in event_types_query.all()}
+        # Per-type counts and the distinct trace count in one round trip.
+        # Event.session_id references the session_id string, not the row id.
+        trace_count = select(func.count(distinct(Event.trace_id))).where(
+            Event.session_id == self.session_id
+        ).correlate(None).scalar_subquery()
+        rows = db_session.execute(
+            select(Event.event_type, func.count(Event.id), trace_count).where(
+                Event.session_id == self.session_id
+            ).group_by(Event.event_type)
+        ).all()
         
-        # Get trace count
-        traces = self.get_traces(db_session)
+        event_types = {event_type: count for event_type, count, _ in rows}
+        event_count = sum(event_types.values())
         
         return {
             "event_count": event_count,
             "event_types": event_types,
-            "trace_count": len(traces),
-            "start_timestamp": self.start_timestamp,
-            "end_timestamp": self.end_timestamp,
-            "duration_seconds": self.duration_seconds
+            "trace_count": rows[0][2] if rows else 0
         }
     
-    def get_events_sorted(self, db_session) -> List["Event"]:
+    def _invalidate_statistics(self) -> None:
+        """Drop cached statistics for this session."""
+        with _STATS_CACHE_LOCK:
+            for engine_cache in _STATS_CACHE.values():
+                for key in [key for key in engine_cache if key[0] == self.session_id]:
+                    del engine_cache[key]
+    
+    def get_events_sorted(self, db_session: DBSession) -> List["Event"]:
         """
         Get all events in the session sorted by timestamp.
         
@@ -295,4 +436,7 @@ class Session(Base):
         if minutes_since_last_activity <= inactive_threshold_minutes:
             return "active"
         else:
-            return "closed" 
\ No newline at end of file
+            return "closed"
+
+
+intern_identifiers(Session, "session_id", "agent_id")
@@ -5,12 +5,26 @@ This module defines the Span model for representing spans in distributed tracing
 Spans are part of a trace and represent a single operation within a trace.
 """
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Union
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, JSON, func
-from sqlalchemy.orm import relationship, Session
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, JSON, func, select, inspect, update, case, or_, literal
+from sqlalchemy.orm import relationship, InstanceState, Session
+from sqlalchemy.orm.util import identity_key
 
-from src.models.base import Base
+from src.models.base import Base, insert_or_ignore, intern_identifiers
+
+# db_session.info key for the span_id -> root_span_id cache kept per session
+SPAN_ROOT_CACHE_KEY = "span_root_cache"
+
+# Last event name segments that mark where a span opens or closes; they are
+# dropped when a span is named after its first event
+SPAN_BOUNDARY_SUFFIXES = frozenset({"start", "begin", "end", "finish", "complete", "stop"})
+
+# Deepest level get_all_descendants walks below a span. Carrying the depth
+# makes every CTE row distinct, so this bound is what stops the walk on
+# cyclic parent links; real span trees are far shallower.
+MAX_SPAN_DEPTH = 1000
 
 
 class Span(Base):
@@ -38,9 +52,9 @@ class Span(Base):
         return f"<Span {self.span_id}>"
     
     @classmethod
-    def get_or_create(cls, db_session, span_id: str, trace_id: str, 
+    def get_or_create(cls, db_session: Session, span_id: str, trace_id: str, 
                     parent_span_id: Optional[str] = None, name: Optional[str] = None,
-                    event_name: Optional[str] = None) -> "Span":
+                    event_name: Optional[str] = None, now: Optional[datetime] = None) -> "Span":
         """
         Get an existing span or create a new one if it doesn't exist.
         
@@ -51,6 +65,7 @@ class Span(Base):
             parent_span_id: ID of the parent span (optional)
             name: Name of the span (optional)
             event_name: Name of the triggering event (optional, used to derive span name if not provided)
+            now: Creation time to use for a new span (optional, lets a batch share one clock read)
             
         Returns:
             Span: The retrieved or newly created span
@@ -60,9 +75,20 @@ class Span(Base):
         trace_id_str = str(trace_id) if trace_id is not None else None
         parent_span_id_str = str(parent_span_id) if parent_span_id is not None else None
         
-        span = db_session.query(cls).filter(cls.span_id == span_id_str).first()
+        # Roots of spans seen earlier in this session; a parent found here does
+        # not need to be loaded just to read its root_span_id
+        root_cache = db_session.info.setdefault(SPAN_ROOT_CACHE_KEY, {})
+        
+        # Fetch the span and its parent together; spans already in the identity
+        # map (e.g. preloaded by bulk_get_or_create) need no query at all
+        lookup_ids: List[Optional[str]] = [span_id_str]
+        if parent_span_id_str not in root_cache:
+            lookup_ids.append(parent_span_id_str)
+        known = cls._load_by_ids(db_session, lookup_ids)
+        span = known.get(span_id_str)
         
         if span:
+            root_cache[span_id_str] = span.root_span_id or span_id_str
             # Update name if provided and the current one is None
             if not span.name and name:
                 span.name = name
@@ -82,8 +108,10 @@ class Span(Base):
         root_span_id = None
         if parent_span_id_str:
             # If this span has a parent, find the parent's root or use parent as root
-            parent_span = db_session.query(cls).filter(cls.span_id == parent_span_id_str).first()
-            if parent_span:
+            parent_span = known.get(parent_span_id_str)
+            if parent_span_id_str in root_cache:
+                root_span_id = root_cache[parent_span_id_str]
+            elif parent_span:
                 root_span_id = parent_span.root_span_id or parent_span.span_id
             else:
                 # If parent span not found yet, use parent_span_id as root
@@ -98,16 +126,156 @@ class Span(Base):
             parent_span_id=parent_span_id_str,
             root_span_id=root_span_id,
             name=name,
-            start_timestamp=datetime.now()
+            start_timestamp=now or datetime.now()
         )
         db_session.add(span)
+        root_cache[span_id_str] = root_span_id
         return span
     
+    @classmethod
+    def _load_by_ids(cls, db_session: Session, span_ids: Sequence[Optional[str]]) -> Dict[str, "Span"]:
+        """
+        Load spans by ID, using the identity map before the database.
+        
+        Args:
+            db_session: Database session
+            span_ids: Span IDs to load; None entries are ignored
+            
+        Returns:
+            Dict[str, Span]: The spans that exist, keyed by span_id
+        """
+        known: Dict[Any, "Span"] = {}
+        missing = set()
+        for span_id in span_ids:
+            if span_id is None or span_id in known:
+                continue
+            span = db_session.identity_map.get(identity_key(cls, span_id))
+            if span is not None:
+                known[span_id] = span
+            else:
+                missing.add(span_id)
+        
+        if missing:
+            known.update(
+                (span.span_id, span)
+                for span in db_session.query(cls).filter(cls.span_id.in_(missing))
+            )
+        return known
+    
+    @classmethod
+    def bulk_get_or_create(cls, db_session: Session, rows: List[Dict[str, Any]],
+                           now: Optional[datetime] = None) -> Dict[str, "Span"]:
+        """
+        Get or create many spans with a fixed number of queries.
+        
+        Existing spans and their parents are loaded with one SELECT, missing
+        spans are inserted with a single INSERT ... ON CONFLICT DO NOTHING and
+        then loaded with one more SELECT. Parents appearing earlier in ``rows``
+        are used to resolve root_span_id just as sequential get_or_create
+        calls would. New spans are inserted already widened to the
+        timestamps of their rows, so later update_timestamps calls for the
+        same events leave them unchanged.
+        
+        Args:
+            db_session: Database session
+            rows: Dictionaries with ``span_id`` and ``trace_id`` keys and
+                optional ``parent_span_id``, ``event_name`` and ``timestamp``
+                keys
+            now: Creation time to use for new spans (optional)
+            
+        Returns:
+            Dict[str, Span]: Spans keyed by span_id
+        """
+        # Normalise IDs to strings and keep the first occurrence of each span,
+        # collecting the earliest and latest timestamp of all its rows
+        unique_rows: Dict[str, Dict[str, Any]] = {}
+        time_ranges: Dict[str, Tuple[datetime, datetime]] = {}
+        for row in rows:
+            # trace_id is NOT NULL; leave such spans to get_or_create so one bad
+            # row cannot fail the whole insert
+            if row.get("span_id") is None or row.get("trace_id") is None:
+                continue
+            span_id = str(row["span_id"])
+            timestamp = row.get("timestamp")
+            if timestamp is not None:
+                time_range = time_ranges.get(span_id)
+                if time_range is None:
+                    time_ranges[span_id] = (timestamp, timestamp)
+                else:
+                    time_ranges[span_id] = (min(time_range[0], timestamp), max(time_range[1], timestamp))
+            if span_id not in unique_rows:
+                parent_span_id = row.get("parent_span_id")
+                unique_rows[span_id] = {
+                    "span_id": span_id,
+                    "trace_id": str(row["trace_id"]) if row.get("trace_id") is not None else None,
+                    "parent_span_id": str(parent_span_id) if parent_span_id is not None else None,
+                    "event_name": row.get("event_name")
+                }
+        if not unique_rows:
+            return {}
+        
+        lookup_ids = list(unique_rows)
+        lookup_ids.extend(row["parent_span_id"] for row in unique_rows.values() if row["parent_span_id"])
+        known: Dict[Any, "Span"] = cls._load_by_ids(db_session, lookup_ids)
+        
+        # Root span of spans created in this call, for children later in the batch
+        new_roots: Dict[str, Any] = {}
+        insert_rows = []
+        current_time = now or datetime.now()
+        for span_id, row in unique_rows.items():
+            span = known.get(span_id)
+            if span:
+                if not span.name and row["event_name"]:
+                    span.name = cls._derive_span_name_from_event(row["event_name"])
+                continue
+            
+            parent_span_id = row["parent_span_id"]
+            if parent_span_id:
+                parent_span = known.get(parent_span_id)
+                if parent_span:
+                    root_span_id = parent_span.root_span_id or parent_span.span_id
+                else:
+                    root_span_id = new_roots.get(parent_span_id, parent_span_id)
+            else:
+                root_span_id = span_id
+            new_roots[span_id] = root_span_id
+            
+            # Start from the creation time, as get_or_create does, widened
+            # to the span's own timestamps
+            start_timestamp, end_timestamp = time_ranges.get(span_id, (current_time, None))
+            insert_rows.append({
+                "span_id": span_id,
+                "trace_id": row["trace_id"],
+                "parent_span_id": parent_span_id,
+                "root_span_id": root_span_id,
+                "name": cls._derive_span_name_from_event(row["event_name"]) if row["event_name"] else None,
+                "start_timestamp": min(start_timestamp, current_time),
+                "end_timestamp": end_timestamp
+            })
+        
+        if insert_rows:
+            insert_or_ignore(db_session, cls, insert_rows, "span_id")
+            known.update(
+                (span.span_id, span)
+                for span in db_session.query(cls).filter(cls.span_id.in_(new_roots))
+            )
+        
+        spans = {span_id: known[span_id] for span_id in unique_rows if span_id in known}
+        root_cache = db_session.info.setdefault(SPAN_ROOT_CACHE_KEY, {})
+        root_cache.update(
+            (span_id, span.root_span_id or span_id) for span_id, span in spans.items()
+        )
+        return spans
+    
     @staticmethod
+    @lru_cache(maxsize=1024)
     def _derive_span_name_from_event(event_name: str) -> str:
         """
         Derive a meaningful span name from an event name.
         
+        Event names come from a small fixed vocabulary and this runs for every
+        span lookup during ingestion, so results are memoized.
+        
         Args:
             event_name: Name of the event
             
@@ -118,8 +286,8 @@ class Span(Base):
             return "unknown_span"
             
         # Extract meaningful span names from event patterns
-        if "." in event_name:
-            category, action = event_name.split(".", 1)
+        category, separator, action = event_name.partition(".")
+        if separator:
             if category == "llm" and action.startswith("call"):
                 return "llm_interaction"
             elif category == "tool" and action.startswith("call"):
@@ -132,16 +300,29 @@ class Span(Base):
                 return f"{category}_{action}"
         return event_name
     
-    def update_timestamps(self, db_session, start_time: Optional[datetime] = None,
+    def update_timestamps(self, db_session: Session, start_time: Optional[datetime] = None,
                         end_time: Optional[datetime] = None) -> None:
         """
         Update the start and/or end timestamps for this span.
         
+        Timestamps only ever widen the span. If the span is persistent but its
+        timestamps are not loaded (e.g. expired by a commit), the comparison is
+        done by the database in a single conditional UPDATE instead of a
+        refresh SELECT followed by a flushed UPDATE.
+        
         Args:
             db_session: Database session
             start_time: Start timestamp (optional)
             end_time: End timestamp (optional)
         """
+        if not start_time and not end_time:
+            return
+        
+        state: InstanceState["Span"] = inspect(self)
+        if state.persistent and state.unloaded & {"start_timestamp", "end_timestamp"}:
+            self._widen_in_database(db_session, start_time, end_time)
+            return
+        
         updated = False
         
         if start_time and (not self.start_timestamp or start_time < self.start_timestamp):
@@ -155,6 +336,34 @@ class Span(Base):
         if updated:
             db_session.add(self)
     
+    def _widen_in_database(self, db_session: Session, start_time: Any = None, end_time: Any = None) -> None:
+        """
+        Widen the stored timestamps with one conditional UPDATE.
+        
+        Args:
+            db_session: Database session
+            start_time: Start timestamp or SQL expression (optional)
+            end_time: End timestamp or SQL expression (optional)
+        """
+        cls = type(self)
+        values = {}
+        if start_time is not None:
+            values["start_timestamp"] = case(
+                (or_(cls.start_timestamp.is_(None), cls.start_timestamp > start_time), start_time),
+                else_=cls.start_timestamp
+            )
+        if end_time is not None:
+            values["end_timestamp"] = case(
+                (or_(cls.end_timestamp.is_(None), cls.end_timestamp < end_time), end_time),
+                else_=cls.end_timestamp
+            )
+        db_session.execute(
+            # Read the key from the identity so an expired span is not refreshed
+            update(cls).where(cls.span_id == inspect(self).identity[0]).values(**values),
+            execution_options={"synchronize_session": False}
+        )
+        db_session.expire(self, list(values))
+    
     def get_duration_seconds(self) -> Optional[float]:
         """
         Get the duration of this span in seconds.
@@ -168,21 +377,50 @@ class Span(Base):
         delta = self.end_timestamp - self.start_timestamp
         return delta.total_seconds()
     
-    def get_child_spans(self, db_session) -> List["Span"]:
+    @staticmethod
+    def group_by_parent(spans: List["Span"]) -> Dict[Optional[str], List["Span"]]:
+        """
+        Group spans by their parent span ID.
+        
+        Build this once from an eagerly loaded trace (see Trace.load_full) and
+        pass it to get_child_spans/get_sibling_spans to avoid a query per span.
+        
+        Args:
+            spans: Spans to group, usually all spans of one trace
+            
+        Returns:
+            Dict[Optional[str], List[Span]]: Spans keyed by parent_span_id (None for roots)
+        """
+        children_by_parent: Dict[Any, List["Span"]] = {}
+        for span in spans:
+            children_by_parent.setdefault(span.parent_span_id, []).append(span)
+        return children_by_parent
+    
+    def _events_loaded(self) -> bool:
+        """Check whether the events collection has already been loaded."""
+        return "events" not in inspect(self).unloaded
+    
+    def get_child_spans(self, db_session: Session,
+                        children_by_parent: Optional[Dict[Optional[str], List["Span"]]] = None) -> List["Span"]:
         """
         Get all child spans of this span.
         
         Args:
             db_session: Database session
+            children_by_parent: Optional mapping from group_by_parent; when given
+                no query is issued
             
         Returns:
             List[Span]: Child spans
         """
+        if children_by_parent is not None:
+            return list(children_by_parent.get(self.span_id, []))
+        
         return db_session.query(Span).filter(
             Span.parent_span_id == self.span_id
         ).all()
     
-    def get_event_count(self, db_session) -> int:
+    def get_event_count(self, db_session: Session) -> int:
         """
         Get the total number of events associated with this span.
         
@@ -192,19 +430,31 @@ class Span(Base):
         Returns:
             int: Number of events
         """
+        if self._events_loaded():
+            return len(self.events)
+        
         from src.models.event import Event
         return db_session.query(Event).filter(Event.span_id == self.span_id).count()
     
-    def get_sibling_spans(self, db_session) -> List["Span"]:
+    def get_sibling_spans(self, db_session: Session,
+                          children_by_parent: Optional[Dict[Optional[str], List["Span"]]] = None) -> List["Span"]:
         """
         Get all sibling spans (spans with the same parent).
         
         Args:
             db_session: Database session
+            children_by_parent: Optional mapping from group_by_parent for this
+                span's trace; when given no query is issued
             
         Returns:
             List[Span]: Sibling spans
         """
+        if children_by_parent is not None:
+            return [
+                span for span in children_by_parent.get(self.parent_span_id or None, [])
+                if span.span_id != self.span_id
+            ]
+        
         if not self.parent_span_id:
             # For root spans, get other root spans in the same trace
             return db_session.query(Span).filter(
@@ -218,7 +468,7 @@ class Span(Base):
             Span.span_id != self.span_id
         ).all()
     
-    def get_all_descendants(self, db_session) -> List["Span"]:
+    def get_all_descendants(self, db_session: Session) -> List["Span"]:
         """
         Get all descendant spans (children, grandchildren, etc.).
         
@@ -226,19 +476,35 @@ class Span(Base):
             db_session: Database session
             
         Returns:
-            List[Span]: All descendant spans
+            List[Span]: All descendant spans, level by level (children
+                first), ordered by start time within a level with spans
+                lacking one last
         """
-        result = []
-        
-        children = self.get_child_spans(db_session)
-        result.extend(children)
-        
-        for child in children:
-            result.extend(child.get_all_descendants(db_session))
-            
-        return result
+        # Walk the parent links in a single recursive CTE rather than one
+        # query per node, carrying each span's depth below this one
+        descendants = select(Span.span_id, literal(1).label("depth")).where(
+            Span.parent_span_id == self.span_id
+        ).cte("descendants", recursive=True)
+        descendants = descendants.union(
+            select(Span.span_id, descendants.c.depth + 1).where(
+                Span.parent_span_id == descendants.c.span_id,
+                descendants.c.depth < MAX_SPAN_DEPTH
+            )
+        )
+        # A span reached more than once through a cycle keeps its shallowest depth
+        levels = select(
+            descendants.c.span_id, func.min(descendants.c.depth).label("depth")
+        ).group_by(descendants.c.span_id).subquery()
+        
+        return db_session.query(Span).join(
+            levels, Span.span_id == levels.c.span_id
+        ).filter(
+            Span.span_id != self.span_id
+        ).order_by(
+            levels.c.depth, Span.start_timestamp.asc().nulls_last(), Span.span_id
+        ).all()
     
-    def get_span_tree(self, db_session) -> List["Span"]:
+    def get_span_tree(self, db_session: Session) -> List["Span"]:
         """
         Get the entire span tree rooted at this span.
         
@@ -250,7 +516,7 @@ class Span(Base):
         """
         return [self] + self.get_all_descendants(db_session)
     
-    def get_first_event_timestamp(self, db_session) -> Optional[datetime]:
+    def get_first_event_timestamp(self, db_session: Session) -> Optional[datetime]:
         """
         Get the timestamp of the first event in this span.
         
@@ -260,6 +526,9 @@ class Span(Base):
         Returns:
             datetime: Timestamp of the first event, or None if no events
         """
+        if self._events_loaded():
+            return min((event.timestamp for event in self.events), default=None)
+        
         from src.models.event import Event
         event = db_session.query(Event).filter(
             Event.span_id == self.span_id
@@ -267,7 +536,7 @@ class Span(Base):
         
         return event.timestamp if event else None
     
-    def get_last_event_timestamp(self, db_session) -> Optional[datetime]:
+    def get_last_event_timestamp(self, db_session: Session) -> Optional[datetime]:
         """
         Get the timestamp of the last event in this span.
         
@@ -277,6 +546,9 @@ class Span(Base):
         Returns:
             datetime: Timestamp of the last event, or None if no events
         """
+        if self._events_loaded():
+            return max((event.timestamp for event in self.events), default=None)
+        
         from src.models.event import Event
         event = db_session.query(Event).filter(
             Event.span_id == self.span_id
@@ -284,13 +556,31 @@ class Span(Base):
         
         return event.timestamp if event else None
     
-    def update_timestamps_from_events(self, db_session) -> None:
+    def update_timestamps_from_events(self, db_session: Session) -> None:
         """
         Update span timestamps based on the first and last events in the span.
         
+        For a persistent span the MIN/MAX lookups and the update are fused into
+        a single UPDATE statement. Pending spans, spans with loaded events and
+        spans with unflushed timestamp changes are handled in memory.
+        
         Args:
             db_session: Database session
         """
+        state: InstanceState["Span"] = inspect(self)
+        timestamps_changed = any(
+            state.attrs[key].history.has_changes() for key in ("start_timestamp", "end_timestamp")
+        )
+        if state.persistent and state.identity is not None and not self._events_loaded() and not timestamps_changed:
+            from src.models.event import Event
+            events_of_span = Event.span_id == state.identity[0]
+            self._widen_in_database(
+                db_session,
+                select(func.min(Event.timestamp)).where(events_of_span).scalar_subquery(),
+                select(func.max(Event.timestamp)).where(events_of_span).scalar_subquery()
+            )
+            return
+        
         first_timestamp = self.get_first_event_timestamp(db_session)
         last_timestamp = self.get_last_event_timestamp(db_session)
         
@@ -326,10 +616,9 @@ class Span(Base):
         event_name = event.name
         
         # Remove any "start", "begin", "end", "finish" suffixes
-        suffixes = [".start", ".begin", ".end", ".finish", ".complete", ".stop"]
-        for suffix in suffixes:
-            if event_name.endswith(suffix):
-                return event_name[:-len(suffix)]
+        base_name, separator, suffix = event_name.rpartition(".")
+        if separator and suffix in SPAN_BOUNDARY_SUFFIXES:
+            return base_name
                 
         return event_name
         
@@ -376,4 +665,7 @@ class Span(Base):
         """
         from src.models.event import Event
         
-        # ... existing code ... 
\ No newline at end of file
+        # ... existing code ...
+
+
+intern_identifiers(Span, "span_id", "trace_id", "parent_span_id", "root_span_id")
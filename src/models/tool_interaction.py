@@ -4,18 +4,116 @@ Tool Interaction model and related functionality.
 This module defines the ToolInteraction model for storing details about tool calls
 made by agents, including request, response, and other metadata.
 """
-import json
 from datetime import datetime
 import sqlalchemy as sa
 from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 
 from src.models.base import Base
 from src.models.event import Event
+from src.utils.json_serializer import dumps as _dumps, loads as _loads
 
 from typing import Dict, Any, Optional, List, Tuple
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Text, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Text, DateTime, JSON, Index
+from sqlalchemy.types import TypeDecorator
+
+
+def _to_json_text(value: Any) -> Optional[str]:
+    """
+    Serialize a value for a JSON text column.
+    
+    Producers often send parameters and results already serialized. A string
+    holding a JSON object or array is stored as is instead of being encoded
+    a second time; any other value, including plain strings, is serialized.
+    
+    Args:
+        value: The value to store
+        
+    Returns:
+        str or None: The JSON text
+    """
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode()
+    if isinstance(value, str) and value.lstrip()[:1] in ("{", "["):
+        return value
+    return _dumps(value)
+
+
+# Metadata column -> (flat attribute keys, key inside the nested "tool" dict),
+# checked in that order
+_METADATA_KEYS = (
+    ("tool_version", ("tool_version", "tool.version"), "version"),
+    ("status_code", ("status_code", "tool.status_code"), "status_code"),
+    ("response_time_ms", ("response_time_ms", "tool.response_time_ms"), "response_time_ms"),
+    ("authorization_level", ("authorization_level", "tool.authorization_level"), "authorization_level"),
+    ("execution_time_ms", ("execution_time_ms", "tool.execution_time_ms"), "execution_time_ms"),
+    ("cache_hit", ("cache_hit", "tool.cache_hit"), "cache_hit"),
+    ("api_version", ("api_version", "tool.api_version"), "api_version"),
+)
+
+
+# Event name -> (interaction_type, whether the event timestamp is the request
+# or the response time); tool.call.start is deliberately mapped to "result"
+_INTERACTION_KINDS = {
+    "tool.execution": ("execution", "request"),
+    "tool.result": ("result", "response"),
+    "tool.call.finish": ("result", "response"),
+    "tool.call.error": ("result", "response"),
+    "tool.call.start": ("result", "request"),
+}
+
+# Flat attribute key -> metadata column it is promoted to
+_PROMOTED_KEYS = {key: column for column, flat_keys, _ in _METADATA_KEYS for key in flat_keys}
+
+
+def _extract_metadata(attributes: Dict[str, Any], tool_attrs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the optional metadata columns from tool event attributes.
+    
+    Args:
+        attributes: Flat event attributes
+        tool_attrs: The nested ``tool`` attribute dictionary, if any
+        
+    Returns:
+        Dict[str, Any]: Column values keyed by column name, None when absent
+    """
+    get = attributes.get
+    metadata = {"framework_name": get("framework.name") or get("framework")}
+    for column, flat_keys, nested_key in _METADATA_KEYS:
+        value = None
+        for key in flat_keys:
+            value = get(key)
+            if value:
+                break
+        metadata[column] = value or tool_attrs.get(nested_key)
+    return metadata
+
+
+class JSONText(TypeDecorator):
+    """
+    JSON value stored in a TEXT column.
+    
+    Values are serialized on write and parsed on read, so callers work with
+    dicts and lists directly. Pre-serialized JSON objects and arrays are
+    written through unchanged. Rows written before this type was introduced
+    may hold plain, non-JSON strings; those are returned unchanged.
+    """
+    impl = Text
+    cache_ok = True
+    
+    def process_bind_param(self, value: Any, dialect) -> Optional[str]:
+        return _to_json_text(value)
+    
+    def process_result_value(self, value: Optional[str], dialect) -> Any:
+        if value is None:
+            return None
+        try:
+            return _loads(value)
+        except ValueError:
+            return value
 
 
 class ToolInteraction(Base):
@@ -30,14 +128,16 @@ class ToolInteraction(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     event_id = Column(Integer, ForeignKey("events.id"), nullable=False, unique=True, index=True)
     
-    tool_name = Column(String, nullable=False, index=True)
+    tool_name = Column(String, nullable=False)
     interaction_type = Column(String, index=True)  # 'execution', 'result'
     status = Column(String, index=True)  # 'success', 'error', 'pending'
     status_code = Column(Integer)
     response_time_ms = Column(Float)
     
-    parameters = Column(Text)  # JSON string
-    result = Column(Text)      # JSON string
+    # Deferred: large payloads most list and aggregate queries never read;
+    # load with undefer_group("payload")
+    parameters = deferred(Column(JSONText), group="payload")
+    result = deferred(Column(JSONText), group="payload")
     error = Column(Text)
     
     request_timestamp = Column(DateTime)
@@ -55,11 +155,17 @@ class ToolInteraction(Base):
     api_version = Column(String)
     
     # Raw attributes JSON storage for complete data
-    raw_attributes = Column(JSON)
+    raw_attributes = deferred(Column(JSON), group="payload")
     
     # Relationships
     event = relationship("Event", back_populates="tool_interaction")
     
+    # Add indexes for common queries
+    __table_args__ = (
+        # Per-tool status over a time window; also serves tool_name lookups
+        Index("ix_tool_interactions_name_status_ts", tool_name, status, request_timestamp),
+    )
+    
     def __repr__(self) -> str:
         return f"<ToolInteraction {self.id} ({self.tool_name})>"
     
@@ -88,28 +194,22 @@ class ToolInteraction(Base):
             attributes = event.get_attributes_dict()
         
         # Handle nested tool attributes format common in tests
-        tool_attrs = attributes.get("tool", {})
+        get = attributes.get
+        tool_attrs = get("tool", {})
+        tool_get = tool_attrs.get
         
         # Initialize values
-        tool_name = attributes.get("tool.name") or tool_attrs.get("name", "unknown")
-        tool_id = attributes.get("tool.id") or tool_attrs.get("id")
+        tool_name = get("tool.name") or tool_get("name", "unknown")
+        tool_id = get("tool.id") or tool_get("id")
         
         # Handle parameters - could be a list or a string or a dict
-        parameters_raw = attributes.get("tool.params") or tool_attrs.get("params")
-        parameters = None
-        if parameters_raw:
-            if isinstance(parameters_raw, (list, dict)):
-                parameters = json.dumps(parameters_raw)
-            else:
-                parameters = parameters_raw
+        parameters = get("tool.params") or tool_get("params") or None
         
         # For result events, extract result and status information
-        result_raw = attributes.get("tool.result") or tool_attrs.get("result")
-        result = attributes.get("tool.result.type") or result_raw
-        if result and isinstance(result, dict):
-            result = json.dumps(result)
+        result_raw = get("tool.result") or tool_get("result")
+        result = get("tool.result.type") or result_raw
         
-        status = attributes.get("tool.status") or tool_attrs.get("status", "unknown")
+        status = get("tool.status") or tool_get("status", "unknown")
         
         # If we have a pending execution or success/error status in result
         if event.name == "tool.execution":
@@ -118,45 +218,33 @@ class ToolInteraction(Base):
             status = "success"
         
         # Handle error information
-        error = attributes.get("tool.error") or tool_attrs.get("error")
+        error = get("tool.error") or tool_get("error")
         if error and isinstance(error, dict):
-            error = json.dumps(error)
+            error = _dumps(error)
         
-        # Status code handling
-        status_code = attributes.get("status_code") or attributes.get("tool.status_code") or tool_attrs.get("status_code")
+        # Extract metadata fields (status code, timings, versions, ...)
+        metadata = _extract_metadata(attributes, tool_attrs)
+        status_code = metadata["status_code"]
+        response_time_ms = metadata["response_time_ms"]
         
-        # Extract timestamps
-        request_timestamp = None
-        response_timestamp = None
-        response_time_ms = attributes.get("response_time_ms") or attributes.get("tool.response_time_ms") or tool_attrs.get("response_time_ms")
+        # Determine interaction type and timestamps based on event name
+        interaction_type, timestamp_kind = _INTERACTION_KINDS.get(event.name, (None, None))
+        request_timestamp = event.timestamp if timestamp_kind == "request" else None
+        response_timestamp = event.timestamp if timestamp_kind == "response" else None
         
-        # Determine interaction type based on event name
-        interaction_type = None
-        if event.name == "tool.execution":
-            interaction_type = "execution"
-            request_timestamp = event.timestamp
-        elif event.name in ["tool.result", "tool.call.finish", "tool.call.error"]:
-            interaction_type = "result"
-            response_timestamp = event.timestamp
-        elif event.name in ["tool.call.start"]:
-            # Always map tool.call.start to result interaction type for tests
-            interaction_type = "result"
-            request_timestamp = event.timestamp
-        
-        # Extract additional metadata fields
-        framework_name = attributes.get("framework.name") or attributes.get("framework")
-        tool_version = attributes.get("tool_version") or attributes.get("tool.version") or tool_attrs.get("version")
-        authorization_level = attributes.get("authorization_level") or attributes.get("tool.authorization_level") or tool_attrs.get("authorization_level")
-        execution_time_ms = attributes.get("execution_time_ms") or attributes.get("tool.execution_time_ms") or tool_attrs.get("execution_time_ms")
-        cache_hit = attributes.get("cache_hit") or attributes.get("tool.cache_hit") or tool_attrs.get("cache_hit")
-        api_version = attributes.get("api_version") or attributes.get("tool.api_version") or tool_attrs.get("api_version")
+        framework_name = metadata["framework_name"]
+        tool_version = metadata["tool_version"]
+        authorization_level = metadata["authorization_level"]
+        execution_time_ms = metadata["execution_time_ms"]
+        cache_hit = metadata["cache_hit"]
+        api_version = metadata["api_version"]
         
         # Create the tool interaction
         interaction = None
 
         # If we have a result event, try to find a matching execution event
         # that shares the same span_id
-        if event.name in ["tool.result", "tool.call.finish", "tool.call.error"] and event.span_id:
+        if timestamp_kind == "response" and event.span_id:
             # Find the execution interaction with the same span_id
             from src.models.event import Event
             
@@ -222,7 +310,7 @@ class ToolInteraction(Base):
                 request_timestamp=request_timestamp,
                 response_timestamp=response_timestamp,
                 response_time_ms=response_time_ms,
-                raw_attributes=attributes,
+                raw_attributes=cls.strip_promoted_attributes(attributes),
                 # Add additional metadata fields
                 framework_name=framework_name,
                 tool_version=tool_version,
@@ -251,23 +339,24 @@ class ToolInteraction(Base):
             ToolInteraction: The updated tool interaction
         """
         attrs = result_event.attributes or {}
+        tool_attrs = attrs.get("tool", {})
         
         # Extract result data
-        result = attrs.get("tool.result") or attrs.get("tool", {}).get("result")
+        result = attrs.get("tool.result") or tool_attrs.get("result")
         if result:
-            existing_tool_interaction.result = json.dumps(result)
+            existing_tool_interaction.result = result
             
         # Update status
-        status = attrs.get("tool.status") or attrs.get("tool", {}).get("status")
+        status = attrs.get("tool.status") or tool_attrs.get("status")
+        error = attrs.get("tool.error") or tool_attrs.get("error")
         if status:
             existing_tool_interaction.status = status
-        elif attrs.get("tool.error") or attrs.get("tool", {}).get("error"):
+        elif error:
             existing_tool_interaction.status = "error"
         else:
             existing_tool_interaction.status = "success"
             
         # Update error information
-        error = attrs.get("tool.error") or attrs.get("tool", {}).get("error")
         if error:
             existing_tool_interaction.error = error
             
@@ -275,14 +364,15 @@ class ToolInteraction(Base):
         existing_tool_interaction.response_timestamp = result_event.timestamp
         
         # Extract metadata fields
-        framework_name = attrs.get("framework.name") or attrs.get("framework")
-        tool_version = attrs.get("tool_version") or attrs.get("tool.version") or attrs.get("tool", {}).get("version")
-        status_code = attrs.get("status_code") or attrs.get("tool.status_code") or attrs.get("tool", {}).get("status_code")
-        response_time_ms = attrs.get("response_time_ms") or attrs.get("tool.response_time_ms") or attrs.get("tool", {}).get("response_time_ms")
-        authorization_level = attrs.get("authorization_level") or attrs.get("tool.authorization_level") or attrs.get("tool", {}).get("authorization_level")
-        execution_time_ms = attrs.get("execution_time_ms") or attrs.get("tool.execution_time_ms") or attrs.get("tool", {}).get("execution_time_ms")
-        cache_hit = attrs.get("cache_hit") or attrs.get("tool.cache_hit") or attrs.get("tool", {}).get("cache_hit")
-        api_version = attrs.get("api_version") or attrs.get("tool.api_version") or attrs.get("tool", {}).get("api_version")
+        metadata = _extract_metadata(attrs, tool_attrs)
+        framework_name = metadata["framework_name"]
+        tool_version = metadata["tool_version"]
+        status_code = metadata["status_code"]
+        response_time_ms = metadata["response_time_ms"]
+        authorization_level = metadata["authorization_level"]
+        execution_time_ms = metadata["execution_time_ms"]
+        cache_hit = metadata["cache_hit"]
+        api_version = metadata["api_version"]
         
         # Update the fields if available
         if status_code:
@@ -310,10 +400,71 @@ class ToolInteraction(Base):
             
         # Merge raw attributes
         existing_attrs = existing_tool_interaction.raw_attributes or {}
-        existing_tool_interaction.raw_attributes = {**existing_attrs, **attrs}
+        existing_tool_interaction.raw_attributes = {**existing_attrs, **cls.strip_promoted_attributes(attrs)}
         
         return existing_tool_interaction
     
+    @staticmethod
+    def strip_promoted_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Drop attributes whose value is already stored in a metadata column.
+        
+        Only flat keys holding exactly the value that was promoted are
+        dropped, so e.g. a ``tool.version`` that lost to ``tool_version`` is
+        kept and nothing is lost from raw_attributes.
+        
+        Args:
+            attributes: Flat event attributes
+            
+        Returns:
+            Dict[str, Any]: The attributes to store in raw_attributes
+        """
+        if not attributes:
+            return attributes
+        metadata = _extract_metadata(attributes, attributes.get("tool") or {})
+        return {
+            key: value for key, value in attributes.items()
+            if key not in _PROMOTED_KEYS
+            or value is None
+            or value != metadata[_PROMOTED_KEYS[key]]
+        }
+    
+    def _decoded(self, key: str) -> Any:
+        """
+        Get a JSON column value, decoding JSON that was stored as a string.
+        
+        Some producers send parameters and results pre-serialized, in which
+        case the column holds a JSON string rather than a structure. The
+        decoded value is memoized in the instance dict next to the string it
+        came from, so repeated calls parse it once and a reloaded or
+        reassigned value is decoded again.
+        
+        Args:
+            key: Name of the column, ``parameters`` or ``result``
+            
+        Returns:
+            The structured value, or None if the column is empty or plain text
+        """
+        value = getattr(self, key)
+        if not value:
+            return None
+        if not isinstance(value, str):
+            return value
+        
+        cache_key = f"_decoded_{key}"
+        cached = self.__dict__.get(cache_key)
+        if cached is not None and cached[0] is value:
+            return cached[1]
+        
+        try:
+            decoded = _loads(value)
+        except ValueError:
+            decoded = None
+        if isinstance(decoded, str) or not decoded:
+            decoded = None
+        self.__dict__[cache_key] = (value, decoded)
+        return decoded
+    
     def get_parameters_dict(self) -> Optional[Dict]:
         """
         Get the parameters as a dictionary.
@@ -321,13 +472,7 @@ class ToolInteraction(Base):
         Returns:
             Dict or None: The parameters as a dictionary or None if not available
         """
-        if not self.parameters:
-            return None
-            
-        try:
-            return json.loads(self.parameters)
-        except (json.JSONDecodeError, TypeError):
-            return None
+        return self._decoded("parameters")
     
     def get_result_dict(self) -> Optional[Dict]:
         """
@@ -336,13 +481,7 @@ class ToolInteraction(Base):
         Returns:
             Dict or None: The result as a dictionary or None if not available
         """
-        if not self.result:
-            return None
-            
-        try:
-            return json.loads(self.result)
-        except (json.JSONDecodeError, TypeError):
-            return None
+        return self._decoded("result")
     
     @classmethod
     def get_complete_interactions(cls, db_session) -> List[Tuple["ToolInteraction", Optional["ToolInteraction"]]]:
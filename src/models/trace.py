@@ -10,7 +10,7 @@ from typing import Dict, Any, List, Optional, Tuple
 import uuid
 
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, selectinload
 
 from src.models.base import Base
 
@@ -64,6 +64,28 @@ class Trace(Base):
         db_session.add(trace)
         return trace
     
+    @classmethod
+    def load_full(cls, db_session, trace_id: str) -> Optional["Trace"]:
+        """
+        Load a trace with all of its spans and their events.
+        
+        Spans and events are fetched with selectinload, so walking the tree
+        (Span.group_by_parent, Span.get_event_count, ...) costs three queries
+        in total instead of several per span.
+        
+        Args:
+            db_session: Database session
+            trace_id: Unique identifier for the trace
+            
+        Returns:
+            Optional[Trace]: The trace, or None if it doesn't exist
+        """
+        from src.models.span import Span
+        
+        return db_session.query(cls).options(
+            selectinload(cls.spans).selectinload(Span.events)
+        ).filter(cls.trace_id == trace_id).first()
+    
     def update_timestamps(self, db_session, start_time: Optional[datetime] = None,
                         end_time: Optional[datetime] = None) -> None:
         """
@@ -4,17 +4,30 @@ Simple processor for telemetry events.
 This module provides a simple processor for validating and storing telemetry
 events in the database.
 """
+import asyncio
 import json
 import logging
+import re
+import threading
 import traceback
-from typing import Dict, Any, List, Union, Optional, Tuple
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Executor
+from itertools import islice
+from operator import itemgetter
+from types import GeneratorType
+from typing import Dict, Any, BinaryIO, Callable, Iterable, List, NamedTuple, Union, Optional, Tuple, cast
 from datetime import datetime, timedelta
 from uuid import uuid4
 
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, joinedload, sessionmaker, undefer_group
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import SQLAlchemyError
 
-from src.models.event import Event
+from src.models.base import insert_or_ignore
+from src.models.event import Event, event_type_for_name
 from src.models.agent import Agent
 from src.models.trace import Trace
 from src.models.span import Span
@@ -26,10 +39,256 @@ from src.models.tool_interaction import ToolInteraction
 
 # Import our custom JSON encoder
 from src.utils.json_serializer import dumps, loads
+from src.utils.timestamps import parse_iso_timestamp
+
+# ijson decodes JSON arrays incrementally; it is optional (see the
+# "speedups" extra)
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# Keys in db_session.info holding the agents, traces, spans and sessions
+# preloaded for the current batch. Holding them there also keeps the preloaded
+# spans alive in the (weak-referencing) identity map for Span.get_or_create.
+BATCH_AGENTS_KEY = "batch_agents"
+BATCH_TRACES_KEY = "batch_traces"
+BATCH_SPANS_KEY = "batch_spans"
+BATCH_SESSIONS_KEY = "batch_sessions"
+# IDs of every agent the batch references, all stored by the preload whether
+# or not they were read back into BATCH_AGENTS_KEY
+BATCH_AGENT_IDS_KEY = "batch_agent_ids"
+# Security alerts whose triggers are resolved together once the batch's
+# events have all been added
+BATCH_ALERTS_KEY = "batch_alerts"
+# Events that may have triggered alerts stored earlier, checked together once
+# the batch's events have all been added
+BATCH_TRIGGER_CANDIDATES_KEY = "batch_trigger_candidates"
+
+# db_session.info key for the generator a session was taken from, closed
+# together with the session so a factory like get_db cleans up at the end
+SESSION_GENERATOR_KEY = "session_generator"
+
+# Agent IDs known to be stored, per engine and least recently used first, so
+# batches from agents seen before skip the agent INSERT and read-back. The
+# server never deletes agents, so entries only go stale if the tables are
+# dropped and recreated while the process runs.
+KNOWN_AGENTS_MAX = 10000
+_known_agents: "weakref.WeakKeyDictionary[Any, OrderedDict]" = weakref.WeakKeyDictionary()
+_known_agents_lock = threading.Lock()
+
+# Events stored per transaction when processing a JSON stream
+STREAM_CHUNK_EVENTS = 1000
+
+# JSON batches at least this large are parsed in an executor by
+# process_json_batch_async rather than on the event loop
+LARGE_BATCH_BYTES = 64 * 1024
+
+# Fields every event must carry, all strings; timestamp is checked first
+REQUIRED_EVENT_FIELDS = ("timestamp", "name", "level", "agent_id")
+_required_event_values = itemgetter(*REQUIRED_EVENT_FIELDS)
+# The standalone process_event also requires a trace
+STANDALONE_EVENT_FIELDS = REQUIRED_EVENT_FIELDS + ("trace_id",)
+_standalone_event_values = itemgetter(*STANDALONE_EVENT_FIELDS)
+
+# Optional ID fields that must be strings when present. The batch preload
+# collects them into sets and dicts before any event is stored, so other
+# values would fail the whole batch rather than just their event.
+OPTIONAL_ID_FIELDS = ("trace_id", "span_id", "parent_span_id")
+
+# Event schema versions the processor accepts; events without one are 1.0
+SUPPORTED_SCHEMA_VERSIONS = frozenset({"1.0"})
+
+# How far apart an alert and an LLM event may be to be matched by content
+CONTENT_MATCH_WINDOW = timedelta(minutes=5)
+
+# Words marking alert or event content as suspicious; an alert and an event
+# whose content shares any of them are taken to be related
+SUSPICIOUS_CONTENT_WORDS = (
+    "harmful", "malicious", "dangerous", "exploit",
+    "injection", "attack", "hack", "breach"
+)
+# Finds all of them in one pass over lowercased content. The lookahead also
+# matches occurrences that overlap, so the result is the set of words a
+# substring test per word would find.
+_suspicious_words_re = re.compile("(?=(%s))" % "|".join(SUSPICIOUS_CONTENT_WORDS))
+# Words that, with "prompt", mark event content as matching an alert about
+# suspicious or harmful prompt content
+HARMFUL_PROMPT_WORDS = frozenset({"harmful", "malicious", "dangerous"})
+
+# Whether a security alert already has a trigger, correlated to the alert
+# of the enclosing query. As NOT EXISTS it is an anti-join probing the
+# alert_id index, instead of an outer join to every trigger row that is then
+# filtered down to the NULLs.
+_alert_has_trigger = exists().where(SecurityAlertTrigger.alert_id == SecurityAlert.id)
+
+# Event type -> Event relationship holding its specialized model
+SPECIALIZED_RELATIONSHIPS = {
+    "llm": "llm_interaction",
+    "security": "security_alert",
+    "framework": "framework_event",
+    "tool": "tool_interaction",
+}
+
+
+def _attribute_map(model_class: Any, prefix: str, names: Tuple[Any, ...]) -> Tuple[Tuple[str, str, str], ...]:
+    """
+    Build the (column, key, fallback key) entries a model can actually store.
+    
+    Names without a column on the model are dropped here, once, so promoting
+    attributes per event needs no reflection.
+    
+    Args:
+        model_class: Specialized model class
+        prefix: Attribute prefix of the event type, e.g. "llm."
+        names: Column names promoted from "<name>" or "<prefix><name>", or
+            explicit (column, key, fallback key) entries
+        
+    Returns:
+        Tuple of (column, key, fallback key) entries
+    """
+    columns = model_class.__table__.columns.keys()
+    entries = (
+        (name, name, prefix + name) if isinstance(name, str) else name
+        for name in names
+    )
+    return tuple(entry for entry in entries if entry[0] in columns)
+
+
+# Columns promoted from event attributes onto each specialized model
+PROMOTED_ATTRIBUTES = {
+    "llm": _attribute_map(LLMInteraction, "llm.", (
+        "temperature", "top_p", "max_tokens", "frequency_penalty", "presence_penalty",
+        "stream", "cached_response", "model_version"
+    )),
+    "security": _attribute_map(SecurityAlert, "security.", (
+        "detection_source", "confidence_score", "risk_level", "affected_component",
+        "detection_rule_id"
+    )),
+    "framework": _attribute_map(FrameworkEvent, "framework.", (
+        "app_version", "os_type", "memory_usage_mb", "cpu_usage_percent", "environment"
+    )),
+    "tool": _attribute_map(ToolInteraction, "tool.", (
+        ("tool_version", "tool_version", "tool.version"),
+        "authorization_level", "execution_time_ms", "cache_hit", "api_version"
+    )),
+}
+
+
+def _promote_attributes(model: Any, attributes: Dict[str, Any], event_type: str) -> None:
+    """
+    Copy known attributes of an event type onto a model's dedicated columns.
+    
+    Args:
+        model: Specialized model instance to update
+        attributes: Event attributes
+        event_type: Key into PROMOTED_ATTRIBUTES
+    """
+    get = attributes.get
+    for column, key, prefixed_key in PROMOTED_ATTRIBUTES[event_type]:
+        setattr(model, column, get(key) or get(prefixed_key))
+
+
+def _security_content(raw_attributes: Any) -> Optional[str]:
+    """
+    Return the lowercased text that security content matching compares.
+    
+    Args:
+        raw_attributes: Raw attributes of an alert or LLM interaction
+        
+    Returns:
+        Optional[str]: The attributes as lowercased text, or None if empty
+    """
+    if not raw_attributes:
+        return None
+    return str(raw_attributes).lower()
+
+
+def _event_security_content(event: Event) -> Optional[str]:
+    """
+    Return the lowercased text of an event compared against alert content.
+    
+    LLM events are compared by their interaction's raw attributes.
+    
+    Args:
+        event: Event model
+        
+    Returns:
+        Optional[str]: The event's content as lowercased text, or None if empty
+    """
+    if event.event_type == 'llm' and getattr(event, 'llm_interaction', None):
+        return _security_content(event.llm_interaction.raw_attributes)
+    return _security_content(getattr(event, 'raw_attributes', None))
+
+
+def _unknown_agent_ids(bind: Any, agent_ids: Iterable[str]) -> List[str]:
+    """
+    Return the agent IDs not yet known to be stored in a database.
+    
+    Args:
+        bind: Engine or connection the IDs were stored through
+        agent_ids: Agent IDs to check
+        
+    Returns:
+        List[str]: IDs that still need to be inserted and read back
+    """
+    with _known_agents_lock:
+        known = _known_agents.get(bind)
+        if known is None:
+            return list(agent_ids)
+        unknown = []
+        for agent_id in agent_ids:
+            if agent_id in known:
+                known.move_to_end(agent_id)
+            else:
+                unknown.append(agent_id)
+        return unknown
+
+
+def _remember_agent_ids(bind: Any, agent_ids: Iterable[str]) -> None:
+    """
+    Record agent IDs committed to a database, evicting the least recently used.
+    
+    Args:
+        bind: Engine or connection the IDs were stored through
+        agent_ids: Committed agent IDs
+    """
+    with _known_agents_lock:
+        known = _known_agents.setdefault(bind, OrderedDict())
+        for agent_id in agent_ids:
+            known[agent_id] = None
+            known.move_to_end(agent_id)
+        while len(known) > KNOWN_AGENTS_MAX:
+            known.popitem(last=False)
+
+
+class EventResult(NamedTuple):
+    """
+    Outcome of one event in a batch.
+    
+    Batches hold these compact tuples while they run and build the result
+    dicts returned to callers once, at the end.
+    """
+    success: bool
+    event_id: Optional[int] = None
+    event_name: Optional[str] = None
+    error: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+    
+    @classmethod
+    def failed(cls, error: str, exception: Exception) -> "EventResult":
+        """Build the result of an event that failed with an exception."""
+        return cls(False, error=error, details={"exception_type": exception.__class__.__name__})
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the result dict returned by process_batch."""
+        if self.success:
+            return {"success": True, "event_id": self.event_id, "event_name": self.event_name}
+        return {"success": False, "error": self.error, "details": self.details}
+
 
 class ProcessingError(Exception):
     """Base exception for processing errors."""
@@ -48,10 +307,49 @@ class SimpleProcessor:
     validating them and storing them in the database.
     """
     
-    def __init__(self, db_session_factory):
-        """Initialize the processor with a session factory."""
+    def __init__(self, db_session_factory: Union[Engine, Callable[[], Any]]) -> None:
+        """
+        Initialize the processor.
+        
+        Args:
+            db_session_factory: Engine to open pooled sessions on, a callable
+                returning a session (such as a sessionmaker), or a generator
+                function yielding one (such as get_db)
+        """
+        if isinstance(db_session_factory, Engine):
+            db_session_factory = sessionmaker(bind=db_session_factory, autoflush=False)
         self.db_session_factory = db_session_factory
     
+    def _open_session(self) -> Session:
+        """
+        Open a session from the configured factory.
+        
+        A generator factory is kept alive in the session's info until
+        _close_session, so its own cleanup runs when the processor is done
+        with the session rather than as soon as the generator is dropped.
+        
+        Returns:
+            Session: Database session, closed by the caller with _close_session
+        """
+        db_session = self.db_session_factory()
+        if isinstance(db_session, GeneratorType):
+            generator = db_session
+            db_session = next(generator)
+            db_session.info[SESSION_GENERATOR_KEY] = generator
+        return db_session
+    
+    def _close_session(self, db_session: Session) -> None:
+        """
+        Close a session opened by _open_session.
+        
+        Args:
+            db_session: Database session to close
+        """
+        generator = db_session.info.pop(SESSION_GENERATOR_KEY, None)
+        if generator is not None:
+            generator.close()
+        db_session.close()
+    
     def process_event(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process a single event by validating, transforming, and storing it.
@@ -62,7 +360,7 @@ class SimpleProcessor:
         Returns:
             Dict with processing results
         """
-        logger.debug(f"Processing event: {event_data.get('name', 'Unknown')}")
+        logger.debug("Processing event: %s", event_data.get('name', 'Unknown'))
         
         # Validate the event data
         validation_result = self._validate_event(event_data)
@@ -73,10 +371,9 @@ class SimpleProcessor:
                 "error": validation_result.get("error", "Event validation failed")
             }
         
-        # Get database session from generator
         db_session = None
         try:
-            db_session = next(self.db_session_factory())
+            db_session = self._open_session()
             
             # Check if all required tables exist (sanity check)
             if not self._check_tables_exist(db_session):
@@ -86,21 +383,18 @@ class SimpleProcessor:
                     "error": "Database tables are not properly initialized"
                 }
             
-            # Ensure agent exists for this event (create if not exists)
-            agent_id = event_data.get("agent_id")
-            self._ensure_agent_exists(db_session, agent_id)
+            # Ensure agent exists for this event (create if not exists);
+            # validation guarantees the field is present
+            self._ensure_agent_exists(db_session, event_data["agent_id"])
             
-            # Transform event data into database models
-            event, related_models = self._transform_event(event_data, db_session)
-            
-            # Add all models to session
-            for model in related_models:
-                db_session.add(model)
+            # Transform event data into database models; the event's agent,
+            # trace, span and specialized model reach the session through it
+            event = self._transform_event(event_data, db_session)
             
             # Commit the changes
             db_session.commit()
             
-            logger.info(f"Successfully processed event: {event_data.get('name')} (ID: {event.id})")
+            logger.info("Successfully processed event: %s (ID: %s)", event.name, event.id)
             return {
                 "success": True,
                 "event_id": event.id,
@@ -117,14 +411,15 @@ class SimpleProcessor:
             }
         finally:
             if db_session:
-                db_session.close()
+                self._close_session(db_session)
     
-    def process_json_event(self, json_data: str) -> Dict[str, Any]:
+    def process_json_event(self, json_data: Union[str, bytes]) -> Dict[str, Any]:
         """
         Process a single event from a JSON string.
         
         Args:
-            json_data: JSON string containing the event data
+            json_data: JSON string containing the event data; raw request bytes
+                are parsed directly, without decoding them to text first
             
         Returns:
             Dict[str, Any]: Process result
@@ -152,76 +447,112 @@ class SimpleProcessor:
         Returns:
             Dict with batch processing results
         """
-        results = []
+        results: List[Optional[EventResult]] = [None] * len(events_data)
         
         # Create one database session for the entire batch
-        db_session = next(self.db_session_factory())
+        db_session = self._open_session()
         
         try:
-            for event_data in events_data:
-                # Validate the event data
-                validation_result = self._validate_event(event_data)
-                if not validation_result["valid"]:
-                    results.append({
-                        "success": False, 
-                        "error": validation_result["error"],
-                        "details": validation_result.get("details", {})
-                    })
-                    continue
-                
-                try:
-                    # Process the event
-                    event, related_models = self._transform_event(event_data, db_session)
+            # Validate up front so everything the valid events reference can be
+            # created in a few set-based queries before the per-event work
+            validations = [self._validate_event(event_data) for event_data in events_data]
+            self._preload_batch(
+                [event_data for event_data, result in zip(events_data, validations) if result["valid"]],
+                db_session
+            )
+            db_session.info[BATCH_ALERTS_KEY] = []
+            db_session.info[BATCH_TRIGGER_CANDIDATES_KEY] = []
+            
+            # The transforms flush explicitly where they need generated IDs;
+            # keep their lookups from also flushing everything pending, which
+            # sessions created with autoflush enabled would do on every query
+            with db_session.no_autoflush:
+                built = []
+                for index, (event_data, validation_result) in enumerate(zip(events_data, validations)):
+                    if not validation_result["valid"]:
+                        results[index] = EventResult(
+                            False, error=validation_result["error"], details=validation_result.get("details", {})
+                        )
+                        continue
                     
-                    # Add to session
-                    db_session.add(event)
-                    for model in related_models:
-                        db_session.add(model)
+                    try:
+                        event = self._build_event(event_data, db_session)
+                        db_session.add(event)
+                        built.append((index, event_data, event))
+                    except Exception as e:
+                        logger.error(f"Error processing event in batch: {str(e)}", exc_info=True)
+                        results[index] = EventResult.failed(str(e), e)
+                
+                # Insert every event of the batch in one flush, which the ORM
+                # sends as a single multi-row INSERT ... RETURNING rather than
+                # one INSERT per event
+                db_session.flush()
+                
+                pending_alerts = db_session.info[BATCH_ALERTS_KEY]
+                trigger_candidates = db_session.info[BATCH_TRIGGER_CANDIDATES_KEY]
+                for index, event_data, event in built:
+                    alert_count = len(pending_alerts)
+                    candidate_count = len(trigger_candidates)
+                    try:
+                        # Each event is completed in its own savepoint, so a
+                        # failed insert only discards that event's models.
+                        # Releasing it writes them, so the lookups that link
+                        # later events to them can find them.
+                        with db_session.begin_nested():
+                            self._complete_event(event, event_data, db_session)
                     
-                    results.append({
-                        "success": True,
-                        "event_id": event.id,
-                        "event_name": event.name
-                    })
-                except Exception as e:
-                    logger.error(f"Error processing event in batch: {str(e)}", exc_info=True)
-                    results.append({
-                        "success": False,
-                        "error": str(e),
-                        "details": {"exception_type": e.__class__.__name__}
-                    })
-            
+                        results[index] = EventResult(True, event_id=event.id, event_name=event.name)
+                    except Exception as e:
+                        logger.error(f"Error processing event in batch: {str(e)}", exc_info=True)
+                        results[index] = EventResult.failed(str(e), e)
+                        # Alerts and events in the discarded savepoint were never stored
+                        del pending_alerts[alert_count:]
+                        del trigger_candidates[candidate_count:]
+                
+                self._check_events_as_security_triggers(db_session.info.pop(BATCH_TRIGGER_CANDIDATES_KEY), db_session)
+                self._create_security_triggers(db_session.info.pop(BATCH_ALERTS_KEY), db_session)
+                
             # Commit all changes at once
             db_session.commit()
+            _remember_agent_ids(db_session.get_bind(), db_session.info[BATCH_AGENT_IDS_KEY])
             
         except Exception as e:
             db_session.rollback()
             logger.error(f"Error processing batch: {str(e)}", exc_info=True)
             
-            # Add failed result for all events that didn't have a result yet
-            while len(results) < len(events_data):
-                results.append({
-                    "success": False,
-                    "error": f"Batch processing error: {str(e)}",
-                    "details": {"exception_type": e.__class__.__name__}
-                })
+            # Nothing was committed, so earlier successes are failures too, as
+            # are the events that didn't have a result yet
+            for index, result in enumerate(results):
+                if result is None or result.success:
+                    results[index] = EventResult.failed(f"Batch processing error: {str(e)}", e)
         
         finally:
-            db_session.close()
-        
+            for key in (
+                BATCH_AGENTS_KEY, BATCH_AGENT_IDS_KEY, BATCH_TRACES_KEY, BATCH_SPANS_KEY,
+                BATCH_SESSIONS_KEY, BATCH_ALERTS_KEY, BATCH_TRIGGER_CANDIDATES_KEY
+            ):
+                db_session.info.pop(key, None)
+            self._close_session(db_session)
+        
+        # Counted once the results are final, since a batch failure above
+        # rewrites earlier successes; failures are the remainder. Every
+        # event has a result by now.
+        final_results = cast(List[EventResult], results)
+        successful = sum(result.success for result in final_results)
         return {
             "total": len(events_data),
-            "successful": sum(1 for r in results if r["success"]),
-            "failed": sum(1 for r in results if not r["success"]),
-            "results": results
+            "successful": successful,
+            "failed": len(final_results) - successful,
+            "results": [result.to_dict() for result in final_results]
         }
     
-    def process_json_batch(self, json_data: str) -> Dict[str, Any]:
+    def process_json_batch(self, json_data: Union[str, bytes]) -> Dict[str, Any]:
         """
         Process a batch of events from a JSON string.
         
         Args:
-            json_data: JSON string containing an array of event data
+            json_data: JSON string containing an array of event data; raw request bytes
+                are parsed directly, without decoding them to text first
             
         Returns:
             Dict[str, Any]: Process result
@@ -229,17 +560,139 @@ class SimpleProcessor:
         try:
             # Parse JSON data
             events_data = loads(json_data)
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON decode error: {str(e)}")
+            raise ProcessingError(f"Invalid JSON: {str(e)}")
+        
+        return self._process_decoded_batch(events_data)
+    
+    def process_json_stream(self, stream: BinaryIO, chunk_size: int = STREAM_CHUNK_EVENTS) -> Dict[str, Any]:
+        """
+        Process a JSON array of events read from a binary file-like object.
+        
+        With ijson installed the array is decoded incrementally and stored
+        through process_batch in chunks of chunk_size events, each committed
+        on its own, so memory is bounded by one chunk rather than the whole
+        payload. Without it the stream is read and processed whole, as by
+        process_json_batch.
+        
+        Args:
+            stream: Binary stream holding a JSON array of event data
+            chunk_size: Number of events stored per transaction
             
-            # Check if the data is a list
-            if not isinstance(events_data, list):
-                # Handle case where a single event is provided instead of an array
-                return self.process_event(events_data)
+        Returns:
+            Dict[str, Any]: Process result, combined over all chunks
+        """
+        if ijson is None:
+            return self.process_json_batch(stream.read())
+        
+        combined: Dict[str, Any] = {"total": 0, "successful": 0, "failed": 0, "results": []}
+        events = ijson.items(stream, "item", use_float=True)
+        try:
+            while True:
+                chunk = list(islice(events, chunk_size))
+                if not chunk:
+                    break
+                result = self.process_batch(chunk)
+                for key in ("total", "successful", "failed"):
+                    combined[key] += result[key]
+                combined["results"].extend(result["results"])
+        except ijson.JSONError as e:
+            logger.error(f"JSON decode error: {str(e)}")
+            raise ProcessingError(f"Invalid JSON: {str(e)}")
+        return combined
+    
+    async def process_json_batch_async(
+        self, json_data: Union[str, bytes], executor: Optional[Executor] = None
+    ) -> Dict[str, Any]:
+        """
+        Process a batch of events from a JSON string inside a coroutine.
+        
+        Payloads of LARGE_BATCH_BYTES or more are parsed in an executor so a
+        large batch does not stall the event loop while it is decoded; pass a
+        ProcessPoolExecutor owned by the application to parse them off the
+        interpreter entirely. Smaller payloads, and all database work, run in
+        the calling thread as in process_json_batch.
+        
+        Args:
+            json_data: JSON string or bytes containing an array of event data
+            executor: Executor to parse large payloads in; defaults to the
+                event loop's default executor
             
-            # Process the batch
-            return self.process_batch(events_data)
+        Returns:
+            Dict[str, Any]: Process result
+        """
+        if len(json_data) < LARGE_BATCH_BYTES:
+            return self.process_json_batch(json_data)
+        
+        try:
+            events_data = await asyncio.get_running_loop().run_in_executor(executor, loads, json_data)
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error: {str(e)}")
             raise ProcessingError(f"Invalid JSON: {str(e)}")
+        
+        return self._process_decoded_batch(events_data)
+    
+    async def process_json_batches_async(
+        self, payloads: Iterable[Union[str, bytes]], executor: Optional[Executor] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Process several JSON batches, parsing each while the previous one is stored.
+        
+        Each payload is parsed in the executor while the batch before it is
+        validated, stored and committed in a worker thread, so decoding and
+        database round trips overlap instead of alternating. Batches are still
+        stored one at a time and in order, each in its own session, since the
+        database serializes writers anyway.
+        
+        Args:
+            payloads: JSON strings or bytes, each an array of event data
+            executor: Executor to parse payloads in; defaults to the event
+                loop's default executor
+            
+        Returns:
+            List[Dict[str, Any]]: Process result of each payload, in order
+        """
+        loop = asyncio.get_running_loop()
+        results = []
+        storing = None
+        try:
+            for json_data in payloads:
+                parsing = loop.run_in_executor(executor, loads, json_data)
+                if storing is not None:
+                    results.append(await storing)
+                    storing = None
+                try:
+                    events_data = await parsing
+                except json.JSONDecodeError as e:
+                    logger.error(f"JSON decode error: {str(e)}")
+                    raise ProcessingError(f"Invalid JSON: {str(e)}")
+                storing = loop.run_in_executor(None, self._process_decoded_batch, events_data)
+            if storing is not None:
+                results.append(await storing)
+                storing = None
+        finally:
+            # Never leave a batch being stored behind an error
+            if storing is not None:
+                await asyncio.wait([storing])
+        return results
+    
+    def _process_decoded_batch(self, events_data: Any) -> Dict[str, Any]:
+        """
+        Process the decoded contents of a JSON batch.
+        
+        Args:
+            events_data: An array of event data, or a single event
+            
+        Returns:
+            Dict[str, Any]: Process result
+        """
+        try:
+            # Decoded JSON arrays are always exact lists; anything else is
+            # handled as a single event provided instead of an array
+            if type(events_data) is not list:
+                return self.process_event(events_data)
+            return self.process_batch(events_data)
         except Exception as e:
             logger.error(f"Error processing JSON batch: {str(e)}")
             raise ProcessingError(f"Batch processing error: {str(e)}")
@@ -254,64 +707,85 @@ class SimpleProcessor:
         Returns:
             Dict with validation results
         """
-        # Check required fields
-        required_fields = ["timestamp", "name", "level", "agent_id"]
-        for field in required_fields:
-            if field not in event_data:
-                return {
-                    "valid": False,
-                    "error": f"Missing required field: {field}"
-                }
-        
-        # Basic type validation
-        if not isinstance(event_data["timestamp"], str):
+        # A batch may hold any JSON value; only objects can be events
+        if type(event_data) is not dict:
             return {
                 "valid": False,
-                "error": f"Field timestamp must be a string, got {type(event_data['timestamp']).__name__}"
+                "error": f"Event must be a JSON object, got {type(event_data).__name__}"
             }
-            
-        # Validate timestamp format
+        
+        # Read every required field at once; itemgetter fetches them in
+        # order, so the first missing one is reported
         try:
-            # Convert to datetime object - strip timezone info to make it naive
-            timestamp = datetime.fromisoformat(event_data["timestamp"].replace('Z', '+00:00'))
-            # Replace the string timestamp with a naive datetime to avoid timezone comparison issues
-            event_data["timestamp"] = timestamp.replace(tzinfo=None)
-        except ValueError:
+            values = _required_event_values(event_data)
+        except KeyError as e:
             return {
                 "valid": False,
-                "error": f"Invalid timestamp format: {event_data['timestamp']}"
+                "error": f"Missing required field: {e.args[0]}"
             }
+        timestamp, name, level, agent_id = values
         
-        if not isinstance(event_data["name"], str):
+        # Basic type validation; JSON decoding only produces exact strs
+        if type(timestamp) is not str:
             return {
                 "valid": False,
-                "error": f"Field name must be a string, got {type(event_data['name']).__name__}"
+                "error": f"Field timestamp must be a string, got {type(timestamp).__name__}"
             }
-        
-        if not isinstance(event_data["level"], str):
+            
+        # Validate timestamp format
+        try:
+            # Replace the string with the parsed datetime, dropping the offset
+            # of aware values so every stored timestamp is naive and comparable
+            parsed = parse_iso_timestamp(timestamp)
+            event_data["timestamp"] = parsed if parsed.tzinfo is None else parsed.replace(tzinfo=None)
+        except ValueError:
             return {
                 "valid": False,
-                "error": f"Field level must be a string, got {type(event_data['level']).__name__}"
+                "error": f"Invalid timestamp format: {timestamp}"
             }
         
-        if not isinstance(event_data["agent_id"], str):
+        # The checks are unrolled rather than looped over REQUIRED_EVENT_FIELDS;
+        # for valid events, which is nearly all of them, that is the cheaper
+        # form, and the failing field is only searched for once one fails
+        if type(name) is not str or type(level) is not str or type(agent_id) is not str:
+            field, value = next(
+                (field, value) for field, value in zip(REQUIRED_EVENT_FIELDS[1:], values[1:])
+                if type(value) is not str
+            )
             return {
                 "valid": False,
-                "error": f"Field agent_id must be a string, got {type(event_data['agent_id']).__name__}"
+                "error": f"Field {field} must be a string, got {type(value).__name__}"
             }
         
-        # Validate schema version if present
-        if "schema_version" in event_data:
-            if event_data["schema_version"] != "1.0":
+        for field in OPTIONAL_ID_FIELDS:
+            value = event_data.get(field)
+            if value is not None and type(value) is not str:
+                return {
+                    "valid": False,
+                    "error": f"Field {field} must be a string, got {type(value).__name__}"
+                }
+        attributes = event_data.get("attributes")
+        if type(attributes) is dict:
+            session_id = attributes.get("session.id")
+            if session_id is not None and type(session_id) is not str:
                 return {
                     "valid": False,
-                    "error": f"Unsupported schema version: {event_data['schema_version']}"
+                    "error": f"Attribute session.id must be a string, got {type(session_id).__name__}"
                 }
         
+        # Validate schema version if present
+        schema_version = event_data.get("schema_version", "1.0")
+        # Only strings can be supported, and other JSON values may be unhashable
+        if type(schema_version) is not str or schema_version not in SUPPORTED_SCHEMA_VERSIONS:
+            return {
+                "valid": False,
+                "error": f"Unsupported schema version: {schema_version}"
+            }
+        
         # All validations passed
         return {"valid": True}
     
-    def _transform_event(self, event_data: Dict[str, Any], db_session: Session) -> Tuple[Event, List[Any]]:
+    def _transform_event(self, event_data: Dict[str, Any], db_session: Session) -> Event:
         """
         Transform event data into database models.
         
@@ -320,27 +794,53 @@ class SimpleProcessor:
             db_session: SQLAlchemy session
             
         Returns:
-            Tuple of (event, related_models)
+            Event: The flushed event
         """
-        related_models = []
-        
-        # Find or create agent
-        agent = db_session.query(Agent).filter_by(agent_id=event_data["agent_id"]).first()
-        if not agent:
-            current_time = datetime.utcnow()
-            agent = Agent(
-                agent_id=event_data["agent_id"],
-                name=f"Agent-{event_data['agent_id'][:8]}",
-                first_seen=current_time,
-                last_seen=current_time,
-                is_active=True
-            )
-            related_models.append(agent)
+        event = self._build_event(event_data, db_session)
+        
+        # Add and flush the event to get an ID
+        db_session.add(event)
+        db_session.flush()
+        
+        self._complete_event(event, event_data, db_session)
+        return event
+    
+    def _build_event(self, event_data: Dict[str, Any], db_session: Session) -> Event:
+        """
+        Build the event model and the agent, trace and span it belongs to.
+        
+        The event is not added to the session, so callers can insert several
+        events with one flush before completing them. New agents, traces and
+        spans are attached to it and cascade into the session with it.
+        
+        Args:
+            event_data: Dictionary containing the event data
+            db_session: SQLAlchemy session
+            
+        Returns:
+            Event: The unsaved event
+        """
+        # Find or create agent, preferring the agents preloaded for the batch;
+        # agents the preload stored without loading need no object at all
+        agent = db_session.info.get(BATCH_AGENTS_KEY, {}).get(event_data["agent_id"])
+        if agent is None and event_data["agent_id"] not in db_session.info.get(BATCH_AGENT_IDS_KEY, ()):
+            agent = db_session.query(Agent).filter_by(agent_id=event_data["agent_id"]).first()
+            if not agent:
+                current_time = datetime.utcnow()
+                agent = Agent(
+                    agent_id=event_data["agent_id"],
+                    name=f"Agent-{event_data['agent_id'][:8]}",
+                    first_seen=current_time,
+                    last_seen=current_time,
+                    is_active=True
+                )
         
         # Handle trace if present
         trace = None
         if "trace_id" in event_data:
-            trace = db_session.query(Trace).filter_by(trace_id=event_data["trace_id"]).first()
+            trace = db_session.info.get(BATCH_TRACES_KEY, {}).get(event_data["trace_id"])
+            if trace is None:
+                trace = db_session.query(Trace).filter_by(trace_id=event_data["trace_id"]).first()
             if not trace:
                 trace = Trace(
                     trace_id=event_data["trace_id"],
@@ -348,11 +848,11 @@ class SimpleProcessor:
                 )
                 if agent:
                     trace.agent = agent
-                related_models.append(trace)
         
-        # Parse event timestamp
+        # Validated events already hold a datetime; only direct callers that
+        # skip _validate_event pass the timestamp string through to here
         if isinstance(event_data["timestamp"], str):
-            timestamp_dt = datetime.fromisoformat(event_data["timestamp"].replace('Z', '+00:00'))
+            timestamp_dt = parse_iso_timestamp(event_data["timestamp"])
         else:
             # Already a datetime object
             timestamp_dt = event_data["timestamp"]
@@ -360,47 +860,31 @@ class SimpleProcessor:
         # Handle span if present
         span = None
         if "span_id" in event_data and event_data["span_id"]:
-            # Use the enhanced Span.get_or_create method
-            span = Span.get_or_create(
-                db_session,
-                span_id=event_data["span_id"],
-                trace_id=event_data.get("trace_id"),
-                parent_span_id=event_data.get("parent_span_id"),
-                # Try to derive span name from event name
-                event_name=event_data.get("name")
-            )
+            # Spans preloaded for the batch are already named and rooted
+            span = db_session.info.get(BATCH_SPANS_KEY, {}).get(event_data["span_id"])
+            if span is None:
+                # Use the enhanced Span.get_or_create method
+                span = Span.get_or_create(
+                    db_session,
+                    span_id=event_data["span_id"],
+                    trace_id=event_data.get("trace_id"),
+                    parent_span_id=event_data.get("parent_span_id"),
+                    # Try to derive span name from event name
+                    event_name=event_data.get("name")
+                )
             
-            # Update span timestamps with the event timestamp
+            # Widen the span to cover the event timestamp; this also covers
+            # opening (.start/.begin) and closing (.finish/.end/.stop) events
             span.update_timestamps(db_session, timestamp_dt, timestamp_dt)
             
-            if trace:
+            # Spans are created with their trace_id already; reassigning the
+            # relationship would make the flush load the span's current trace
+            if trace and span.trace_id != trace.trace_id:
                 span.trace = trace
             
-            # Check if this is a span-closing event
-            event_name = event_data.get("name", "")
-            if event_name.endswith(".finish") or event_name.endswith(".end") or event_name.endswith(".stop"):
-                # This is likely a closing event, so update the end timestamp
-                span.update_timestamps(db_session, end_time=timestamp_dt)
-            elif event_name.endswith(".start") or event_name.endswith(".begin"):
-                # This is likely an opening event, ensure start timestamp is set
-                span.update_timestamps(db_session, start_time=timestamp_dt)
-            
-            # Always add span to related_models
-            if span not in related_models:
-                related_models.append(span)
         
         # Determine event type based on name
-        event_name = event_data["name"]
-        if event_name.startswith("llm."):
-            event_type = "llm"
-        elif event_name.startswith("security."):
-            event_type = "security"
-        elif event_name.startswith("framework."):
-            event_type = "framework"
-        elif event_name.startswith("tool."):
-            event_type = "tool"
-        else:
-            event_type = "generic"
+        event_type = event_type_for_name(event_data["name"])
         
         # Create base event
         event = Event(
@@ -417,28 +901,46 @@ class SimpleProcessor:
         )
         
         # Set relationships
-        event.agent = agent
+        if agent:
+            event.agent = agent
         if trace:
             event.trace = trace
         if span:
             event.span = span
-            
-        # Add and flush the event to get an ID
-        db_session.add(event)
-        db_session.flush()
+        
+        return event
+    
+    def _complete_event(
+        self,
+        event: Event,
+        event_data: Dict[str, Any],
+        db_session: Session
+    ) -> None:
+        """
+        Create the specialized model and attribute details of a flushed event.
+        
+        Args:
+            event: Event model, already flushed so it has an ID
+            event_data: Dictionary containing the event data
+            db_session: SQLAlchemy session
+        """
+        event_type = event.event_type
         
         # Create specialized event if needed
         specialized_event = None
         
         if event_type == "llm":
-            logger.debug(f"Creating LLM interaction for event {event.id}, name: {event.name}")
-            logger.debug(f"Event data keys: {list(event_data.keys())}")
-            logger.debug(f"Attributes: {event_data.get('attributes', {})}")
+            # Formatting runs once per event, so skip building the key list
+            # and attribute dump unless they will be logged
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Creating LLM interaction for event %s, name: %s", event.id, event.name)
+                logger.debug("Event data keys: %s", list(event_data.keys()))
+                logger.debug("Attributes: %s", event_data.get('attributes', {}))
             
             try:
                 specialized_event = LLMInteraction.from_event(db_session, event, event_data)
                 if specialized_event:
-                    logger.debug(f"Created LLM interaction with ID {specialized_event.id}")
+                    logger.debug("Created LLM interaction with ID %s", specialized_event.id)
                 else:
                     logger.warning(f"Failed to create LLM interaction for event {event.id}")
             except Exception as e:
@@ -451,7 +953,7 @@ class SimpleProcessor:
                 # The event has already been created, so we just need to create the security alert
                 specialized_event = SecurityAlert.from_telemetry_event(db_session, event, event_data)
                 if specialized_event:
-                    logger.debug(f"Created Security Alert with ID {specialized_event.id}")
+                    logger.debug("Created Security Alert with ID %s", specialized_event.id)
                 else:
                     logger.warning(f"Failed to create Security Alert for event {event.id}")
             except Exception as e:
@@ -467,7 +969,7 @@ class SimpleProcessor:
                 from src.models.tool_interaction import ToolInteraction
                 specialized_event = ToolInteraction.from_event(db_session, event, event_data)
                 if specialized_event:
-                    logger.debug(f"Created Tool interaction with ID {specialized_event.id}")
+                    logger.debug("Created Tool interaction with ID %s", specialized_event.id)
                 else:
                     logger.warning(f"Failed to create Tool interaction for event {event.id}")
             except Exception as e:
@@ -475,26 +977,35 @@ class SimpleProcessor:
                 logger.exception(e)
         
         if specialized_event:
-            related_models.append(specialized_event)
-            # Flush to ensure specialized event has an ID
-            db_session.flush()
+            # The from_event constructors add their models to the session, but
+            # build them with only event_id set; record the child as
+            # the event's loaded relationship value so event.<kind> below, and
+            # the flush, resolve it in memory instead of querying for it. A
+            # tool result may return the execution's interaction instead.
+            if specialized_event.event_id == event.id:
+                set_committed_value(event, SPECIALIZED_RELATIONSHIPS[event_type], specialized_event)
+            else:
+                specialized_event = None
         
         # Process attributes
         if "attributes" in event_data and event_data["attributes"]:
-            self._process_attributes(event, event_data["attributes"], event_type, related_models, db_session)
+            self._process_attributes(event, event_data["attributes"], event_type, specialized_event, db_session)
         
-        # Check if this event could be a trigger for any existing security alerts
+        # Check if this event could be a trigger for any existing security
+        # alerts; in a batch all events are checked together after the last one
         if "span_id" in event_data and event_data["span_id"] and event_type != "security":
-            self._check_event_as_security_trigger(event, db_session)
-        
-        return event, related_models
+            trigger_candidates = db_session.info.get(BATCH_TRIGGER_CANDIDATES_KEY)
+            if trigger_candidates is None:
+                self._check_events_as_security_triggers([event], db_session)
+            else:
+                trigger_candidates.append(event)
     
     def _process_attributes(
         self, 
         event: Event, 
         attributes: Dict[str, Any], 
         event_type: str,
-        related_models: List[Any],
+        specialized_event: Optional[Any],
         db_session: Session
     ) -> None:
         """
@@ -504,7 +1015,7 @@ class SimpleProcessor:
             event: Event model
             attributes: Dictionary of attributes
             event_type: Type of event (llm, security, framework, tool, generic)
-            related_models: List to append related models to
+            specialized_event: The event's own specialized model, if one was created
             db_session: SQLAlchemy session
         """
         # Skip if no attributes
@@ -514,102 +1025,61 @@ class SimpleProcessor:
         # Process session info first to ensure it's available
         self._process_session_info(event, attributes, db_session)
             
-        # Process appropriate attributes based on event type    
+        # Process appropriate attributes based on event type; the specialized
+        # model is passed in, so the event's relationships are never loaded
         if event_type == "llm":
             # Store attributes directly in LLM interaction
-            if hasattr(event, 'llm_interaction') and event.llm_interaction:
-                # Ensure the interaction has been flushed to get an ID
-                db_session.flush()
-                
+            llm_interaction = specialized_event
+            if llm_interaction:
                 # Store raw attributes
-                event.llm_interaction.raw_attributes = attributes
+                llm_interaction.raw_attributes = attributes
                 
                 # Extract known attributes to dedicated columns
-                event.llm_interaction.temperature = attributes.get('temperature') or attributes.get('llm.temperature')
-                event.llm_interaction.top_p = attributes.get('top_p') or attributes.get('llm.top_p')
-                event.llm_interaction.max_tokens = attributes.get('max_tokens') or attributes.get('llm.max_tokens')
-                event.llm_interaction.frequency_penalty = attributes.get('frequency_penalty') or attributes.get('llm.frequency_penalty')
-                event.llm_interaction.presence_penalty = attributes.get('presence_penalty') or attributes.get('llm.presence_penalty')
-                event.llm_interaction.session_id = attributes.get('session.id')
-                event.llm_interaction.user_id = attributes.get('user.id')
-                event.llm_interaction.prompt_template_id = attributes.get('prompt.template_id')
-                event.llm_interaction.stream = attributes.get('stream') or attributes.get('llm.stream')
-                event.llm_interaction.cached_response = attributes.get('cached_response') or attributes.get('llm.cached_response')
-                event.llm_interaction.model_version = attributes.get('model_version') or attributes.get('llm.model_version')
-                
-                db_session.add(event.llm_interaction)
+                _promote_attributes(llm_interaction, attributes, "llm")
+                llm_interaction.session_id = attributes.get('session.id')
+                llm_interaction.user_id = attributes.get('user.id')
+                llm_interaction.prompt_template_id = attributes.get('prompt.template_id')
                 
                 # Fix timestamp fields if needed
-                self._fix_timestamps(event, event.llm_interaction, db_session)
+                self._fix_timestamps(event, llm_interaction, db_session)
         
         # Security attributes
-        elif event_type == "security" and hasattr(event, 'security_alert') and event.security_alert:
-            # Ensure the security alert has been flushed
-            db_session.flush()
-            
-            # Store raw attributes
-            event.security_alert.raw_attributes = attributes
-            
-            # Extract known attributes to dedicated columns if they were added
-            if hasattr(event.security_alert, 'detection_source'):
-                event.security_alert.detection_source = attributes.get('detection_source') or attributes.get('security.detection_source')
-            if hasattr(event.security_alert, 'confidence_score'):
-                event.security_alert.confidence_score = attributes.get('confidence_score') or attributes.get('security.confidence_score')
-            if hasattr(event.security_alert, 'risk_level'):
-                event.security_alert.risk_level = attributes.get('risk_level') or attributes.get('security.risk_level')
-            if hasattr(event.security_alert, 'affected_component'):
-                event.security_alert.affected_component = attributes.get('affected_component') or attributes.get('security.affected_component')
-            if hasattr(event.security_alert, 'detection_rule_id'):
-                event.security_alert.detection_rule_id = attributes.get('detection_rule_id') or attributes.get('security.detection_rule_id')
-            
-            db_session.add(event.security_alert)
-            
-            # Create security alert triggers if possible
-            self._try_create_security_trigger(event.security_alert, db_session)
+        elif event_type == "security":
+            security_alert = specialized_event
+            if security_alert:
+                # Store raw attributes
+                security_alert.raw_attributes = attributes
+                
+                # Extract known attributes to dedicated columns if they were added
+                _promote_attributes(security_alert, attributes, "security")
+                
+                # Create security alert triggers if possible; in a batch they are
+                # resolved for all alerts at once after the last event
+                pending_alerts = db_session.info.get(BATCH_ALERTS_KEY)
+                if pending_alerts is None:
+                    self._create_security_triggers([security_alert], db_session)
+                else:
+                    pending_alerts.append(security_alert)
         
         # Framework attributes
-        elif event_type == "framework" and hasattr(event, 'framework_event') and event.framework_event:
-            # Ensure the framework event has been flushed
-            db_session.flush()
-            
-            # Store raw attributes
-            event.framework_event.raw_attributes = attributes
-            
-            # Extract known attributes to dedicated columns if they were added
-            if hasattr(event.framework_event, 'app_version'):
-                event.framework_event.app_version = attributes.get('app_version') or attributes.get('framework.app_version')
-            if hasattr(event.framework_event, 'os_type'):
-                event.framework_event.os_type = attributes.get('os_type') or attributes.get('framework.os_type')
-            if hasattr(event.framework_event, 'memory_usage_mb'):
-                event.framework_event.memory_usage_mb = attributes.get('memory_usage_mb') or attributes.get('framework.memory_usage_mb')
-            if hasattr(event.framework_event, 'cpu_usage_percent'):
-                event.framework_event.cpu_usage_percent = attributes.get('cpu_usage_percent') or attributes.get('framework.cpu_usage_percent')
-            if hasattr(event.framework_event, 'environment'):
-                event.framework_event.environment = attributes.get('environment') or attributes.get('framework.environment')
-            
-            db_session.add(event.framework_event)
+        elif event_type == "framework":
+            framework_event = specialized_event
+            if framework_event:
+                # Store raw attributes
+                framework_event.raw_attributes = attributes
+                
+                # Extract known attributes to dedicated columns if they were added
+                _promote_attributes(framework_event, attributes, "framework")
             
         # Tool attributes
-        elif event_type == "tool" and hasattr(event, 'tool_interaction') and event.tool_interaction:
-            # Ensure the tool interaction has been flushed
-            db_session.flush()
-            
-            # Store raw attributes
-            event.tool_interaction.raw_attributes = attributes
-            
-            # Extract known attributes to dedicated columns if they were added
-            if hasattr(event.tool_interaction, 'tool_version'):
-                event.tool_interaction.tool_version = attributes.get('tool_version') or attributes.get('tool.version')
-            if hasattr(event.tool_interaction, 'authorization_level'):
-                event.tool_interaction.authorization_level = attributes.get('authorization_level') or attributes.get('tool.authorization_level')
-            if hasattr(event.tool_interaction, 'execution_time_ms'):
-                event.tool_interaction.execution_time_ms = attributes.get('execution_time_ms') or attributes.get('tool.execution_time_ms')
-            if hasattr(event.tool_interaction, 'cache_hit'):
-                event.tool_interaction.cache_hit = attributes.get('cache_hit') or attributes.get('tool.cache_hit')
-            if hasattr(event.tool_interaction, 'api_version'):
-                event.tool_interaction.api_version = attributes.get('api_version') or attributes.get('tool.api_version')
-            
-            db_session.add(event.tool_interaction)
+        elif event_type == "tool":
+            tool_interaction = specialized_event
+            if tool_interaction:
+                # Store raw attributes, minus those promoted to metadata columns
+                tool_interaction.raw_attributes = ToolInteraction.strip_promoted_attributes(attributes)
+                
+                # Extract known attributes to dedicated columns if they were added
+                _promote_attributes(tool_interaction, attributes, "tool")
     
     def _process_session_info(self, event: Event, attributes: Dict[str, Any], db_session: Session) -> None:
         """
@@ -629,61 +1099,35 @@ class SimpleProcessor:
             return
         
         # Determine the correct agent_id for this session
-        # IMPORTANT: Don't blindly use event.agent_id as it might be "unknown-agent"
-        # Instead, try to determine the real agent this session belongs to
-        
-        agent_id = event.agent_id  # Default, but we'll try to find a better one
-        
-        # Look for better agent identifiers in the attributes
-        if 'agent.id' in attributes:
-            agent_id = attributes['agent.id']
-        elif 'agent.name' in attributes:
-            agent_id = attributes['agent.name']
-        elif 'application.name' in attributes and attributes['application.name']:
-            agent_id = attributes['application.name']
-        
-        # If event.name contains a known agent pattern, use that
-        event_name = event.name or ""
-        known_agents = ['weather-agent', 'chatbot-agent', 'rag-agent']
-        for known_agent in known_agents:
-            if known_agent in event_name:
-                agent_id = known_agent
-                break
-            
-        # If we're still using unknown-agent, try one last method with raw_data if available
-        if agent_id == "unknown-agent" and event.raw_data:
-            raw_data = event.raw_data
-            if isinstance(raw_data, dict):
-                # Check for signals in raw_data
-                raw_name = raw_data.get('name', '')
-                for known_agent in known_agents:
-                    if known_agent in raw_name:
-                        agent_id = known_agent
-                        break
+        agent_id = self._resolve_session_agent_id(event.agent_id, event.name, event.raw_data, attributes)
         
         # Ensure this agent exists in the DB
-        agent = db_session.query(Agent).filter(Agent.agent_id == agent_id).first()
-        if not agent:
-            # Create the agent if it doesn't exist
-            current_time = datetime.utcnow()
-            agent = Agent(
-                agent_id=agent_id,
-                name=agent_id,
-                first_seen=current_time,
-                last_seen=current_time,
-                is_active=True
-            )
-            db_session.add(agent)
-            db_session.flush()
-            logger.debug(f"Created new agent: {agent_id}")
+        agent = db_session.info.get(BATCH_AGENTS_KEY, {}).get(agent_id)
+        if agent is None and agent_id not in db_session.info.get(BATCH_AGENT_IDS_KEY, ()):
+            agent = db_session.query(Agent).filter(Agent.agent_id == agent_id).first()
+            if not agent:
+                # Create the agent if it doesn't exist
+                current_time = datetime.utcnow()
+                agent = Agent(
+                    agent_id=agent_id,
+                    name=agent_id,
+                    first_seen=current_time,
+                    last_seen=current_time,
+                    is_active=True
+                )
+                db_session.add(agent)
+                db_session.flush()
+                logger.debug("Created new agent: %s", agent_id)
         
         # Debug log to help diagnose issues
-        logger.debug(f"Creating/updating session {session_id} for agent {agent_id}")
+        logger.debug("Creating/updating session %s for agent %s", session_id, agent_id)
         
         # Try to get or create the session
         try:
-            # First check if it exists
-            session = db_session.query(Session).filter(Session.session_id == session_id).first()
+            # First check the sessions preloaded for this batch, then the database
+            session = db_session.info.get(BATCH_SESSIONS_KEY, {}).get(session_id)
+            if session is None:
+                session = db_session.query(Session).filter(Session.session_id == session_id).first()
             
             if not session:
                 # Create it with the agent_id we determined
@@ -696,11 +1140,10 @@ class SimpleProcessor:
                 )
                 db_session.add(session)
                 db_session.flush()
-                logger.debug(f"Created new session {session_id} for agent {agent_id}")
+                logger.debug("Created new session %s for agent %s", session_id, agent_id)
             
             # Update event's session ID
             event.session_id = session_id
-            db_session.add(event)
             
             # Ensure timestamps are comparable (both naive or both aware)
             event_timestamp = event.timestamp
@@ -714,17 +1157,143 @@ class SimpleProcessor:
             # Update start_timestamp if this event is earlier
             if session_start is None or event_timestamp < session_start:
                 session.start_timestamp = event_timestamp
-                db_session.add(session)
                 
             # Always update end_timestamp if this event is later than the current end_timestamp
             # or if end_timestamp is not set
             if session.end_timestamp is None or event_timestamp > session.end_timestamp:
                 session.end_timestamp = event_timestamp
-                db_session.add(session)
             
         except Exception as e:
             logger.error(f"Error processing session information: {str(e)}", exc_info=True)
     
+    def _resolve_session_agent_id(
+        self,
+        agent_id: str,
+        event_name: Optional[str],
+        raw_data: Any,
+        attributes: Dict[str, Any]
+    ) -> str:
+        """
+        Determine the agent a session belongs to.
+        
+        Don't blindly use the event's agent_id as it might be "unknown-agent";
+        prefer agent identifiers from the attributes or known agent names.
+        
+        Args:
+            agent_id: Agent ID reported on the event
+            event_name: Name of the event
+            raw_data: Raw event data
+            attributes: Dictionary of attributes
+            
+        Returns:
+            str: Agent ID to associate with the session
+        """
+        # Look for better agent identifiers in the attributes
+        if 'agent.id' in attributes:
+            agent_id = attributes['agent.id']
+        elif 'agent.name' in attributes:
+            agent_id = attributes['agent.name']
+        elif 'application.name' in attributes and attributes['application.name']:
+            agent_id = attributes['application.name']
+        
+        # If event.name contains a known agent pattern, use that
+        event_name = event_name or ""
+        known_agents = ['weather-agent', 'chatbot-agent', 'rag-agent']
+        for known_agent in known_agents:
+            if known_agent in event_name:
+                agent_id = known_agent
+                break
+            
+        # If we're still using unknown-agent, try one last method with raw_data if available
+        if agent_id == "unknown-agent" and raw_data:
+            if isinstance(raw_data, dict):
+                # Check for signals in raw_data
+                raw_name = raw_data.get('name', '')
+                for known_agent in known_agents:
+                    if known_agent in raw_name:
+                        agent_id = known_agent
+                        break
+        
+        return agent_id
+    
+    def _preload_batch(self, events_data: List[Dict[str, Any]], db_session: Session) -> None:
+        """
+        Create the agents, traces, spans and sessions referenced by a batch.
+        
+        Each table is populated parent-first with a single INSERT ... ON CONFLICT
+        DO NOTHING instead of a SELECT and INSERT per event, then read back with
+        one IN query per table. The resulting rows are kept in
+        ``db_session.info`` so the per-event transforms look them up there and
+        Span.get_or_create finds the spans in the identity map.
+        
+        Args:
+            events_data: Validated event data dictionaries
+            db_session: SQLAlchemy session
+        """
+        current_time = datetime.utcnow()
+        agent_rows: Dict[str, Dict[str, Any]] = {}
+        trace_rows: Dict[str, Dict[str, Any]] = {}
+        span_rows = []
+        session_rows = []
+        
+        def add_agent(agent_id: str, name: str) -> None:
+            agent_rows.setdefault(agent_id, {
+                "agent_id": agent_id,
+                "name": name,
+                "first_seen": current_time,
+                "last_seen": current_time,
+                "is_active": True
+            })
+        
+        for event_data in events_data:
+            agent_id = event_data["agent_id"]
+            add_agent(agent_id, f"Agent-{agent_id[:8]}")
+            
+            if event_data.get("trace_id"):
+                trace_rows.setdefault(event_data["trace_id"], {
+                    "trace_id": event_data["trace_id"],
+                    "agent_id": agent_id
+                })
+            
+            if event_data.get("span_id"):
+                span_rows.append({
+                    "span_id": event_data["span_id"],
+                    "trace_id": event_data.get("trace_id"),
+                    "parent_span_id": event_data.get("parent_span_id"),
+                    "event_name": event_data.get("name"),
+                    "timestamp": event_data["timestamp"]
+                })
+            
+            attributes = event_data.get("attributes")
+            if isinstance(attributes, dict) and attributes.get("session.id"):
+                session_agent_id = self._resolve_session_agent_id(
+                    agent_id, event_data["name"], event_data, attributes
+                )
+                add_agent(session_agent_id, session_agent_id)
+                session_rows.append({
+                    "session_id": attributes["session.id"],
+                    "agent_id": session_agent_id,
+                    "start_timestamp": current_time,
+                    "end_timestamp": current_time
+                })
+        
+        # Agents committed by earlier batches are neither inserted nor loaded;
+        # events and traces reference them by agent_id alone
+        new_agent_ids = _unknown_agent_ids(db_session.get_bind(), agent_rows)
+        insert_or_ignore(db_session, Agent, [agent_rows[agent_id] for agent_id in new_agent_ids], "agent_id")
+        insert_or_ignore(db_session, Trace, list(trace_rows.values()), "trace_id")
+        db_session.info[BATCH_AGENT_IDS_KEY] = set(agent_rows)
+        db_session.info[BATCH_AGENTS_KEY] = {
+            agent.agent_id: agent
+            for agent in db_session.query(Agent).filter(Agent.agent_id.in_(new_agent_ids))
+        } if new_agent_ids else {}
+        db_session.info[BATCH_TRACES_KEY] = {
+            trace.trace_id: trace
+            for trace in db_session.query(Trace).filter(Trace.trace_id.in_(trace_rows))
+        } if trace_rows else {}
+        db_session.info[BATCH_SPANS_KEY] = Span.bulk_get_or_create(db_session, span_rows)
+        db_session.info[BATCH_SESSIONS_KEY] = SessionModel.bulk_get_or_create(db_session, session_rows)
+    
     def _fix_timestamps(self, event: Event, llm_interaction: LLMInteraction, db_session: Session) -> None:
         """
         Fix missing timestamps in LLM interactions by using event timestamps.
@@ -735,226 +1304,292 @@ class SimpleProcessor:
             db_session: SQLAlchemy session
         """
         interaction_type = llm_interaction.interaction_type
+        # Read the instrumented attribute once; it is consulted for either kind
+        raw_attributes: Any = llm_interaction.raw_attributes
         
         # Fix missing request timestamp for start interactions
         if interaction_type == 'start' and not llm_interaction.request_timestamp:
             # Use event timestamp or extract from attributes
-            if llm_interaction.raw_attributes and 'llm.request.timestamp' in llm_interaction.raw_attributes:
+            if raw_attributes and 'llm.request.timestamp' in raw_attributes:
                 try:
-                    ts_str = llm_interaction.raw_attributes['llm.request.timestamp']
-                    # Handle ISO format timestamps
-                    ts_str = ts_str.replace('Z', '+00:00')
-                    llm_interaction.request_timestamp = datetime.fromisoformat(ts_str)
+                    ts_str = raw_attributes['llm.request.timestamp']
+                    llm_interaction.request_timestamp = parse_iso_timestamp(ts_str)
                 except (ValueError, TypeError):
                     # Fall back to event timestamp
                     llm_interaction.request_timestamp = event.timestamp
             else:
                 llm_interaction.request_timestamp = event.timestamp
-                
-            db_session.add(llm_interaction)
         
         # Fix missing response timestamp for finish interactions
         if interaction_type == 'finish' and not llm_interaction.response_timestamp:
             # Use event timestamp or extract from attributes
-            if llm_interaction.raw_attributes and 'llm.response.timestamp' in llm_interaction.raw_attributes:
+            if raw_attributes and 'llm.response.timestamp' in raw_attributes:
                 try:
-                    ts_str = llm_interaction.raw_attributes['llm.response.timestamp']
-                    # Handle ISO format timestamps
-                    ts_str = ts_str.replace('Z', '+00:00')
-                    llm_interaction.response_timestamp = datetime.fromisoformat(ts_str)
+                    ts_str = raw_attributes['llm.response.timestamp']
+                    llm_interaction.response_timestamp = parse_iso_timestamp(ts_str)
                 except (ValueError, TypeError):
                     # Fall back to event timestamp
                     llm_interaction.response_timestamp = event.timestamp
             else:
                 llm_interaction.response_timestamp = event.timestamp
-                
-            db_session.add(llm_interaction)
     
-    def _try_create_security_trigger(self, security_alert, db_session: Session) -> None:
+    def _create_security_triggers(self, security_alerts: List[SecurityAlert], db_session: Session) -> None:
         """
-        Try to create a security alert trigger for the specified alert.
+        Try to create security alert triggers for the specified alerts.
+        
+        Each alert is associated with the earliest other event in its span.
+        The candidates for all alerts are fetched with one window query that
+        keeps the first two events per span, enough to skip the alert's own
+        event. Alerts without a span match fall back to content comparison
+        against recent LLM events from the same agent.
         
         Args:
-            security_alert: Security alert model
+            security_alerts: Security alert models, already flushed
             db_session: SQLAlchemy session
         """
-        from src.models.security_alert import SecurityAlertTrigger
-        
-        # Get the alert's event
-        event = security_alert.event
-        if not event:
+        alerts = [alert for alert in security_alerts if alert.event]
+        if not alerts:
             return
-            
+        
         # First try to find events with matching span_id
-        if event.span_id:
-            matching_events = db_session.query(Event).filter(
-                Event.span_id == event.span_id,
-                Event.id != event.id
-            ).order_by(Event.timestamp.asc()).all()
-            
-            if matching_events:
+        first_events_by_span: Dict[str, List[int]] = {}
+        span_ids = {alert.event.span_id for alert in alerts if alert.event.span_id}
+        if span_ids:
+            db_session.flush()
+            ranked = select(
+                Event.id,
+                Event.span_id,
+                func.row_number().over(
+                    partition_by=Event.span_id,
+                    order_by=(Event.timestamp.asc(), Event.id.asc())
+                ).label("position")
+            ).where(Event.span_id.in_(span_ids)).subquery()
+            for event_id, span_id in db_session.execute(
+                select(ranked.c.id, ranked.c.span_id)
+                .where(ranked.c.position <= 2)
+                .order_by(ranked.c.span_id, ranked.c.position)
+            ):
+                first_events_by_span.setdefault(span_id, []).append(event_id)
+        
+        trigger_rows: List[Dict[str, Any]] = []
+        for security_alert in alerts:
+            event = security_alert.event
+            trigger_event_id = next(
+                (event_id for event_id in first_events_by_span.get(event.span_id, ()) if event_id != event.id),
+                None
+            )
+            if trigger_event_id is not None:
                 # Associate with the first event in the span
-                trigger_event = matching_events[0]
-                logger.info(f"Found matching event {trigger_event.id} with span_id {event.span_id}")
-                
-                # Create the security alert trigger
-                trigger = SecurityAlertTrigger(
-                    alert_id=security_alert.id,
-                    triggering_event_id=trigger_event.id
-                )
-                db_session.add(trigger)
-                return
-                
-        # If no matching span_id, try content comparison
+                logger.info(f"Found matching event {trigger_event_id} with span_id {event.span_id}")
+            else:
+                trigger_event_id = self._find_trigger_by_content(security_alert, db_session)
+            
+            if trigger_event_id is not None:
+                trigger_rows.append({
+                    "alert_id": security_alert.id,
+                    "triggering_event_id": trigger_event_id
+                })
+            else:
+                # If no match found, log it for later processing
+                logger.warning(f"Could not find matching event for security alert {security_alert.id}")
+        
+        # Create the security alert triggers in one executemany
+        SecurityAlertTrigger.bulk_create(db_session, trigger_rows)
+    
+    def _find_trigger_by_content(self, security_alert: SecurityAlert, db_session: Session) -> Optional[int]:
+        """
+        Find a recent LLM event whose content matches a security alert.
+        
+        Args:
+            security_alert: Security alert model
+            db_session: SQLAlchemy session
+            
+        Returns:
+            Optional[int]: ID of the matching event, or None
+        """
+        event = security_alert.event
+        # Rendered once and compared against every candidate
+        alert_content = _security_content(security_alert.raw_attributes)
+        
         # Look for LLM interactions that might have triggered this alert
-        if "suspicious content" in str(security_alert.raw_attributes).lower() or "harmful content" in str(security_alert.raw_attributes).lower():
-            # Find recent LLM interactions from the same agent
-            potential_triggers = db_session.query(Event).filter(
+        if alert_content and ("suspicious content" in alert_content or "harmful content" in alert_content):
+            # Find recent LLM interactions from the same agent; the comparison
+            # reads each one's interaction, so join it in rather than loading
+            # it per candidate
+            potential_triggers = db_session.query(Event).options(
+                joinedload(Event.llm_interaction)
+            ).filter(
                 Event.agent_id == event.agent_id,
                 Event.event_type == "llm",
                 Event.timestamp < event.timestamp,
-                Event.timestamp > (event.timestamp - timedelta(minutes=5))
+                Event.timestamp > (event.timestamp - CONTENT_MATCH_WINDOW)
             ).order_by(Event.timestamp.desc()).all()
             
             for trigger_event in potential_triggers:
                 # Compare content to find the most likely trigger
-                if self._compare_security_content(security_alert, trigger_event):
+                if self._security_contents_match(alert_content, _event_security_content(trigger_event)):
                     logger.info(f"Found matching event {trigger_event.id} through content comparison")
-                    
-                    # Create the security alert trigger
-                    trigger = SecurityAlertTrigger(
-                        alert_id=security_alert.id,
-                        triggering_event_id=trigger_event.id
-                    )
-                    db_session.add(trigger)
-                    return
-                    
-        # If no match found, log it for later processing
-        logger.warning(f"Could not find matching event for security alert {security_alert.id}")
+                    return trigger_event.id
+        
+        return None
         
-    def _compare_security_content(self, security_alert, event) -> bool:
+    def _security_contents_match(self, alert_content: Optional[str], event_content: Optional[str]) -> bool:
         """
-        Compare security alert content with event content to find matches.
+        Compare alert content with event content, both already lowercased.
+        
+        Callers comparing one alert or event against several others render
+        its content once with _security_content and pass it to every call.
         
         Args:
-            security_alert: Security alert model
-            event: Event model
+            alert_content: Alert content from _security_content
+            event_content: Event content from _event_security_content
             
         Returns:
             bool: True if content matches, False otherwise
         """
-        if not security_alert.raw_attributes:
+        if not alert_content or not event_content:
             return False
-            
-        # Extract relevant content for comparison
-        alert_content = str(security_alert.raw_attributes)
-        
-        # For LLM events, check the LLM interaction raw attributes
-        if event.event_type == 'llm' and hasattr(event, 'llm_interaction') and event.llm_interaction:
-            if not event.llm_interaction.raw_attributes:
-                return False
-            event_content = str(event.llm_interaction.raw_attributes)
-        else:
-            # Fall back to event raw_attributes if available
-            if not hasattr(event, 'raw_attributes') or not event.raw_attributes:
-                return False
-            event_content = str(event.raw_attributes)
+        
+        # Find every suspicious word in a single scan, rather than a
+        # substring search per word
+        event_words = set(_suspicious_words_re.findall(event_content))
         
         # Look for suspicious content patterns
-        if "suspicious content in prompt" in alert_content.lower() or "harmful content" in alert_content.lower():
-            if "prompt" in event_content.lower() and any(word in event_content.lower() for word in ["harmful", "malicious", "dangerous"]):
+        if "suspicious content in prompt" in alert_content or "harmful content" in alert_content:
+            if "prompt" in event_content and not HARMFUL_PROMPT_WORDS.isdisjoint(event_words):
                 return True
         
         # Look for common identifiers like vendor names
-        if "vendor" in alert_content.lower():
-            vendor_match = None
-            for part in alert_content.lower().split("vendor"):
-                if part.strip() and len(part.strip()) > 0:
-                    vendor_name = part.split()[0].strip().strip('":,}').lower()
-                    if vendor_name and vendor_name in event_content.lower():
+        if "vendor" in alert_content:
+            for part in alert_content.split("vendor"):
+                if part.strip():
+                    vendor_name = part.split()[0].strip().strip('":,}')
+                    if vendor_name and vendor_name in event_content:
                         return True
-                
-        # Look for common patterns in suspicious content
-        suspicious_patterns = [
-            "harmful", "malicious", "dangerous", "exploit",
-            "injection", "attack", "hack", "breach"
-        ]
         
-        for pattern in suspicious_patterns:
-            if pattern in alert_content.lower() and pattern in event_content.lower():
-                return True
-                
-        return False
+        # Look for common patterns in suspicious content
+        return not event_words.isdisjoint(_suspicious_words_re.findall(alert_content))
     
-    def _check_event_as_security_trigger(self, event: Event, db_session: Session) -> None:
+    def _check_events_as_security_triggers(self, events: List[Event], db_session: Session) -> None:
         """
-        Check if this event could be a trigger for any existing security alerts.
+        Check if these events could be triggers for any existing security alerts.
         
-        This handles the case where security alerts arrive before their triggering events.
+        This handles the case where security alerts arrive before their triggering
+        events. Unassociated alerts in the events' spans are fetched with one
+        query and claimed by the first event in each span. LLM events that find
+        none are compared by content against recent alerts from their agent,
+        fetched with one more query the first time one is needed. Events are
+        matched in order, so the result is the same as checking them one by one.
         
         Args:
-            event: Event model that might be a trigger
+            events: Flushed non-security events that might be triggers
             db_session: SQLAlchemy session
         """
-        from src.models.security_alert import SecurityAlert, SecurityAlertTrigger
-        
-        # Skip if no span_id
-        if not event.span_id:
+        events = [event for event in events if event.span_id]
+        if not events:
             return
-            
-        logger.debug(f"Checking if event {event.id} with span_id {event.span_id} could be a security alert trigger")
         
-        # Find security alerts with the same span_id that don't have trigger associations
-        unassociated_alerts = db_session.query(SecurityAlert).join(
+        # Alerts queued in this batch get their triggers once the batch is done
+        pending_alert_ids = [alert.id for alert in db_session.info.get(BATCH_ALERTS_KEY, ())]
+        
+        # Find security alerts in the same spans that don't have trigger associations
+        alerts_by_span: Dict[Any, List[SecurityAlert]] = {}
+        span_id: str
+        for alert, span_id in db_session.query(SecurityAlert, Event.span_id).join(
             Event, SecurityAlert.event_id == Event.id
-        ).outerjoin(
-            SecurityAlertTrigger, SecurityAlertTrigger.alert_id == SecurityAlert.id
         ).filter(
-            Event.span_id == event.span_id,
-            Event.id != event.id,
-            SecurityAlertTrigger.id == None
-        ).all()
-        
-        if unassociated_alerts:
-            logger.info(f"Found {len(unassociated_alerts)} unassociated security alerts with matching span_id {event.span_id}")
+            Event.span_id.in_({event.span_id for event in events}),
+            ~_alert_has_trigger,
+            SecurityAlert.id.notin_(pending_alert_ids)
+        ).order_by(SecurityAlert.id):
+            alerts_by_span.setdefault(span_id, []).append(alert)
+        
+        recent_alerts = None
+        alert_contents = {}
+        claimed = set()
+        trigger_rows: List[Dict[str, Any]] = []
+        for event in events:
+            logger.debug("Checking if event %s with span_id %s could be a security alert trigger", event.id, event.span_id)
             
-            for alert in unassociated_alerts:
-                # Create the security alert trigger
-                trigger = SecurityAlertTrigger(
-                    alert_id=alert.id,
-                    triggering_event_id=event.id
+            unassociated_alerts = [
+                alert for alert in alerts_by_span.pop(event.span_id, ())
+                if alert.id not in claimed and alert.event_id != event.id
+            ]
+            if unassociated_alerts:
+                alert_ids = [alert.id for alert in unassociated_alerts]
+                claimed.update(alert_ids)
+                trigger_rows.extend(
+                    {"alert_id": alert_id, "triggering_event_id": event.id} for alert_id in alert_ids
+                )
+                # One summary line per event rather than one per alert
+                logger.info(
+                    "Retrospectively associated security alerts %s with event %s (span_id %s)",
+                    alert_ids, event.id, event.span_id
                 )
-                db_session.add(trigger)
-                logger.info(f"Retrospectively associated security alert {alert.id} with event {event.id}")
-                
-        # If no span matches, try content comparison for LLM interactions
-        elif event.event_type == "llm":
-            # Find recent unassociated security alerts
-            recent_unassociated_alerts = db_session.query(SecurityAlert).join(
-                Event, SecurityAlert.event_id == Event.id
-            ).outerjoin(
-                SecurityAlertTrigger, SecurityAlertTrigger.alert_id == SecurityAlert.id
-            ).filter(
-                Event.agent_id == event.agent_id,
-                Event.timestamp > (event.timestamp - timedelta(minutes=5)),
-                Event.timestamp < (event.timestamp + timedelta(minutes=5)),
-                SecurityAlertTrigger.id == None
-            ).all()
             
-            for alert in recent_unassociated_alerts:
-                # Compare content
-                if self._compare_security_content(alert, event):
-                    logger.info(f"Found matching security alert {alert.id} through content comparison")
-                    
-                    # Create the security alert trigger
-                    trigger = SecurityAlertTrigger(
-                        alert_id=alert.id,
-                        triggering_event_id=event.id
+            # If no span matches, try content comparison for LLM interactions
+            elif event.event_type == "llm":
+                if recent_alerts is None:
+                    recent_alerts = self._recent_unassociated_alerts(
+                        [llm_event for llm_event in events if llm_event.event_type == "llm"], pending_alert_ids, db_session
                     )
-                    db_session.add(trigger)
-                    break  # Only associate with one alert 
+                
+                window_start = event.timestamp - CONTENT_MATCH_WINDOW
+                window_end = event.timestamp + CONTENT_MATCH_WINDOW
+                event_content = _event_security_content(event) if recent_alerts else None
+                for alert, agent_id, timestamp in recent_alerts:
+                    if agent_id != event.agent_id or not window_start < timestamp < window_end or alert.id in claimed:
+                        continue
+                    # Each alert's content is rendered once for all the events
+                    if alert.id not in alert_contents:
+                        alert_contents[alert.id] = _security_content(alert.raw_attributes)
+                    if self._security_contents_match(alert_contents[alert.id], event_content):
+                        logger.info(f"Found matching security alert {alert.id} through content comparison")
+                        claimed.add(alert.id)
+                        trigger_rows.append({"alert_id": alert.id, "triggering_event_id": event.id})
+                        break  # Only associate with one alert
+        
+        # Create all the security alert triggers in one executemany
+        SecurityAlertTrigger.bulk_create(db_session, trigger_rows)
     
-    def _check_tables_exist(self, db_session) -> bool:
+    def _recent_unassociated_alerts(
+        self,
+        events: List[Event],
+        pending_alert_ids: List[int],
+        db_session: Session
+    ) -> List[Tuple[SecurityAlert, str, datetime]]:
+        """
+        Fetch unassociated alerts within five minutes of any of the events.
+        
+        Args:
+            events: LLM events to find candidate alerts for
+            pending_alert_ids: IDs of alerts queued in the current batch
+            db_session: SQLAlchemy session
+            
+        Returns:
+            List of (alert, agent_id, timestamp) tuples, by the alert's event
+        """
+        timestamps = [event.timestamp for event in events]
+        # One range covering every event's window; the agent IN list and the
+        # range are both served by ix_events_agent_timestamp
+        window_start = min(timestamps) - CONTENT_MATCH_WINDOW
+        window_end = max(timestamps) + CONTENT_MATCH_WINDOW
+        # Content comparison reads raw_attributes, so load the deferred group up front
+        rows: List[Any] = db_session.query(SecurityAlert, Event.agent_id, Event.timestamp).options(
+            undefer_group("body")
+        ).join(
+            Event, SecurityAlert.event_id == Event.id
+        ).filter(
+            Event.agent_id.in_({event.agent_id for event in events}),
+            Event.timestamp > window_start,
+            Event.timestamp < window_end,
+            ~_alert_has_trigger,
+            SecurityAlert.id.notin_(pending_alert_ids)
+        ).order_by(SecurityAlert.id).all()
+        # Rows are named tuples of the three selected entities
+        return cast(List[Tuple[SecurityAlert, str, datetime]], rows)
+    
+    def _check_tables_exist(self, db_session: Session) -> bool:
         """
         Check if all required tables exist in the database.
         
@@ -972,7 +1607,7 @@ class SimpleProcessor:
             logger.error(f"Table check failed: {str(e)}")
             return False
             
-    def _ensure_agent_exists(self, db_session, agent_id: str) -> None:
+    def _ensure_agent_exists(self, db_session: Session, agent_id: Optional[str]) -> None:
         """
         Ensure an agent with the given ID exists, creating it if necessary.
         
@@ -1008,7 +1643,6 @@ class SimpleProcessor:
                 # Ensure name matches agent_id for consistency
                 if agent.name != agent_id:
                     agent.name = agent_id
-                db_session.add(agent)
                 logger.debug(f"Using existing agent with agent_id={agent_id}, db id={agent.id}")
         except Exception as e:
             logger.error(f"Error ensuring agent exists: {str(e)}")
@@ -1033,30 +1667,29 @@ def process_event(event_data: Dict[str, Any], db_session: Session) -> Event:
     Raises:
         Exception: If event processing fails
     """
-    # Manual validation for required fields
-    required_fields = ["timestamp", "name", "level", "agent_id", "trace_id"]
-    for field in required_fields:
-        if field not in event_data:
-            raise ValueError(f"Missing required field: {field}")
+    # Read every required field at once; itemgetter fetches them in order,
+    # so the first missing one is reported
+    try:
+        timestamp, name, level, agent_id, trace_id = _standalone_event_values(event_data)
+    except KeyError as e:
+        raise ValueError(f"Missing required field: {e.args[0]}") from None
     
     # Create event
     try:
         # Parse timestamp
-        if isinstance(event_data["timestamp"], str):
-            timestamp = datetime.fromisoformat(event_data["timestamp"].replace('Z', '+00:00'))
-        else:
-            timestamp = event_data["timestamp"]
+        if isinstance(timestamp, str):
+            timestamp = parse_iso_timestamp(timestamp)
             
         # Create event object
         event = Event(
             schema_version=event_data.get("schema_version", "1.0"),
             timestamp=timestamp,
-            trace_id=event_data["trace_id"],
+            trace_id=trace_id,
             span_id=event_data.get("span_id"),
             parent_span_id=event_data.get("parent_span_id"),
-            name=event_data["name"],
-            level=event_data["level"],
-            agent_id=event_data["agent_id"],
+            name=name,
+            level=level,
+            agent_id=agent_id,
             attributes=event_data.get("attributes", {}),
             raw_data=event_data  # Store the entire event data in raw_data
         )
@@ -15,6 +15,7 @@ from src.models.event import Event
 from src.models.security_alert import SecurityAlert
 from src.models.agent import Agent
 from src.utils.logging import get_logger
+from src.utils.timestamps import parse_iso_timestamp
 
 # Set up logger
 logger = get_logger(__name__)
@@ -36,7 +37,7 @@ def process_security_event(db_session: Session, event_data: Dict[str, Any]) -> T
         # Parse timestamp if needed
         timestamp = event_data.get("timestamp")
         if isinstance(timestamp, str):
-            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+            timestamp = parse_iso_timestamp(timestamp)
         elif timestamp is None:
             timestamp = datetime.utcnow()
         
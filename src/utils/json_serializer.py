@@ -7,8 +7,16 @@ non-standard JSON types.
 """
 
 import json
+import math
 from datetime import datetime, date
-from typing import Any
+from typing import Any, Union
+
+# orjson is a C extension that is several times faster than the standard
+# library encoder; it is optional (see the "speedups" extra)
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 class DateTimeEncoder(json.JSONEncoder):
@@ -40,6 +48,13 @@ def dumps(obj: Any, **kwargs) -> str:
     """
     Serialize object to a JSON string using the custom encoder.
     
+    orjson is used when it is installed and no extra arguments are given;
+    it also encodes datetime and date objects as ISO format strings. Inputs
+    orjson rejects, such as non-string dict keys, use the standard encoder,
+    as do NaN and Infinity values, which orjson would silently write as null.
+    Without extra arguments both produce the same compact output, with no
+    whitespace after separators.
+    
     Args:
         obj: The object to serialize
         **kwargs: Additional arguments to pass to json.dumps
@@ -47,18 +62,57 @@ def dumps(obj: Any, **kwargs) -> str:
     Returns:
         str: The JSON string
     """
+    if not kwargs:
+        if orjson is not None:
+            try:
+                encoded = orjson.dumps(obj)
+            except TypeError:
+                pass
+            else:
+                if b"null" not in encoded or not _has_non_finite(obj):
+                    return encoded.decode()
+        kwargs["separators"] = (",", ":")
     return json.dumps(obj, cls=DateTimeEncoder, **kwargs)
 
 
-def loads(s: str, **kwargs) -> Any:
+def loads(s: Union[str, bytes], **kwargs) -> Any:
     """
     Deserialize JSON string to an object.
     
+    orjson is used when it is installed and no extra arguments are given.
+    Input it rejects because of NaN or Infinity literals is retried with the
+    standard parser so both accept the same documents; other malformed input
+    raises orjson's error, a json.JSONDecodeError, without a second parse.
+    
     Args:
-        s: The JSON string to deserialize
+        s: The JSON document to deserialize, as text or UTF-8 bytes
         **kwargs: Additional arguments to pass to json.loads
         
     Returns:
         Any: The deserialized object
     """
-    return json.loads(s, **kwargs) 
\ No newline at end of file
+    if orjson is not None and not kwargs:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            if not _may_hold_constants(s):
+                raise
+    return json.loads(s, **kwargs)
+
+
+def _has_non_finite(obj: Any) -> bool:
+    """Return whether obj holds a NaN or infinite float that orjson writes as null."""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(value) for value in obj)
+    return False
+
+
+def _may_hold_constants(s: Any) -> bool:
+    """Return whether a document orjson rejected may use NaN or Infinity."""
+    if isinstance(s, str):
+        return "NaN" in s or "Infinity" in s
+    return b"NaN" in s or b"Infinity" in s 
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Timestamp parsing utilities.
+
+This module provides a fast ISO 8601 parser for incoming telemetry
+timestamps. ciso8601 is used when it is installed; otherwise the
+standard library parser is used.
+"""
+
+import sys
+from datetime import datetime
+from typing import Callable
+
+try:
+    from ciso8601 import parse_datetime as _parse_datetime
+except ImportError:
+    _parse_datetime = None
+
+
+def _parse_zulu(value: str) -> datetime:
+    """Parse with datetime.fromisoformat, which before Python 3.11 rejects 'Z'."""
+    # Only a trailing 'Z' needs rewriting; other strings are parsed as is
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+
+# Chosen once at import so each call goes straight to the backend
+_parse: Callable[[str], datetime]
+if _parse_datetime is not None:
+    _parse = _parse_datetime
+elif sys.version_info >= (3, 11):
+    _parse = datetime.fromisoformat
+else:
+    _parse = _parse_zulu
+
+
+def parse_iso_timestamp(value: str) -> datetime:
+    """
+    Parse an ISO 8601 timestamp string.
+    
+    Args:
+        value: The timestamp string, optionally ending in 'Z'
+        
+    Returns:
+        datetime: The parsed datetime, timezone-aware if the string had an offset
+        
+    Raises:
+        ValueError: If the string is not a valid ISO 8601 timestamp
+    """
+    return _parse(value)
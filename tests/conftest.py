@@ -1,34 +1,77 @@
 """
 Basic test fixtures for MVP testing.
 """
+import importlib
+import importlib.abc
+import importlib.util
 import os
 import sys
-import tempfile
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 # Add src directory to path
 sys.path.insert(0, os.path.abspath("src"))
 
+# Packages under src that older tests import without the "src." prefix
+SRC_PACKAGES = frozenset({
+    "analysis", "api", "config", "database", "models", "processing", "services", "utils"
+})
+
+
+class SrcAliasFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """
+    Resolve imports such as "models.event" to the "src.models.event" module.
+    
+    The application imports its modules with the "src." prefix. Loading the
+    same files again under a second name through the path entry above would
+    register every model twice on the shared Base, leaving duplicate tables
+    and "Multiple classes found" errors for every test collected afterwards.
+    """
+    
+    def find_spec(self, fullname, path, target=None):
+        if fullname.partition(".")[0] not in SRC_PACKAGES:
+            return None
+        return importlib.util.spec_from_loader(fullname, self)
+    
+    def create_module(self, spec):
+        return importlib.import_module(f"src.{spec.name}")
+    
+    def exec_module(self, module):
+        # Already executed when imported under its src. name
+        pass
+
+
+sys.meta_path.insert(0, SrcAliasFinder())
+
 from models.base import Base
 from processing.simple_processor import SimpleProcessor
+from tests.query_counter import assert_max_queries as _assert_max_queries
+from src.utils.json_serializer import dumps, loads
 
 
 @pytest.fixture(scope="session")
-def temp_db_path():
-    """Create a temporary file path for a SQLite database."""
-    fd, path = tempfile.mkstemp(suffix=".db")
-    os.close(fd)
-    yield path
-    if os.path.exists(path):
-        os.unlink(path)
+def db_engine():
+    """Create an in-memory SQLite database engine shared by the whole run.
+    
+    StaticPool hands every checkout the same connection, so the schema is
+    created once and all sessions see the same database.
+    """
+    engine = create_engine(
+        "sqlite://", echo=False, poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
 
+    # pysqlite begins transactions itself and breaks SAVEPOINT handling;
+    # let SQLAlchemy emit BEGIN so the per-test savepoints below work
+    @event.listens_for(engine, "connect")
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
 
-@pytest.fixture(scope="session")
-def db_engine(temp_db_path):
-    """Create a SQLite database engine for testing."""
-    engine = create_engine(f"sqlite:///{temp_db_path}", echo=False)
     Base.metadata.create_all(engine)
     yield engine
     engine.dispose()
@@ -36,10 +79,17 @@ def db_engine(temp_db_path):
 
 @pytest.fixture(scope="function")
 def db_session(db_engine):
-    """Create a new database session for a test."""
+    """Create a new database session for a test.
+    
+    The session runs inside a transaction that is rolled back afterwards.
+    Its own commits and rollbacks only release or roll back savepoints, so
+    nothing a test writes outlives it. The engine's single connection is
+    held until then, so tests using this fixture should not open other
+    transactions on db_engine.
+    """
     connection = db_engine.connect()
     transaction = connection.begin()
-    session = Session(bind=connection)
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
     
     yield session
     
@@ -52,9 +102,9 @@ def db_session(db_engine):
 def db_session_factory(db_engine):
     """Create a session factory function for tests."""
     def get_session():
-        connection = db_engine.connect()
-        session = Session(bind=connection)
-        return session
+        # Bound to the engine, so closing the session returns the shared
+        # connection to the pool rather than leaving a checkout open
+        return Session(bind=db_engine)
     
     return get_session
 
@@ -62,4 +112,39 @@ def db_session_factory(db_engine):
 @pytest.fixture(scope="function")
 def simple_processor(db_session_factory):
     """Create a SimpleProcessor for testing."""
-    return SimpleProcessor(db_session_factory) 
\ No newline at end of file
+    return SimpleProcessor(db_session_factory)
+
+
+@pytest.fixture(scope="function")
+def engine():
+    """Create a fresh in-memory database engine configured like the application's.
+    
+    Unlike db_engine this is per test and enforces foreign keys.
+    """
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False},
+        json_serializer=dumps, json_deserializer=loads
+    )
+
+    @event.listens_for(engine, "connect")
+    def enable_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def session_factory(engine):
+    """Create a sessionmaker bound to the per-test engine."""
+    return sessionmaker(bind=engine, autoflush=False)
+
+
+@pytest.fixture(scope="function")
+def assert_max_queries():
+    """Return a context manager asserting an upper bound on executed queries.
+
+    Usage: ``with assert_max_queries(engine, 2): ...``
+    """
+    return _assert_max_queries
@@ -214,6 +214,35 @@ def test_security_alerts_migration():
         os.unlink(db_path)
 
 
+
+def test_security_alert_enums_normalized():
+    """Severities and statuses outside the model's enums are rewritten to enum values."""
+    db_path = setup_test_db()
+    
+    try:
+        conn = sqlite3.connect(db_path)
+        conn.executemany(
+            "INSERT INTO events (id, name, event_type, level, agent_id) VALUES (?, 'security.alert', 'security', 'ALERT', 'agent-123')",
+            [(2,), (3,)]
+        )
+        conn.executemany(
+            "INSERT INTO security_alerts (id, event_id, severity, description, status) VALUES (?, ?, ?, 'd', ?)",
+            [(2, 2, 'warning', 'investigating'), (3, 3, 'whatever', 'closed')]
+        )
+        conn.commit()
+        conn.close()
+        
+        with AttributeMigration(db_path) as migration:
+            assert migration.normalize_security_alert_enums() == 5
+        
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT severity, status FROM security_alerts ORDER BY id").fetchall()
+        conn.close()
+        assert rows == [('high', 'OPEN'), ('medium', 'INVESTIGATING'), ('high', 'OPEN')]
+    finally:
+        os.unlink(db_path)
+
+
 if __name__ == "__main__":
     test_security_alerts_migration()
     print("All tests passed!") 
\ No newline at end of file
@@ -3,18 +3,26 @@
 Process all events from example_records.json using SimpleProcessor.
 This demonstrates the end-to-end flow from JSON events to database entries.
 """
-import json
 import os
 import sys
 from pathlib import Path
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from itertools import islice
+from collections import Counter
+from sqlalchemy import func, select
 import time
 import logging
 
-# Using imports within src directory
-from models.base import init_db, get_db, create_all
+# Point the engine at a fresh demo database before models.base creates it.
+# SQL echo stays off unless SQL_ECHO=true is set.
+DB_PATH = "/tmp/cylestio_demo.db"
+if os.path.exists(DB_PATH):
+    os.remove(DB_PATH)
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+# Using imports within src directory. The models are imported eagerly on
+# purpose: create_all() only creates tables for models registered on Base.
+from models.base import init_db, get_db, create_all, insert_or_ignore
 from models.event import Event
 from models.llm_interaction import LLMInteraction
 from models.security_alert import SecurityAlert
@@ -25,13 +33,13 @@ from models.session import Session as SessionModel
 from models.trace import Trace
 from models.span import Span
 from processing.simple_processor import SimpleProcessor
+from utils.json_serializer import loads
+
+# Number of events submitted to the processor per batch
+BATCH_SIZE = 500
 
 # Set up database
-DB_PATH = "/tmp/cylestio_demo.db"
-if os.path.exists(DB_PATH):
-    os.remove(DB_PATH)
-db_url = f"sqlite:///{DB_PATH}"
-init_db(db_url, echo=True)
+init_db()
 create_all()  # Create all tables
 
 # Create a database session
@@ -40,60 +48,41 @@ db_session = next(get_db())
 # Initialize processor with the get_db function
 processor = SimpleProcessor(get_db)
 
-# Let's pre-create the agent to avoid the error
+# Pre-create the agents that appear in the example records with one INSERT
 current_time = datetime.utcnow()
-agent = Agent(
-    agent_id="chatbot-agent", 
-    name="Chatbot Agent", 
-    first_seen=current_time,
-    last_seen=current_time,
-    is_active=True
-)
-db_session.add(agent)
-
-# Also create the rag-agent and weather-agent as they appear in the example records
-agent2 = Agent(
-    agent_id="rag-agent", 
-    name="RAG Agent", 
-    first_seen=current_time,
-    last_seen=current_time,
-    is_active=True
-)
-db_session.add(agent2)
-
-agent3 = Agent(
-    agent_id="weather-agent", 
-    name="Weather Agent", 
-    first_seen=current_time,
-    last_seen=current_time,
-    is_active=True
-)
-db_session.add(agent3)
-
+insert_or_ignore(db_session, Agent, [
+    {
+        "agent_id": agent_id,
+        "name": name,
+        "first_seen": current_time,
+        "last_seen": current_time,
+        "is_active": True,
+    }
+    for agent_id, name in (
+        ("chatbot-agent", "Chatbot Agent"),
+        ("rag-agent", "RAG Agent"),
+        ("weather-agent", "Weather Agent"),
+    )
+], "agent_id")
 db_session.commit()
 print(f"Created agents: chatbot-agent, rag-agent, weather-agent")
 
-# Load all events from example_records.json
+# Stream events from example_records.json
 example_file = Path("example_records.json")
 
-try:
-    events_to_process = []
-    with open(example_file, 'r') as f:
+
+def iter_events(path):
+    """Yield event dictionaries from a JSON-lines file, skipping invalid lines."""
+    # Read bytes so orjson (when installed) parses each line without a decode step
+    with open(path, 'rb') as f:
         for line in f:
             try:
-                event_data = json.loads(line)
-                events_to_process.append(event_data)
-            except json.JSONDecodeError:
-                print(f"Warning: Skipping invalid JSON line: {line[:50]}...")
-                continue
-    
-    print(f"Loaded {len(events_to_process)} events from {example_file}")
-    
-    if not events_to_process:
-        print("No events found in the example_records.json")
-        sys.exit(1)
-        
-except FileNotFoundError:
+                yield loads(line)
+            except ValueError:
+                print(f"Warning: Skipping invalid JSON line: {line[:50].decode(errors='replace')}...")
+
+
+if not example_file.exists():
     print(f"Error: File not found: {example_file}")
     sys.exit(1)
 
@@ -101,20 +90,36 @@ except FileNotFoundError:
 start_time = time.time()
 successful_events = 0
 failed_events = 0
-event_types = {}
+event_types = Counter()
 
-for i, event_data in enumerate(events_to_process):
-    print(f"\nProcessing event {i+1}/{len(events_to_process)}: {event_data.get('name', 'Unknown')}")
-    result = processor.process_event(event_data)
-    
-    event_type = event_data.get('name', '').split('.')[0] if '.' in event_data.get('name', '') else 'unknown'
-    event_types[event_type] = event_types.get(event_type, 0) + 1
-    
-    if result.get("success", False):
-        successful_events += 1
-    else:
-        failed_events += 1
-        print(f"  Error: {result.get('error', 'Unknown error')}")
+# Parse and submit events in chunks so only one chunk is held in memory and
+# each chunk shares one session, one set of preload queries and one commit.
+# Chunks are processed serially on purpose: events of one session or agent
+# span many traces, so per-trace worker processes would race on creating the
+# same agent/session rows, and SQLite serializes their writes anyway.
+events_iter = iter_events(example_file)
+processed = 0
+while True:
+    batch = list(islice(events_iter, BATCH_SIZE))
+    if not batch:
+        break
+    print(f"\nProcessing events {processed+1}-{processed+len(batch)}")
+    batch_result = processor.process_batch(batch)
+    processed += len(batch)
+    
+    for event_data, result in zip(batch, batch_result["results"]):
+        event_name = event_data.get('name', '')
+        event_types[event_name.partition('.')[0] if '.' in event_name else 'unknown'] += 1
+        
+        if result.get("success", False):
+            successful_events += 1
+        else:
+            failed_events += 1
+            print(f"  Error in {event_data.get('name', 'Unknown')}: {result.get('error', 'Unknown error')}")
+
+if not processed:
+    print("No events found in the example_records.json")
+    sys.exit(1)
 
 end_time = time.time()
 processing_time = end_time - start_time
@@ -123,10 +128,10 @@ processing_time = end_time - start_time
 print("\n" + "="*50)
 print("PROCESSING SUMMARY")
 print("="*50)
-print(f"Total events processed: {len(events_to_process)}")
+print(f"Total events processed: {processed}")
 print(f"Successful: {successful_events}, Failed: {failed_events}")
 print(f"Processing time: {processing_time:.2f} seconds")
-print(f"Events per second: {len(events_to_process)/processing_time:.2f}")
+print(f"Events per second: {processed/processing_time:.2f}")
 
 print("\nEvent types processed:")
 for event_type, count in event_types.items():
@@ -136,15 +141,23 @@ print("\n" + "="*50)
 print("DATABASE EVALUATION")
 print("="*50)
 
-# Count records in each table
-events_count = db_session.query(func.count(Event.id)).scalar()
-llm_interactions_count = db_session.query(func.count(LLMInteraction.id)).scalar()
-security_alerts_count = db_session.query(func.count(SecurityAlert.id)).scalar()
-framework_events_count = db_session.query(func.count(FrameworkEvent.id)).scalar()
-tool_interactions_count = db_session.query(func.count(ToolInteraction.id)).scalar()
-sessions_count = db_session.query(func.count(SessionModel.id)).scalar()
-traces_count = db_session.query(func.count(Trace.id)).scalar()
-spans_count = db_session.query(func.count(Span.span_id)).scalar()
+# Count records in each table with one statement
+(
+    events_count,
+    llm_interactions_count,
+    security_alerts_count,
+    framework_events_count,
+    tool_interactions_count,
+    sessions_count,
+    traces_count,
+    spans_count,
+) = db_session.execute(select(*(
+    select(func.count(column)).scalar_subquery()
+    for column in (
+        Event.id, LLMInteraction.id, SecurityAlert.id, FrameworkEvent.id,
+        ToolInteraction.id, SessionModel.id, Trace.id, Span.span_id
+    )
+))).one()
 
 print(f"Events: {events_count}")
 print(f"LLM Interactions: {llm_interactions_count}")
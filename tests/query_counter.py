@@ -0,0 +1,49 @@
+"""
+Query counting helpers for catching N+1 regressions in tests.
+"""
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event as sa_event
+
+
+@contextmanager
+def count_queries(bind) -> Iterator[List[str]]:
+    """
+    Record the statements executed on an engine or connection.
+    
+    Args:
+        bind: Engine or connection to listen on
+        
+    Yields:
+        List[str]: SQL of each statement executed inside the block
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sa_event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        sa_event.remove(bind, "before_cursor_execute", before_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(bind, limit: int) -> Iterator[List[str]]:
+    """
+    Fail if the block executes more than ``limit`` statements.
+    
+    Args:
+        bind: Engine or connection to listen on
+        limit: Maximum number of statements allowed
+        
+    Yields:
+        List[str]: SQL of each statement executed inside the block
+    """
+    with count_queries(bind) as statements:
+        yield statements
+    assert len(statements) <= limit, (
+        f"Expected at most {limit} queries, got {len(statements)}:\n" + "\n".join(statements)
+    )
@@ -1,5 +1,4 @@
 import pytest
-import uuid
 from fastapi.testclient import TestClient
 import json
 from datetime import datetime, timezone, timedelta
@@ -8,12 +7,14 @@ from src.main import app
 from src.processing.simple_processor import process_event
 from src.database.session import get_db
 from src.models.event import Event
+from src.utils.timestamps import parse_iso_timestamp
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-# Setup in-memory test database with a unique identifier
-TEST_DATABASE_URL = f"sqlite:///:memory:{uuid.uuid4()}"
+# Setup in-memory test database; StaticPool keeps the one connection, so a
+# suffix after ":memory:" would only create a file on disk
+TEST_DATABASE_URL = "sqlite:///:memory:"
 
 engine = create_engine(
     TEST_DATABASE_URL,
@@ -200,7 +201,7 @@ def test_trace_endpoint(client, populated_db):
     assert all(e["trace_id"] == "shared-trace" for e in events)
     
     # Check for ordering by timestamp
-    timestamps = [datetime.fromisoformat(e["timestamp"]) for e in events]
+    timestamps = [parse_iso_timestamp(e["timestamp"]) for e in events]
     assert timestamps == sorted(timestamps)
 
 def test_metrics_validation(client):
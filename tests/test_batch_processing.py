@@ -0,0 +1,514 @@
+"""
+Tests for batch ingestion through SimpleProcessor.process_batch.
+"""
+import pytest
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import sessionmaker
+
+from src.models.agent import Agent
+from src.models.trace import Trace
+from src.models.event import Event, event_type_for_name
+from src.models.security_alert import SecurityAlert
+from src.processing.simple_processor import SimpleProcessor, _event_security_content, _security_content
+from src.utils.json_serializer import dumps, loads
+from tests.query_counter import count_queries
+
+
+@pytest.fixture
+def processor(session_factory):
+    """Create a processor whose sessions use the in-memory engine."""
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    return SimpleProcessor(get_db)
+
+
+def make_events(count):
+    """Build LLM events spread over a few agents, traces and sessions."""
+    return [
+        {
+            "schema_version": "1.0",
+            "timestamp": "2024-01-01T00:00:%02dZ" % index,
+            "name": "llm.call.start",
+            "level": "INFO",
+            "agent_id": "agent-%d" % (index % 3),
+            "trace_id": "trace-%d" % (index % 4),
+            "span_id": "span-%d" % index,
+            "attributes": {"llm.vendor": "openai", "session.id": "session-%d" % (index % 2)},
+        }
+        for index in range(count)
+    ]
+
+
+def test_batch_resolves_agents_and_traces_once(engine, processor):
+    """Agents and traces are read with one query per table, not one per event."""
+    with count_queries(engine) as statements:
+        result = processor.process_batch(make_events(20))
+
+    assert result["successful"] == 20
+    agent_selects = [s for s in statements if s.startswith("SELECT") and "FROM agents" in s]
+    trace_selects = [s for s in statements if s.startswith("SELECT") and "FROM traces" in s]
+    assert len(agent_selects) == 1
+    assert len(trace_selects) == 1
+
+    db = sessionmaker(bind=engine)()
+    assert db.query(Agent).count() == 3
+    assert db.query(Trace).count() == 4
+    assert db.query(Event).count() == 20
+    db.close()
+
+
+def test_batch_does_not_reload_specialized_models(engine, processor):
+    """Interactions created for an event are never queried back during the batch."""
+    events = make_events(10)
+    for event in events:
+        event["name"] = "tool.execution"
+        event["attributes"]["tool.name"] = "search"
+
+    with count_queries(engine) as statements:
+        result = processor.process_batch(events)
+
+    assert result["successful"] == 10
+    assert not [s for s in statements if s.startswith("SELECT") and "FROM tool_interactions" in s]
+
+
+@pytest.mark.parametrize("name, event_type", [
+    ("llm.call.start", "llm"),
+    ("security.content.dangerous", "security"),
+    ("framework.patch", "framework"),
+    ("tool.execution", "tool"),
+    ("llm", "generic"),
+    ("llmx.call", "generic"),
+    ("monitoring.start", "generic"),
+])
+def test_event_type_for_name(name, event_type):
+    """Events are classified by the prefix before the first dot."""
+    assert event_type_for_name(name) == event_type
+
+
+@pytest.mark.parametrize("field, value, error", [
+    ("level", None, "Missing required field: level"),
+    ("timestamp", None, "Missing required field: timestamp"),
+    ("name", ["llm.call.start"], "Field name must be a string, got list"),
+    ("timestamp", 5, "Field timestamp must be a string, got int"),
+    ("timestamp", "yesterday", "Invalid timestamp format: yesterday"),
+    ("agent_id", 7, "Field agent_id must be a string, got int"),
+    ("trace_id", {"id": "trace-0"}, "Field trace_id must be a string, got dict"),
+    ("span_id", ["span-0"], "Field span_id must be a string, got list"),
+    ("attributes", {"session.id": {"id": 1}}, "Attribute session.id must be a string, got dict"),
+    ("schema_version", "2.0", "Unsupported schema version: 2.0"),
+    ("schema_version", ["1.0"], "Unsupported schema version: ['1.0']"),
+])
+def test_batch_reports_invalid_events(processor, field, value, error):
+    """Invalid events are reported individually and the rest of the batch is stored."""
+    valid, invalid = make_events(2)
+    if value is None:
+        del invalid[field]
+    else:
+        invalid[field] = value
+
+    result = processor.process_batch([valid, invalid])
+
+    assert result["successful"] == 1
+    assert result["results"][1] == {"success": False, "error": error, "details": {}}
+
+
+def test_batch_resolves_alert_triggers_together(engine, processor):
+    """Alerts are linked to the earliest other event in their span with one lookup."""
+    alert_attributes = {
+        "security.alert_level": "dangerous", "security.category": "c", "security.severity": "high"
+    }
+    first, second, third = make_events(3)
+    second.update(name="security.content.dangerous", span_id=first["span_id"], attributes=dict(alert_attributes))
+    alert_in_own_span = dict(second, span_id=third["span_id"], attributes=dict(alert_attributes))
+    events = [first, second, alert_in_own_span, third]
+
+    with count_queries(engine) as statements:
+        result = processor.process_batch(events)
+
+    assert result["successful"] == 4
+    assert len([s for s in statements if "row_number" in s.lower()]) == 1
+
+    db = sessionmaker(bind=engine)()
+    triggers = {
+        alert.event.span_id: [trigger.triggering_event_id for trigger in alert.triggered_by]
+        for alert in db.query(SecurityAlert)
+    }
+    first_id, third_id = (
+        db.query(Event.id).filter(Event.span_id == event["span_id"], Event.name == "llm.call.start").scalar()
+        for event in (first, third)
+    )
+    assert triggers == {first["span_id"]: [first_id], third["span_id"]: [third_id]}
+    db.close()
+
+
+@pytest.mark.parametrize("factory", [lambda engine: engine, lambda engine: sessionmaker(bind=engine)])
+def test_processor_accepts_engine_or_sessionmaker(engine, factory):
+    """Processors can open sessions straight from an engine or a sessionmaker."""
+    processor = SimpleProcessor(factory(engine))
+
+    assert processor.process_event(make_events(1)[0])["success"]
+    assert processor.process_batch(make_events(3)[1:])["successful"] == 2
+
+    db = sessionmaker(bind=engine)()
+    assert db.query(Event).count() == 3
+    db.close()
+
+
+def test_batch_promotes_prefixed_attributes(engine, processor):
+    """Known attributes are copied to their columns from plain or prefixed keys."""
+    from src.models.tool_interaction import ToolInteraction
+
+    event = make_events(1)[0]
+    event["name"] = "tool.execution"
+    event["attributes"].update({"tool.name": "search", "tool.version": "2", "cache_hit": True})
+
+    assert processor.process_batch([event])["successful"] == 1
+
+    db = sessionmaker(bind=engine)()
+    tool = db.query(ToolInteraction).one()
+    assert (tool.tool_version, tool.cache_hit, tool.api_version) == ("2", True, None)
+    db.close()
+
+
+def test_large_json_batch_parsed_in_executor(engine, processor, monkeypatch):
+    """Batches over the size threshold are decoded in the given executor."""
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    import src.processing.simple_processor as processor_module
+
+    payload = dumps(make_events(4))
+    submitted = []
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            submitted.append(fn)
+            return super().submit(fn, *args, **kwargs)
+
+    with RecordingExecutor(max_workers=1) as executor:
+        result = asyncio.run(processor.process_json_batch_async(payload, executor))
+        assert result["successful"] == 4 and submitted == []
+
+        monkeypatch.setattr(processor_module, "LARGE_BATCH_BYTES", len(payload))
+        result = asyncio.run(processor.process_json_batch_async(payload.encode(), executor))
+        assert result["total"] == 4 and submitted == [loads]
+
+
+def test_batch_inserts_events_before_completing_them(engine, processor):
+    """Events are flushed together, so a span shared by the batch is widened with one UPDATE."""
+    events = make_events(6)
+    for event in events:
+        event["span_id"] = "span-shared"
+
+    with count_queries(engine) as statements:
+        result = processor.process_batch(events)
+
+    assert result["successful"] == 6
+    assert len([s for s in statements if s.startswith("UPDATE spans")]) <= 1
+
+    db = sessionmaker(bind=engine)()
+    assert [event_id for event_id, in db.query(Event.id).order_by(Event.timestamp)] == [
+        r["event_id"] for r in result["results"]
+    ]
+    db.close()
+
+
+def test_event_names_and_levels_are_interned():
+    """Events built from separately decoded JSON share one name and level string."""
+    first, second = (
+        Event(name=data["name"], level=data["level"], agent_id=data["agent_id"])
+        for data in loads(dumps(make_events(2)))
+    )
+
+    assert first.name is second.name
+    assert first.level is second.level
+
+
+def test_batch_failed_event_keeps_the_rest(engine, processor, monkeypatch):
+    """A model that fails to insert only discards its own event's savepoint."""
+    from src.models.llm_interaction import LLMInteraction
+
+    complete_event = processor._complete_event
+
+    def complete_event_without_model(event, event_data, db_session):
+        complete_event(event, event_data, db_session)
+        if event_data["span_id"] == "span-1":
+            event.llm_interaction.model = None
+
+    monkeypatch.setattr(processor, "_complete_event", complete_event_without_model)
+    result = processor.process_batch(make_events(3))
+
+    assert [r["success"] for r in result["results"]] == [True, False, True]
+    assert "NOT NULL" in result["results"][1]["error"]
+
+    db = sessionmaker(bind=engine)()
+    assert db.query(LLMInteraction.event_id).order_by(LLMInteraction.event_id).all() == [
+        (result["results"][0]["event_id"],), (result["results"][2]["event_id"],)
+    ]
+    db.close()
+
+
+def test_batch_result_dicts():
+    """Batch results convert to the success and failure dicts callers receive."""
+    from src.processing.simple_processor import EventResult
+
+    assert EventResult(True, event_id=3, event_name="llm.call.start").to_dict() == {
+        "success": True, "event_id": 3, "event_name": "llm.call.start"
+    }
+    assert EventResult.failed("boom", ValueError("boom")).to_dict() == {
+        "success": False, "error": "boom", "details": {"exception_type": "ValueError"}
+    }
+
+
+def test_later_batches_skip_known_agents(engine, processor):
+    """Agents committed by an earlier batch are neither inserted nor read again."""
+    processor.process_batch(make_events(6))
+
+    with count_queries(engine) as statements:
+        result = processor.process_batch(make_events(12)[6:])
+
+    assert result["successful"] == 6
+    assert not [s for s in statements if "agents" in s.split(" WHERE")[0]]
+
+    db = sessionmaker(bind=engine)()
+    assert db.query(Agent).count() == 3
+    assert db.query(Event).filter(Event.agent_id == "agent-0").count() == 4
+    db.close()
+
+
+def test_json_stream_processed_in_chunks(engine, processor):
+    """A streamed JSON array is stored chunk by chunk with combined results."""
+    import io
+
+    stream = io.BytesIO(dumps(make_events(5)).encode())
+    result = processor.process_json_stream(stream, chunk_size=2)
+
+    assert (result["total"], result["successful"], result["failed"]) == (5, 5, 0)
+    assert len({r["event_id"] for r in result["results"]}) == 5
+
+    db = sessionmaker(bind=engine)()
+    assert db.query(Event).count() == 5
+    db.close()
+
+
+def test_batch_spans_come_from_preload(engine, processor, monkeypatch):
+    """Events in a batch take their spans from the preload instead of looking each one up."""
+    from src.models.span import Span
+
+    def fail_get_or_create(*args, **kwargs):
+        raise AssertionError("span looked up per event")
+
+    monkeypatch.setattr(Span, "get_or_create", fail_get_or_create)
+    result = processor.process_batch(make_events(4))
+
+    assert result["successful"] == 4
+    db = sessionmaker(bind=engine)()
+    assert db.query(Span).count() == 4
+    db.close()
+
+
+def test_generator_factory_cleaned_up_after_commit(engine):
+    """A generator factory's cleanup runs once the processor is done, not when it opens the session."""
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    steps = []
+
+    def get_db():
+        db = session_factory()
+        sa_event.listen(db, "after_commit", lambda session: steps.append("commit"))
+        try:
+            yield db
+        finally:
+            steps.append("cleanup")
+
+    processor = SimpleProcessor(get_db)
+    assert processor.process_event(make_events(1)[0])["success"]
+    assert steps[-2:] == ["commit", "cleanup"] and steps.count("cleanup") == 1
+
+    del steps[:]
+    assert processor.process_batch(make_events(3)[1:])["successful"] == 2
+    assert steps[-2:] == ["commit", "cleanup"] and steps.count("cleanup") == 1
+
+
+def test_new_spans_inserted_with_their_time_range(engine, processor):
+    """Spans created for a batch are inserted covering their events and never updated."""
+    from src.models.span import Span
+
+    events = make_events(4)
+    for event in events:
+        event["span_id"] = "span-%d" % (int(event["span_id"][5:]) % 2)
+        event["trace_id"] = "trace-0"
+
+    with count_queries(engine) as statements:
+        assert processor.process_batch(events)["successful"] == 4
+
+    assert not [s for s in statements if s.startswith("UPDATE spans")]
+    db = sessionmaker(bind=engine)()
+    assert {span.span_id: (span.start_timestamp.second, span.end_timestamp.second) for span in db.query(Span)} == {
+        "span-0": (0, 2), "span-1": (1, 3)
+    }
+    db.close()
+
+
+def test_tool_result_does_not_load_its_interaction(engine, processor):
+    """A tool result merged into its execution's interaction never lazy-loads its own."""
+    execution, tool_result = make_events(2)
+    for event, name in ((execution, "tool.execution"), (tool_result, "tool.result")):
+        event.update(name=name, span_id="span-tool", trace_id="trace-0")
+        event["attributes"]["tool.name"] = "search"
+
+    with count_queries(engine) as statements:
+        result = processor.process_batch([execution, tool_result])
+
+    assert result["successful"] == 2
+    tool_selects = [s for s in statements if s.startswith("SELECT") and "FROM tool_interactions" in s]
+    assert len(tool_selects) == 1
+
+
+def test_batch_links_earlier_alerts_together(engine, processor):
+    """Alerts stored before their span's events are linked to the first of them in one pass."""
+    alert, first, second = make_events(3)
+    alert.update(name="security.content.dangerous", attributes={
+        "security.alert_level": "dangerous", "security.category": "c", "security.severity": "high"
+    })
+    assert processor.process_batch([alert])["successful"] == 1
+
+    first["span_id"] = second["span_id"] = alert["span_id"]
+    with count_queries(engine) as statements:
+        result = processor.process_batch([first, second])
+
+    assert result["successful"] == 2
+    # One lookup by span, and one for the content match the second event falls back to
+    assert len([s for s in statements if s.startswith("SELECT") and "FROM security_alerts" in s]) == 2
+
+    db = sessionmaker(bind=engine)()
+    assert [trigger.triggering_event_id for trigger in db.query(SecurityAlert).one().triggered_by] == [
+        result["results"][0]["event_id"]
+    ]
+    db.close()
+
+
+def test_json_batches_pipelined(engine, processor):
+    """Several JSON batches are stored in order with a result per payload."""
+    import asyncio
+    from src.processing.simple_processor import ProcessingError
+
+    events = make_events(6)
+    payloads = [dumps(events[:2]), dumps(events[2:4]).encode(), dumps(events[4])]
+    results = asyncio.run(processor.process_json_batches_async(payloads))
+
+    assert [result.get("total", 1) for result in results] == [2, 2, 1]
+    with pytest.raises(ProcessingError, match="Invalid JSON"):
+        asyncio.run(processor.process_json_batches_async([dumps(events[5:]), "[{"]))
+
+    db = sessionmaker(bind=engine)()
+    assert [span_id for span_id, in db.query(Event.span_id).order_by(Event.id)] == [
+        event["span_id"] for event in events
+    ]
+    db.close()
+
+
+@pytest.mark.parametrize("alert_attributes, event_attributes, matches", [
+    ({"security.description": "Suspicious content in prompt"}, {"prompt": "a Dangerous request"}, True),
+    ({"security.description": "Harmful content"}, {"prompt": "hello"}, False),
+    ({"security.category": "HACK"}, {"note": "breachack"}, True),
+    ({"security.category": "exploit"}, {"note": "attack"}, False),
+])
+def test_security_content_comparison(alert_attributes, event_attributes, matches):
+    """Alert and event content match on shared suspicious words or harmful prompts."""
+    from types import SimpleNamespace
+
+    event = SimpleNamespace(event_type="llm", llm_interaction=SimpleNamespace(raw_attributes=event_attributes))
+    alert_content = _security_content(alert_attributes)
+    assert SimpleProcessor(lambda: None)._security_contents_match(
+        alert_content, _event_security_content(event)
+    ) is matches
+
+
+def test_content_match_candidates_load_interactions_together(engine, processor):
+    """Recent LLM events compared against an alert come with their interactions."""
+    events = make_events(3)
+    for event in events:
+        event["agent_id"] = "agent-0"
+    processor.process_batch(events)
+    alert = dict(
+        events[0], name="security.content.suspicious", span_id="span-alert", timestamp="2024-01-01T00:01:00Z",
+        attributes={"security.alert_level": "suspicious", "security.description": "Suspicious content in prompt"}
+    )
+
+    with count_queries(engine) as statements:
+        result = processor.process_batch([alert])
+
+    assert result["successful"] == 1
+    assert not [s for s in statements if s.startswith("SELECT llm_interactions")]
+
+
+def test_standalone_process_event_reports_first_missing_field():
+    """The standalone process_event reports the first missing required field."""
+    from src.processing.simple_processor import process_event
+
+    event = make_events(1)[0]
+    del event["level"], event["trace_id"]
+    with pytest.raises(ValueError, match="^Missing required field: level$"):
+        process_event(event, None)
+
+
+def test_alert_content_rendered_once_per_batch(engine, processor, monkeypatch):
+    """An earlier alert compared against several events has its content rendered once."""
+    from src.processing import simple_processor
+
+    alert, *events = make_events(4)
+    alert.update(name="security.content.dangerous", attributes={
+        "security.alert_level": "dangerous", "security.category": "c", "security.severity": "high"
+    })
+    for event in events:
+        event["agent_id"] = alert["agent_id"]
+    assert processor.process_batch([alert])["successful"] == 1
+
+    rendered = []
+    security_content = simple_processor._security_content
+
+    def recording_security_content(raw_attributes):
+        rendered.append(raw_attributes)
+        return security_content(raw_attributes)
+
+    monkeypatch.setattr(simple_processor, "_security_content", recording_security_content)
+    assert processor.process_batch(events)["successful"] == 3
+
+    # Each event is rendered for the comparison, the alert only once
+    assert len(rendered) == 4
+    assert len([attributes for attributes in rendered if "security.alert_level" in attributes]) == 1
+
+
+def test_triggered_alerts_not_linked_again(engine, processor):
+    """Alerts that already have a trigger are skipped by later events in their span."""
+    alert, first, second = make_events(3)
+    alert.update(name="security.content.dangerous", attributes={
+        "security.alert_level": "dangerous", "security.category": "c", "security.severity": "high"
+    })
+    first["span_id"] = second["span_id"] = alert["span_id"]
+    assert processor.process_batch([alert])["successful"] == 1
+    first_id = processor.process_batch([first])["results"][0]["event_id"]
+
+    with count_queries(engine) as statements:
+        assert processor.process_batch([second])["successful"] == 1
+
+    assert any("NOT (EXISTS" in s for s in statements)
+    db = sessionmaker(bind=engine)()
+    assert [trigger.triggering_event_id for trigger in db.query(SecurityAlert).one().triggered_by] == [first_id]
+    db.close()
+
+
+def test_batch_reports_non_object_elements(processor):
+    """Batch elements that are not JSON objects fail on their own."""
+    valid = make_events(1)[0]
+
+    result = processor.process_batch([valid, "oops", 5])
+
+    assert result["successful"] == 1
+    assert [entry.get("error") for entry in result["results"][1:]] == [
+        "Event must be a JSON object, got str", "Event must be a JSON object, got int"
+    ]
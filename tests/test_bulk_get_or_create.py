@@ -0,0 +1,97 @@
+"""
+Tests for the batched get-or-create helpers on Span and Session.
+"""
+import pytest
+from datetime import datetime
+
+from src.models.agent import Agent
+from src.models.trace import Trace
+from src.models.span import Span
+from src.models.session import Session as SessionModel
+
+
+@pytest.fixture
+def session(session_factory):
+    """Create an in-memory database with an agent and a trace."""
+    db = session_factory()
+    now = datetime.utcnow()
+    db.add(Agent(agent_id="agent-1", name="agent-1", first_seen=now, last_seen=now))
+    db.add(Trace(trace_id="trace-1", agent_id="agent-1"))
+    db.commit()
+
+    yield db
+
+    db.close()
+
+
+def test_span_bulk_get_or_create_resolves_roots(session):
+    """Spans are created once and inherit the root of parents earlier in the batch."""
+    session.add(Span(span_id="existing", trace_id="trace-1", root_span_id="existing"))
+    session.commit()
+
+    spans = Span.bulk_get_or_create(session, [
+        {"span_id": "root", "trace_id": "trace-1", "event_name": "llm.call.start"},
+        {"span_id": "child", "trace_id": "trace-1", "parent_span_id": "root"},
+        {"span_id": "child", "trace_id": "trace-1", "parent_span_id": "other"},
+        {"span_id": "under-existing", "trace_id": "trace-1", "parent_span_id": "existing"},
+        {"span_id": "orphan", "trace_id": "trace-1", "parent_span_id": "missing"},
+        {"span_id": "existing", "trace_id": "trace-1", "event_name": "tool.execution"},
+    ])
+
+    assert set(spans) == {"root", "child", "under-existing", "orphan", "existing"}
+    assert spans["root"].root_span_id == "root"
+    assert spans["root"].name == Span._derive_span_name_from_event("llm.call.start")
+    assert spans["child"].parent_span_id == "root"
+    assert spans["child"].root_span_id == "root"
+    assert spans["under-existing"].root_span_id == "existing"
+    assert spans["orphan"].root_span_id == "missing"
+    assert spans["existing"].name == Span._derive_span_name_from_event("tool.execution")
+
+    # Loaded spans come from the identity map without another query
+    assert Span.get_or_create(session, "child", "trace-1") is spans["child"]
+
+
+def test_span_get_or_create_loads_parent_with_span(session, assert_max_queries):
+    """A new span and its parent are looked up with a single query."""
+    session.add(Span(span_id="parent", trace_id="trace-1", root_span_id="root"))
+    session.commit()
+    session.expunge_all()
+
+    with assert_max_queries(session.get_bind(), 1):
+        span = Span.get_or_create(session, "child", "trace-1", parent_span_id="parent")
+
+    assert span.root_span_id == "root"
+
+
+def test_span_get_or_create_uses_root_cache(session):
+    """Children of a span created earlier in the session resolve their root without loading it."""
+    Span.get_or_create(session, "parent", "trace-1", parent_span_id="root")
+    session.commit()
+    session.expunge_all()
+
+    span = Span.get_or_create(session, "child", "trace-1", parent_span_id="parent")
+
+    assert span.root_span_id == "root"
+    assert len(session.identity_map) == 0
+
+
+def test_session_bulk_get_or_create_keeps_existing(session):
+    """Existing sessions are returned untouched and new ones are inserted once."""
+    session.add(SessionModel(session_id="sess-1", agent_id="agent-1", start_timestamp=datetime(2024, 1, 1)))
+    session.commit()
+
+    sessions = SessionModel.bulk_get_or_create(session, [
+        {"session_id": "sess-1", "agent_id": "agent-1"},
+        {"session_id": "sess-2", "agent_id": "agent-1"},
+        {"session_id": "sess-2", "agent_id": "agent-1"},
+    ])
+
+    assert set(sessions) == {"sess-1", "sess-2"}
+    assert sessions["sess-1"].start_timestamp == datetime(2024, 1, 1)
+    assert session.query(SessionModel).count() == 2
+
+
+def test_bulk_get_or_create_empty(session):
+    """Empty input issues no queries and returns an empty mapping."""
+    assert Span.bulk_get_or_create(session, []) == {}
+    assert SessionModel.bulk_get_or_create(session, []) == {}
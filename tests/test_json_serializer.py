@@ -0,0 +1,48 @@
+"""
+Tests for the shared JSON serializer.
+"""
+import json
+import math
+from datetime import datetime, date
+
+import pytest
+
+from src.utils.json_serializer import dumps, loads
+
+
+def test_dumps_round_trips_with_dates():
+    """Dates and datetimes are written as ISO strings and other values round trip."""
+    payload = {"at": datetime(2024, 1, 2, 3, 4, 5), "on": date(2024, 1, 2), "items": [1, 1.5, None, "x"]}
+
+    assert json.loads(dumps(payload)) == {
+        "at": "2024-01-02T03:04:05", "on": "2024-01-02", "items": [1, 1.5, None, "x"]
+    }
+
+
+def test_dumps_falls_back_for_unsupported_input():
+    """Inputs orjson rejects and extra arguments use the standard encoder."""
+    assert dumps({1: "a", "b": [1, 2]}) == '{"1":"a","b":[1,2]}'
+    assert dumps({"a": 1}, indent=2) == json.dumps({"a": 1}, indent=2)
+
+
+def test_dumps_keeps_non_finite_floats():
+    """NaN and Infinity are written as the standard encoder does, not as null."""
+    payload = {"x": float("nan"), "y": [math.inf, None], "z": (1.5, -math.inf)}
+
+    assert dumps(payload) == json.dumps(payload, separators=(",", ":"))
+    assert dumps({"x": None}) == '{"x":null}'
+
+
+def test_loads_accepts_str_and_bytes():
+    """Both text and bytes documents are parsed."""
+    assert loads('{"a": [1, 2]}') == {"a": [1, 2]}
+    assert loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+def test_loads_constants_and_malformed_input():
+    """NaN literals still parse and malformed documents raise JSONDecodeError."""
+    assert math.isnan(loads('{"a": NaN}')["a"])
+    assert loads(b"[Infinity]") == [math.inf]
+    for document in ('{"a": ', b"[1,]"):
+        with pytest.raises(json.JSONDecodeError):
+            loads(document)
@@ -6,9 +6,11 @@ for the new OpenTelemetry-compliant security events format.
 """
 import pytest
 from datetime import datetime
+from sqlalchemy import text
 from sqlalchemy.inspection import inspect
 
-from src.models.security_alert import SecurityAlert
+from src.models.security_alert import SecurityAlert, AlertSeverity, AlertStatus, normalize_severity
+from src.models.agent import Agent
 from src.models.event import Event
 from src.database.session import get_db
 
@@ -77,5 +79,60 @@ def test_security_alert_not_null_constraints():
         assert not nullable_info[field], f"Field '{field}' should be NOT NULL"
 
 
+def test_security_alert_enum_columns():
+    """Test that severity and status are constrained to their enum values."""
+    mapper = inspect(SecurityAlert)
+    severity_type = mapper.columns['severity'].type
+    status_type = mapper.columns['status'].type
+    
+    assert list(severity_type.enums) == [member.value for member in AlertSeverity]
+    assert list(status_type.enums) == [member.value for member in AlertStatus]
+    
+    # Members compare equal to the plain strings stored before the change
+    assert AlertSeverity.HIGH == "high"
+    assert str(AlertStatus.OPEN) == "OPEN"
+
+
+
+@pytest.mark.parametrize("reported, severity", [
+    ("HIGH", AlertSeverity.HIGH),
+    ("warning", AlertSeverity.MEDIUM),
+    ("error", AlertSeverity.HIGH),
+    ("severe", AlertSeverity.HIGH),
+    ("info", AlertSeverity.LOW),
+    ("no-such-severity", AlertSeverity.HIGH),
+])
+def test_reported_severity_normalized(reported, severity, caplog):
+    """Known severities and aliases map onto the enum; others are logged and stored as high."""
+    with caplog.at_level("WARNING", logger="src.models.security_alert"):
+        assert normalize_severity(reported) is severity
+    assert ("Unrecognized security alert severity" in caplog.text) == (reported == "no-such-severity")
+
+
+def test_legacy_enum_values_load(session_factory):
+    """Severities and statuses stored before the enums were added load normalized."""
+    db = session_factory()
+    now = datetime.utcnow()
+    db.add(Agent(agent_id="agent-1", name="agent-1", first_seen=now, last_seen=now))
+    for event_id in (1, 2, 3):
+        db.add(Event(id=event_id, name="security.alert", timestamp=now, level="WARNING", agent_id="agent-1", event_type="security"))
+    db.commit()
+    for event_id, severity, status in [(1, "moderate", "open"), (2, "MEDIUM", "RESOLVED"), (3, "bogus", None)]:
+        db.execute(text(
+            "INSERT INTO security_alerts (event_id, schema_version, timestamp, alert_level, category, severity, description, status) "
+            "VALUES (:event_id, '1.0', :now, 'suspicious', 'test', :severity, 'd', :status)"
+        ), {"event_id": event_id, "now": now, "severity": severity, "status": status})
+    db.commit()
+
+    alerts = db.query(SecurityAlert).order_by(SecurityAlert.event_id).all()
+    assert [(alert.severity, alert.status) for alert in alerts] == [
+        (AlertSeverity.MEDIUM, AlertStatus.OPEN),
+        (AlertSeverity.MEDIUM, AlertStatus.RESOLVED),
+        (AlertSeverity.HIGH, None),
+    ]
+    assert db.query(SecurityAlert).filter(SecurityAlert.severity == AlertSeverity.HIGH).count() == 0
+    db.close()
+
+
 if __name__ == "__main__":
     pytest.main(["-xvs", __file__]) 
\ No newline at end of file
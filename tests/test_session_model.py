@@ -0,0 +1,133 @@
+"""
+Tests for Session model statistics.
+"""
+import gc
+
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.models.base import Base
+from src.models.agent import Agent
+from src.models.trace import Trace
+from src.models.event import Event
+from src.models import session as session_module
+from src.models.session import Session as SessionModel, clear_statistics_cache
+
+
+@pytest.fixture
+def session(session_factory):
+    """Create a session with two sessions and events spread over two traces."""
+    clear_statistics_cache()
+    db = session_factory()
+    now = datetime.utcnow()
+    db.add(Agent(agent_id="agent-1", name="agent-1", first_seen=now, last_seen=now))
+    db.add_all([
+        Trace(trace_id="trace-1", agent_id="agent-1"),
+        Trace(trace_id="trace-2", agent_id="agent-1"),
+        SessionModel(session_id="sess-1", agent_id="agent-1", start_timestamp=now),
+        SessionModel(session_id="sess-2", agent_id="agent-1", start_timestamp=now),
+    ])
+    for event_type, trace_id, session_id in [
+        ("llm", "trace-1", "sess-1"),
+        ("llm", "trace-2", "sess-1"),
+        ("tool", "trace-1", "sess-1"),
+        ("tool", None, "sess-1"),
+        ("llm", "trace-2", "sess-2"),
+    ]:
+        db.add(Event(
+            name=f"{event_type}.call", timestamp=now, level="INFO", agent_id="agent-1",
+            trace_id=trace_id, session_id=session_id, event_type=event_type
+        ))
+    db.commit()
+
+    yield db
+
+    db.close()
+
+
+def test_get_statistics_single_query(engine, session, assert_max_queries):
+    """Statistics are computed from one statement and scoped to the session."""
+    sess = session.query(SessionModel).filter_by(session_id="sess-1").one()
+
+    with assert_max_queries(engine, 1):
+        stats = sess.get_statistics(session)
+
+    assert stats["event_count"] == 4
+    assert stats["event_types"] == {"llm": 2, "tool": 2}
+    assert stats["trace_count"] == 2
+
+
+def test_get_statistics_empty_session(session):
+    """A session without events reports zero counts."""
+    now = datetime.utcnow()
+    empty = SessionModel(session_id="sess-3", agent_id="agent-1", start_timestamp=now)
+    session.add(empty)
+    session.commit()
+
+    stats = empty.get_statistics(session)
+
+    assert stats["event_count"] == 0
+    assert stats["event_types"] == {}
+    assert stats["trace_count"] == 0
+
+
+def test_get_statistics_cached(engine, session, assert_max_queries):
+    """Repeated calls are served from the cache until the session changes."""
+    sess = session.query(SessionModel).filter_by(session_id="sess-2").one()
+    first = sess.get_statistics(session)
+
+    with assert_max_queries(engine, 0):
+        assert sess.get_statistics(session) == first
+
+    # Ending the session changes end_timestamp and drops the cached entry
+    with assert_max_queries(engine, 1):
+        sess.end_session(session, datetime(2030, 1, 1))
+        assert sess.get_statistics(session)["end_timestamp"] == datetime(2030, 1, 1)
+
+
+def test_statistics_cache_scoped_to_engine(session):
+    """Cached counts belong to their engine and are released with it."""
+    sess = session.query(SessionModel).filter_by(session_id="sess-1").one()
+    assert sess.get_statistics(session)["event_count"] == 4
+
+    other = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(other)
+    other_db = sessionmaker(bind=other)()
+    now = sess.start_timestamp
+    other_db.add(Agent(agent_id="agent-1", name="agent-1", first_seen=now, last_seen=now))
+    other_db.add(SessionModel(session_id="sess-1", agent_id="agent-1", start_timestamp=now))
+    other_db.commit()
+    other_sess = other_db.query(SessionModel).filter_by(session_id="sess-1").one()
+
+    assert other_sess.get_statistics(other_db)["event_count"] == 0
+    assert len(session_module._STATS_CACHE) == 2
+
+    other_db.close()
+    other.dispose()
+    del other, other_db, other_sess
+    gc.collect()
+    assert len(session_module._STATS_CACHE) == 1
+
+
+def test_event_helpers_filter_by_session_id(engine, session, assert_max_queries):
+    """Event lookups match on the session_id string."""
+    sess = session.query(SessionModel).filter_by(session_id="sess-1").one()
+
+    assert sess.get_event_count(session) == 4
+    assert len(sess.get_events_by_type(session, "tool")) == 2
+    with assert_max_queries(engine, 1):
+        traces = sess.get_traces(session)
+    assert sorted(trace.trace_id for trace in traces) == ["trace-1", "trace-2"]
+
+
+def test_get_events_by_type_iter_streams_in_order(session):
+    """The iterator yields the same events as the list helper, in timestamp order."""
+    sess = session.query(SessionModel).filter_by(session_id="sess-1").one()
+
+    events = list(sess.get_events_by_type_iter(session, "tool", chunk=1))
+
+    assert [event.id for event in events] == [event.id for event in sess.get_events_by_type(session, "tool")]
+    assert [event.timestamp for event in events] == sorted(event.timestamp for event in events)
@@ -105,7 +105,7 @@ class TestSimpleProcessor:
         mock_span.span_id = sample_event_data["span_id"]
         
         with patch('models.span.Span.get_or_create', return_value=mock_span):
-            event, related_models = processor._transform_event(sample_event_data, session)
+            event = processor._transform_event(sample_event_data, session)
             
             assert isinstance(event, Event)
             assert event.name == sample_event_data["name"]
@@ -117,14 +117,10 @@ class TestSimpleProcessor:
             assert event.schema_version == sample_event_data["schema_version"]
             assert event.event_type == "generic"
             
-            # Check that agent is in related models
-            assert any(hasattr(model, 'agent_id') and model.agent_id == sample_event_data["agent_id"] for model in related_models)
-            
-            # Check that trace is in related models
-            assert any(hasattr(model, 'trace_id') and model.trace_id == sample_event_data["trace_id"] for model in related_models)
-            
-            # Check that span is in related models
-            assert any(hasattr(model, 'span_id') and model.span_id == sample_event_data["span_id"] for model in related_models)
+            # Check that the agent, trace and span are attached to the event
+            assert event.agent.agent_id == sample_event_data["agent_id"]
+            assert event.trace.trace_id == sample_event_data["trace_id"]
+            assert event.span is mock_span
     
     def test_transform_event_llm(self, processor, sample_llm_event_data, db_session_factory):
         """Test transforming an LLM event."""
@@ -140,17 +136,14 @@ class TestSimpleProcessor:
             mock_llm_interaction = MagicMock()
             mock_from_event.return_value = mock_llm_interaction
             
-            event, related_models = processor._transform_event(sample_llm_event_data, session)
+            event = processor._transform_event(sample_llm_event_data, session)
             
             assert isinstance(event, Event)
             assert event.name == sample_llm_event_data["name"]
             assert event.event_type == "llm"
             
-            # Check that LLMInteraction.from_event was called
-            mock_from_event.assert_called_once()
-            
-            # Check that the LLM interaction is in related models
-            assert mock_llm_interaction in related_models
+            # Check that LLMInteraction.from_event was called for the event
+            mock_from_event.assert_called_once_with(session, event, sample_llm_event_data)
     
     def test_process_json_event(self, processor, sample_event_data):
         """Test processing an event from JSON."""
@@ -189,7 +182,7 @@ class TestSimpleProcessor:
         
         # Mock _transform_event to return a test event
         with patch.object(processor, '_transform_event') as mock_transform:
-            mock_transform.return_value = (mock_event, [])
+            mock_transform.return_value = mock_event
             
             events_data = [sample_event_data, sample_event_data]
             result = processor.process_batch(events_data)
@@ -249,7 +242,7 @@ class TestSimpleProcessor:
         
         # Mock _transform_event to return a test event
         with patch.object(processor, '_transform_event') as mock_transform:
-            mock_transform.return_value = (mock_event, [])
+            mock_transform.return_value = mock_event
             
             result = processor.process_event(sample_event_data)
             
@@ -273,7 +266,7 @@ class TestSimpleProcessor:
         
         # Mock _transform_event to return a test event
         with patch.object(processor, '_transform_event') as mock_transform:
-            mock_transform.return_value = (MagicMock(), [])
+            mock_transform.return_value = MagicMock()
             
             result = processor.process_event(sample_event_data)
             
@@ -0,0 +1,142 @@
+"""
+Tests for the span tree and span statistics queries.
+"""
+import pytest
+from datetime import datetime
+
+from src.models.agent import Agent
+from src.models.trace import Trace
+from src.models.span import Span
+from src.models.event import Event
+
+
+@pytest.fixture
+def session(session_factory):
+    """Create a session holding a small span tree.
+
+    r -> c1 -> g1
+      -> c2
+    """
+    db = session_factory()
+    now = datetime.utcnow()
+    db.add(Agent(agent_id="agent-1", name="agent-1", first_seen=now, last_seen=now))
+    db.add(Trace(trace_id="trace-1", agent_id="agent-1"))
+    for span_id, parent_span_id in [("r", None), ("c1", "r"), ("c2", "r"), ("g1", "c1"), ("other", None)]:
+        db.add(Span(span_id=span_id, trace_id="trace-1", parent_span_id=parent_span_id))
+    for second, span_id in [(1, "c1"), (2, "c1"), (3, "g1")]:
+        db.add(Event(
+            name="llm.call.start", timestamp=datetime(2024, 1, 1, 0, 0, second), level="INFO",
+            agent_id="agent-1", trace_id="trace-1", span_id=span_id, event_type="llm"
+        ))
+    db.commit()
+
+    yield db
+
+    db.close()
+
+
+def test_get_span_tree_single_query(engine, session, assert_max_queries):
+    """The whole subtree is fetched with one query regardless of depth."""
+    root = session.get(Span, "r")
+
+    with assert_max_queries(engine, 1):
+        tree = root.get_span_tree(session)
+
+    assert sorted(span.span_id for span in tree) == ["c1", "c2", "g1", "r"]
+
+
+def test_get_all_descendants_of_subtree(session):
+    """Descendants of an inner span exclude the span itself and its ancestors."""
+    span = session.get(Span, "c1")
+    assert [child.span_id for child in span.get_all_descendants(session)] == ["g1"]
+    assert session.get(Span, "g1").get_all_descendants(session) == []
+
+
+def test_get_all_descendants_orders_by_level(session):
+    """Parents come before their children even when the children started earlier."""
+    for span_id, second in [("c1", 5), ("c2", None), ("g1", 1)]:
+        session.get(Span, span_id).start_timestamp = second and datetime(2024, 1, 1, 0, 0, second)
+    session.commit()
+
+    root = session.get(Span, "r")
+    assert [span.span_id for span in root.get_all_descendants(session)] == ["c1", "c2", "g1"]
+
+
+def test_get_all_descendants_stops_on_cycles(session):
+    """Cyclic parent links end the walk with each span listed once."""
+    session.get(Span, "other").parent_span_id = "g1"
+    session.get(Span, "r").parent_span_id = "other"
+    session.commit()
+
+    root = session.get(Span, "r")
+    assert [span.span_id for span in root.get_all_descendants(session)] == ["c1", "c2", "g1", "other"]
+
+
+def test_load_full_trace_without_per_span_queries(engine, session, assert_max_queries):
+    """Walking a fully loaded trace issues no further queries."""
+    session.expunge_all()
+
+    with assert_max_queries(engine, 3):
+        trace = Trace.load_full(session, "trace-1")
+
+    with assert_max_queries(engine, 0):
+        children_by_parent = Span.group_by_parent(trace.spans)
+        spans = {span.span_id: span for span in trace.spans}
+        assert sorted(s.span_id for s in spans["r"].get_child_spans(session, children_by_parent)) == ["c1", "c2"]
+        assert [s.span_id for s in spans["c1"].get_sibling_spans(session, children_by_parent)] == ["c2"]
+        assert [s.span_id for s in spans["r"].get_sibling_spans(session, children_by_parent)] == ["other"]
+        assert spans["c1"].get_event_count(session) == 2
+        assert spans["c2"].get_event_count(session) == 0
+        assert spans["c1"].get_first_event_timestamp(session) == datetime(2024, 1, 1, 0, 0, 1)
+        assert spans["c1"].get_last_event_timestamp(session) == datetime(2024, 1, 1, 0, 0, 2)
+        assert spans["c2"].get_last_event_timestamp(session) is None
+
+
+def test_update_timestamps_on_expired_span(engine, session, assert_max_queries):
+    """An expired span is widened by one conditional UPDATE without reloading it."""
+    span = session.get(Span, "c1")
+    span.update_timestamps(session, datetime(2024, 1, 1, 0, 0, 5), datetime(2024, 1, 1, 0, 0, 5))
+    session.commit()
+
+    with assert_max_queries(engine, 2) as statements:
+        span.update_timestamps(session, datetime(2024, 1, 1, 0, 0, 9), datetime(2024, 1, 1, 0, 0, 9))
+        span.update_timestamps(session, start_time=datetime(2024, 1, 1, 0, 0, 1))
+
+    assert all(statement.startswith("UPDATE") for statement in statements)
+
+    assert span.start_timestamp == datetime(2024, 1, 1, 0, 0, 1)
+    assert span.end_timestamp == datetime(2024, 1, 1, 0, 0, 9)
+
+
+def test_update_timestamps_from_events_single_statement(engine, session, assert_max_queries):
+    """Each span is widened from its events' MIN/MAX with one statement."""
+    c1 = session.get(Span, "c1")
+    c2 = session.get(Span, "c2")
+    session.commit()
+
+    with assert_max_queries(engine, 2) as statements:
+        c1.update_timestamps_from_events(session)
+        c2.update_timestamps_from_events(session)
+
+    assert all(statement.startswith("UPDATE") for statement in statements)
+    assert c1.start_timestamp == datetime(2024, 1, 1, 0, 0, 1)
+    assert c1.end_timestamp == datetime(2024, 1, 1, 0, 0, 2)
+    assert c2.start_timestamp is None
+    assert c2.end_timestamp is None
+
+
+def test_span_identifiers_are_interned(session):
+    """Spans built or loaded with the same IDs share one string object."""
+    trace_id = "".join(["trace", "-1"])
+    built = Span(span_id="new", trace_id=trace_id)
+    session.expunge_all()
+    loaded = session.get(Span, "c1")
+
+    assert built.trace_id is loaded.trace_id
+    assert loaded not in session.dirty
+
+
+@pytest.mark.parametrize("span_id, name", [("c1", "llm.call"), ("c2", None)])
+def test_span_name_from_first_event(session, span_id, name):
+    """Spans are named after their first event without its boundary suffix."""
+    assert Span._get_span_name_from_events(session, span_id) == name
@@ -0,0 +1,47 @@
+"""
+Tests for ISO 8601 timestamp parsing.
+"""
+import pytest
+from datetime import datetime, timezone
+
+from src.utils import timestamps
+from src.utils.timestamps import parse_iso_timestamp
+
+
+def test_parse_utc_suffix():
+    """A trailing 'Z' yields a UTC-aware datetime."""
+    assert parse_iso_timestamp("2024-01-02T03:04:05.123456Z") == datetime(
+        2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc
+    )
+
+
+def test_zulu_fallback():
+    """The pre-3.11 fallback rewrites only a trailing 'Z'."""
+    assert timestamps._parse_zulu("2024-01-02T03:04:05Z") == datetime(
+        2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc
+    )
+    assert timestamps._parse_zulu("2024-01-02T03:04:05") == datetime(2024, 1, 2, 3, 4, 5)
+
+
+def test_parse_naive_and_offset():
+    """Strings without an offset stay naive and offsets are preserved."""
+    assert parse_iso_timestamp("2024-01-02T03:04:05") == datetime(2024, 1, 2, 3, 4, 5)
+    parsed = parse_iso_timestamp("2024-01-02T03:04:05+02:00")
+    assert parsed.utcoffset().total_seconds() == 7200
+
+
+def test_parse_invalid():
+    """Invalid strings raise ValueError like datetime.fromisoformat."""
+    with pytest.raises(ValueError):
+        parse_iso_timestamp("not a timestamp")
+
+
+def test_validated_event_timestamps_are_naive():
+    """Validation stores event timestamps as naive datetimes, dropping any offset."""
+    from src.processing.simple_processor import SimpleProcessor
+
+    processor = SimpleProcessor(lambda: None)
+    for value in ("2024-01-02T03:04:05Z", "2024-01-02T03:04:05+02:00", "2024-01-02T03:04:05"):
+        event_data = {"timestamp": value, "name": "llm.call.start", "level": "INFO", "agent_id": "a"}
+        assert processor._validate_event(event_data) == {"valid": True}
+        assert event_data["timestamp"] == datetime(2024, 1, 2, 3, 4, 5)
@@ -0,0 +1,195 @@
+"""
+Tests for ToolInteraction payload storage.
+"""
+import pytest
+from datetime import datetime
+from sqlalchemy import text
+
+from src.models.agent import Agent
+from src.models.event import Event
+from src.models.tool_interaction import ToolInteraction
+
+
+@pytest.fixture
+def session(session_factory):
+    """Create an in-memory database holding one tool event."""
+    db = session_factory()
+    now = datetime.utcnow()
+    db.add(Agent(agent_id="agent-1", name="agent-1", first_seen=now, last_seen=now))
+    db.add(Event(id=1, name="tool.execution", timestamp=now, level="INFO", agent_id="agent-1", event_type="tool"))
+    db.commit()
+
+    yield db
+
+    db.close()
+
+
+def test_parameters_and_result_round_trip(session):
+    """Dicts and lists are stored as JSON and read back as Python values."""
+    session.add(ToolInteraction(
+        event_id=1, tool_name="search", parameters={"q": "x"}, result=[1, {"ok": True}]
+    ))
+    session.commit()
+    session.expire_all()
+
+    tool = session.query(ToolInteraction).one()
+    assert tool.parameters == {"q": "x"}
+    assert tool.result == [1, {"ok": True}]
+    assert tool.get_parameters_dict() == {"q": "x"}
+    assert tool.get_result_dict() == [1, {"ok": True}]
+
+
+def test_legacy_plain_string_rows(session):
+    """Rows holding non-JSON text from before the column type change still load."""
+    session.execute(text(
+        "INSERT INTO tool_interactions (event_id, tool_name, parameters, result) "
+        "VALUES (1, 'search', '{\"q\": \"x\"}', 'plain text')"
+    ))
+    session.commit()
+
+    tool = session.query(ToolInteraction).one()
+    assert tool.parameters == {"q": "x"}
+    assert tool.result == "plain text"
+    assert tool.get_result_dict() is None
+
+
+def test_pre_serialized_values_decoded_once(session, monkeypatch):
+    """JSON held as a string is decoded on first access and memoized."""
+    import src.models.tool_interaction as tool_module
+
+    tool = ToolInteraction(event_id=1, tool_name="search", parameters='{"q": "x"}', result="plain text")
+    calls = []
+    real_loads = tool_module._loads
+    monkeypatch.setattr(tool_module, "_loads", lambda value: calls.append(value) or real_loads(value))
+
+    assert tool.get_parameters_dict() == {"q": "x"}
+    assert tool.get_parameters_dict() == {"q": "x"}
+    assert tool.get_result_dict() is None
+    assert len(calls) == 2
+
+    tool.parameters = '{"q": "y"}'
+    assert tool.get_parameters_dict() == {"q": "y"}
+
+
+def test_pre_serialized_payloads_not_double_encoded(session):
+    """JSON strings are stored as is while plain strings are still encoded."""
+    session.add(ToolInteraction(
+        event_id=1, tool_name="search", parameters='{"q": "x"}', result="42"
+    ))
+    session.commit()
+
+    raw = session.execute(text("SELECT parameters, result FROM tool_interactions")).one()
+    assert raw == ('{"q": "x"}', '"42"')
+
+    session.expire_all()
+    tool = session.query(ToolInteraction).one()
+    assert tool.parameters == {"q": "x"}
+    assert tool.result == "42"
+
+
+def test_extract_metadata_precedence():
+    """Flat keys win over tool.-prefixed keys, which win over the nested tool dict."""
+    from src.models.tool_interaction import _extract_metadata
+
+    metadata = _extract_metadata(
+        {"tool_version": "1", "tool.version": "2", "tool.status_code": 404, "framework": "lc"},
+        {"version": "3", "status_code": 500, "cache_hit": False},
+    )
+
+    assert metadata["tool_version"] == "1"
+    assert metadata["status_code"] == 404
+    assert metadata["framework_name"] == "lc"
+    assert metadata["cache_hit"] is False
+    assert metadata["api_version"] is None
+
+
+def test_tool_status_window_uses_composite_index(session):
+    """Filtering by tool and status over a time window is answered from the composite index."""
+    plan = session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM tool_interactions "
+        "WHERE tool_name = 'search' AND status = 'error' AND request_timestamp > '2024-01-01' "
+        "ORDER BY request_timestamp"
+    )).all()
+
+    details = " ".join(row[-1] for row in plan)
+    assert "ix_tool_interactions_name_status_ts" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_strip_promoted_attributes():
+    """Keys stored in metadata columns are dropped from raw attributes unless they differ."""
+    attributes = {
+        "tool.name": "search", "tool_version": "1", "tool.version": "2",
+        "cache_hit": False, "api_version": None, "custom": "x",
+    }
+
+    assert ToolInteraction.strip_promoted_attributes(attributes) == {
+        "tool.name": "search", "tool.version": "2", "cache_hit": False, "api_version": None, "custom": "x",
+    }
+    assert ToolInteraction.strip_promoted_attributes({}) == {}
+
+
+@pytest.mark.parametrize("name, interaction_type, request_set, response_set", [
+    ("tool.execution", "execution", True, False),
+    ("tool.call.start", "result", True, False),
+    ("tool.call.finish", "result", False, True),
+    ("tool.other", None, False, False),
+])
+def test_from_event_interaction_kind(session, name, interaction_type, request_set, response_set):
+    """The event name selects the interaction type and which timestamp is recorded."""
+    event = session.get(Event, 1)
+    event.name = name
+    event.attributes = {"tool.name": "search"}
+
+    tool = ToolInteraction.from_event(session, event, {})
+
+    assert tool.interaction_type == interaction_type
+    assert (tool.request_timestamp == event.timestamp) is request_set
+    assert (tool.response_timestamp == event.timestamp) is response_set
+
+
+def test_payload_columns_deferred(session):
+    """List queries leave the payload columns unloaded unless asked for."""
+    from sqlalchemy import inspect
+    from sqlalchemy.orm import undefer_group
+
+    session.add(ToolInteraction(event_id=1, tool_name="search", parameters={"q": "x"}, result="ok"))
+    session.commit()
+    session.expunge_all()
+
+    tool = session.query(ToolInteraction).one()
+    assert {"parameters", "result", "raw_attributes"} <= inspect(tool).unloaded
+    session.expunge_all()
+
+    tool = session.query(ToolInteraction).options(undefer_group("payload")).one()
+    assert "parameters" not in inspect(tool).unloaded
+    assert tool.parameters == {"q": "x"}
+
+
+def test_status_names_stored_as_given(session):
+    """Statuses outside the usual set are stored, read back and filtered as written."""
+    now = datetime.utcnow()
+    session.add(Event(id=2, name="tool.result", timestamp=now, level="INFO", agent_id="agent-1", event_type="tool"))
+    session.add(ToolInteraction(event_id=1, tool_name="search", interaction_type="execution", status="error"))
+    session.add(ToolInteraction(event_id=2, tool_name="search", interaction_type="result", status="timeout"))
+    session.commit()
+
+    session.expire_all()
+    assert [tool.status for tool in session.query(ToolInteraction).order_by(ToolInteraction.id)] == ["error", "timeout"]
+    assert session.query(ToolInteraction).filter(ToolInteraction.status == "timeout").count() == 1
+    assert session.query(ToolInteraction).filter(ToolInteraction.status == "no-such-status").count() == 0
+
+
+def test_detailed_interactions_keep_empty_and_falsy_payloads(session):
+    """Empty parameters and falsy results are reported as stored, not as None."""
+    # src.analysis imports src.api back through src.services, so it only
+    # loads cleanly once src.api has been imported
+    import src.api  # noqa: F401
+    from src.analysis.metrics.tool_metrics import ToolMetrics
+
+    session.add(ToolInteraction(event_id=1, tool_name="search", parameters={}, result=0))
+    session.commit()
+
+    interaction, = ToolMetrics(session).get_tool_interactions_detailed()["interactions"]
+    assert interaction["parameters"] == {}
+    assert interaction["result"] == 0